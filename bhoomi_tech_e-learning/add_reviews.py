@@ -5,6 +5,11 @@ from pymongo import MongoClient
 from datetime import datetime, timezone
 from bson import ObjectId
 import random
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+from database.counters import rating_average
 
 # Connect to MongoDB
 client = MongoClient("mongodb://localhost:27017/e_learning")
@@ -66,6 +71,7 @@ sample_reviews = [
 
 # Create reviews
 review_count = 0
+rated_courses = set()
 for i in range(min(15, len(sample_reviews))):
     user = random.choice(users)
     course = random.choice(courses)
@@ -86,9 +92,26 @@ for i in range(min(15, len(sample_reviews))):
     }
     
     db.reviews.insert_one(review_doc)
+    # Keep the course's rating summary in step (see src/database/counters.py)
+    db.courses.update_one(
+        {"_id": course["_id"]},
+        {
+            "$inc": {"rating_count": 1, "rating_sum": review_data["rating"],
+                     f"rating_histogram.{review_data['rating']}": 1, "version": 1},
+            "$set": {"updated_at": review_doc["created_at"]},
+        }
+    )
+    rated_courses.add(course["_id"])
     review_count += 1
     print(f"✅ Added review by {user['name']} for {course['title']} - {review_data['rating']} stars")
 
+for course_id in rated_courses:
+    summary = db.courses.find_one({"_id": course_id}, {"rating_count": 1, "rating_sum": 1})
+    db.courses.update_one(
+        {"_id": course_id},
+        {"$set": {"rating_average": rating_average(summary["rating_count"], summary["rating_sum"])}}
+    )
+
 print(f"\n🎉 Added {review_count} sample reviews!")
 print(f"📊 Total reviews in database: {db.reviews.count_documents({})}")
 
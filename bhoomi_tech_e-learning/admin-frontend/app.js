@@ -2668,6 +2668,38 @@ function closeSidebar() {
     overlay.classList.remove('active');
 }
 
+// Instructor typeahead for the create course form
+let instructorLookupTimer = null;
+
+document.addEventListener('DOMContentLoaded', function() {
+    const input = document.getElementById('courseInstructor');
+    const suggestions = document.getElementById('instructorSuggestions');
+    if (!input || !suggestions) return;
+
+    input.addEventListener('input', () => {
+        clearTimeout(instructorLookupTimer);
+        const query = input.value.trim();
+        // Looks like a pasted/selected ObjectId; nothing to suggest
+        if (!query || /^[0-9a-f]{24}$/i.test(query)) return;
+
+        instructorLookupTimer = setTimeout(async () => {
+            try {
+                const response = await apiCall(`/autocomplete?type=user&role=instructor&limit=8&q=${encodeURIComponent(query)}`, 'GET');
+                if (!response.ok) return;
+                const data = await response.json();
+                suggestions.replaceChildren(...data.suggestions.map(user => {
+                    const option = document.createElement('option');
+                    option.value = user.id;
+                    option.textContent = `${user.label || ''} <${user.email || ''}>`;
+                    return option;
+                }));
+            } catch (error) {
+                console.error('Instructor lookup failed:', error);
+            }
+        }, 150);
+    });
+});
+
 // Close sidebar when clicking on nav items on mobile
 document.addEventListener('DOMContentLoaded', function() {
     const navItems = document.querySelectorAll('.nav-item');
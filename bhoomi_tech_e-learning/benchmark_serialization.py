@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Bhoomi Tech E-Learning Platform - Serialization Benchmark
+Compares the per-course cost of rendering a course listing as JSON:
+
+  legacy      rename _id in a Python loop, then jsonable_encoder + JSONResponse
+  serialize   simple_main-style serialize_doc (copy + scan every value), then json.dumps
+  fast        documents already carry "id" (renamed in MongoDB), rendered by serialization.dumps
+
+No database is needed; documents are generated in memory.
+
+    python benchmark_serialization.py [--courses 10000] [--repeat 5]
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from bson import ObjectId
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+import serialization
+
+
+def make_courses(count):
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "_id": ObjectId(),
+            "title": f"Course {i}: Practical Python for Data Work",
+            "description": "Hands-on lessons covering the language, the standard library and common tooling. " * 2,
+            "instructor_id": str(ObjectId()),
+            "lessons": [str(ObjectId()) for _ in range(8)],
+            "price": 499.0 + i % 7,
+            "is_active": True,
+            "lesson_count": 8,
+            "enrollment_count": i % 250,
+            "created_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def as_public(courses):
+    """What find_public returns: the same documents with a string "id" instead of _id"""
+    public = []
+    for course in courses:
+        doc = {"id": str(course["_id"])}
+        doc.update((key, value) for key, value in course.items() if key != "_id")
+        public.append(doc)
+    return public
+
+
+def legacy(courses):
+    for c in courses:
+        c["id"] = str(c["_id"])
+        c.pop("_id")
+    return JSONResponse(content=jsonable_encoder({"courses": courses, "next_cursor": None})).body
+
+
+def serialize_doc(doc):
+    doc = doc.copy()
+    doc["id"] = str(doc["_id"])
+    doc.pop("_id", None)
+    for key, value in doc.items():
+        if isinstance(value, datetime):
+            doc[key] = value.isoformat()
+        elif isinstance(value, ObjectId):
+            doc[key] = str(value)
+    return doc
+
+
+def simple_main(courses):
+    return json.dumps([serialize_doc(course) for course in courses]).encode("utf-8")
+
+
+def fast(courses):
+    return serialization.dumps({"courses": courses, "next_cursor": None})
+
+
+def measure(render, make_input, repeat):
+    """Best of `repeat` runs; the input is rebuilt outside the timer for renderers that mutate it"""
+    best = None
+    size = 0
+    for _ in range(repeat):
+        docs = make_input()
+        start = time.perf_counter()
+        body = render(docs)
+        elapsed = time.perf_counter() - start
+        size = len(body)
+        best = elapsed if best is None else min(best, elapsed)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON rendering of course listings")
+    parser.add_argument("--courses", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    courses = make_courses(args.courses)
+    public = as_public(courses)
+    cases = [
+        ("legacy", legacy, lambda: copy.deepcopy(courses)),
+        ("serialize", simple_main, lambda: courses),
+        ("fast", fast, lambda: public),
+    ]
+    if serialization.orjson is not None:
+        def fast_stdlib(docs):
+            # Same path with orjson unavailable
+            orjson, serialization.orjson = serialization.orjson, None
+            try:
+                return serialization.dumps({"courses": docs, "next_cursor": None})
+            finally:
+                serialization.orjson = orjson
+        cases.append(("fast-stdlib", fast_stdlib, lambda: public))
+
+    print(f"Rendering {args.courses} courses (best of {args.repeat})")
+    print(f"orjson: {'available' if serialization.orjson is not None else 'not installed'}\n")
+    print(f"{'renderer':<12} {'total ms':>10} {'us/course':>10} {'body KB':>9}")
+    baseline = None
+    for name, render, make_input in cases:
+        elapsed, size = measure(render, make_input, args.repeat)
+        baseline = baseline or elapsed
+        print(f"{name:<12} {elapsed * 1000:>10.1f} {elapsed / args.courses * 1e6:>10.2f} {size / 1024:>9.0f}"
+              f"   x{baseline / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
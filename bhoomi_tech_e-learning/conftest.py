@@ -0,0 +1,134 @@
+"""
+pytest setup for the tests in this directory.
+
+    pip install -r requirements.txt -r requirements-dev.txt
+    python -m pytest
+
+The tests run against the MongoDB at TEST_MONGO_URL when it is set (give it a
+throwaway database: every collection is emptied before each test). Otherwise
+they run against mongomock, and the tests marked requires_server (server-only
+operators such as $round) are skipped.
+
+The app is imported with the ThreadedDatabase fallback either way: motor binds
+its client to the first event loop it runs on, and the tests run several.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+# The older test_*.py files are scripts run by hand against a live server
+collect_ignore = [
+    "test_api.py", "test_admin_api.py", "test_db_connection.py", "test_mongodb.py", "test_imports.py",
+    "api_test.py", "simple_test.py",
+]
+
+TEST_MONGO_URL = os.getenv("TEST_MONGO_URL")
+
+_media_root = tempfile.mkdtemp(prefix="bhoomi-tests-")
+os.environ.update({
+    "MONGO_URL": TEST_MONGO_URL or "mongodb://localhost:27017/e_learning_test",
+    "BCRYPT_ROUNDS": "4",
+    # Background loops: run once at startup at most, so they never race a test
+    "ADMIN_STATS_REFRESH_SECONDS": "0",
+    "COUNTER_RECONCILE_INTERVAL_SECONDS": "0",
+    "SEARCH_INDEX_REFRESH_SECONDS": "0",
+    "PROGRESS_FLUSH_INTERVAL_SECONDS": "3600",
+    "VIDEO_UPLOAD_DIR": os.path.join(_media_root, "videos"),
+    "VIDEO_UPLOAD_STAGING_DIR": os.path.join(_media_root, "staging"),
+    "DOCUMENT_UPLOAD_DIR": os.path.join(_media_root, "documents"),
+})
+sys.modules["motor"] = None
+sys.modules["motor.motor_asyncio"] = None
+
+if not TEST_MONGO_URL:
+    import mongomock
+    import mongomock.collection
+    import pymongo
+
+    pymongo.MongoClient = mongomock.MongoClient
+
+    def _ignore_sort(method):
+        # pymongo 4.9+ passes sort= to bulk operations; mongomock 4.3 does not accept it
+        def wrapper(self, *args, sort=None, **kwargs):
+            return method(self, *args, **kwargs)
+        return wrapper
+
+    mongomock.collection.BulkOperationBuilder.add_update = _ignore_sort(
+        mongomock.collection.BulkOperationBuilder.add_update)
+    mongomock.collection.BulkOperationBuilder.add_replace = _ignore_sort(
+        mongomock.collection.BulkOperationBuilder.add_replace)
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "requires_server: needs a real MongoDB (TEST_MONGO_URL)")
+
+
+def pytest_collection_modifyitems(config, items):
+    if TEST_MONGO_URL:
+        return
+    skip = pytest.mark.skip(reason="needs a real MongoDB; set TEST_MONGO_URL")
+    for item in items:
+        if "requires_server" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def sync_db():
+    """The blocking database, emptied, with the in-process caches cleared"""
+    from cache import answer_key_cache, principal_cache, response_cache
+    from database.__init_db import db
+    from database.progress import progress_buffer
+
+    for name in db.list_collection_names():
+        db[name].delete_many({})
+    for cache in (response_cache, principal_cache, answer_key_cache):
+        cache.clear()
+    progress_buffer.forget(*list(progress_buffer._pending))
+    return db
+
+
+@pytest.fixture
+def db(sync_db):
+    """The async database the repositories use, emptied"""
+    from database.__init_db import async_db
+    return async_db
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    from fastapi.testclient import TestClient
+
+    import main
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def client(app_client, sync_db):
+    return app_client
+
+
+@pytest.fixture
+def make_user(sync_db):
+    """make_user(role) -> (user id, Authorization headers)"""
+    from auth import create_access_token, get_password_hash
+
+    def make(role: str = "student", name: str = "Test User", email: str = None):
+        email = email or f"{role}-{os.urandom(4).hex()}@example.com"
+        result = sync_db.users.insert_one({
+            "name": name, "email": email, "role": role, "is_active": True,
+            "password": get_password_hash("password"),
+        })
+        token = create_access_token({"sub": email})
+        return str(result.inserted_id), {"Authorization": f"Bearer {token}"}
+    return make
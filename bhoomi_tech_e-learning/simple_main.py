@@ -11,9 +11,18 @@ import bcrypt
 from typing import Optional, Dict, Any, List
 from pydantic import BaseModel
 from bson import ObjectId
+import asyncio
 import os
+import sys
 import logging
 
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+from database.loaders import Loaders
+from database.counters import adjust_course_rating, adjust_enrollment_counts, with_lesson_count
+from database.versioning import bump_version
+from database import rollups
+from serialization import FastJSONResponse, find_public, json_response
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,11 +33,17 @@ SECRET_KEY = "your_secret_key_here"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# MongoDB connection
-client = MongoClient(MONGO_URL)
-db = client.get_database()
+# MongoDB connection (async; falls back to pymongo on worker threads without motor)
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client.get_database()
+except ImportError:
+    from database.async_fallback import ThreadedDatabase
+    client = MongoClient(MONGO_URL)
+    db = ThreadedDatabase(client.get_database())
 
-app = FastAPI(title="Bhoomi E-Learning Admin API")
+app = FastAPI(title="Bhoomi E-Learning Admin API", default_response_class=FastJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -77,14 +92,14 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current user from JWT token"""
     try:
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-        user = db.users.find_one({"email": email})
+        user = await db.users.find_one({"email": email})
         if user is None:
             raise HTTPException(status_code=401, detail="User not found")
         return user
@@ -114,12 +129,13 @@ def serialize_doc(doc):
 @app.post("/admin/login")
 async def admin_login(request: LoginRequest):
     """Admin login"""
-    user = db.users.find_one({"email": request.email})
+    user = await db.users.find_one({"email": request.email})
     
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
     
-    if not verify_password(request.password, user["password"]):
+    # bcrypt is deliberately slow; keep it off the event loop
+    if not await asyncio.to_thread(verify_password, request.password, user["password"]):
         raise HTTPException(status_code=401, detail="Incorrect email or password")
     
     if user["role"] != "admin":
@@ -140,26 +156,29 @@ async def get_dashboard(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Access denied")
     
     # Get counts
-    total_users = db.users.count_documents({})
-    total_courses = db.courses.count_documents({})
-    total_enrollments = db.enrollments.count_documents({})
-    total_payments = db.payments.count_documents({})
+    total_users = await db.users.count_documents({})
+    total_courses = await db.courses.count_documents({})
+    total_enrollments = await db.enrollments.count_documents({})
+    total_payments = await db.payments.count_documents({})
     
     # Get revenue
     pipeline = [
         {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
     ]
-    revenue_result = list(db.payments.aggregate(pipeline))
+    revenue_result = await db.payments.aggregate(pipeline).to_list(length=None)
     total_revenue = revenue_result[0]["total"] if revenue_result else 0
     
     # Get recent enrollments
-    recent_enrollments = list(db.enrollments.find().sort("enrolled_at", -1).limit(5))
+    recent_enrollments = await db.enrollments.find().sort("enrolled_at", -1).limit(5).to_list(length=None)
     
     # Add user and course info to enrollments
+    loaders = Loaders(db)
+    users = await loaders.users.load_many(e["user_id"] for e in recent_enrollments)
+    courses = await loaders.courses.load_many(e["course_id"] for e in recent_enrollments)
     processed_enrollments = []
     for enrollment in recent_enrollments:
-        user = db.users.find_one({"_id": enrollment["user_id"]})
-        course = db.courses.find_one({"_id": enrollment["course_id"]})
+        user = users.get(str(enrollment["user_id"]))
+        course = courses.get(str(enrollment["course_id"]))
         enrollment["user_name"] = user["name"] if user else "Unknown"
         enrollment["course_title"] = course["title"] if course else "Unknown"
         processed_enrollments.append(serialize_doc(enrollment))
@@ -179,8 +198,8 @@ async def get_users(current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
     
-    users = list(db.users.find().sort("created_at", -1))
-    return [serialize_doc(user) for user in users]
+    users = await find_public(db.users, sort={"created_at": -1}, projection={"password": 0})
+    return json_response(users)
 
 @app.post("/admin/users")
 async def create_user(user_data: dict, current_user: dict = Depends(get_current_user)):
@@ -196,10 +215,11 @@ async def create_user(user_data: dict, current_user: dict = Depends(get_current_
     user_data["created_at"] = datetime.now(timezone.utc)
     user_data["updated_at"] = datetime.now(timezone.utc)
     
-    result = db.users.insert_one(user_data)
+    result = await db.users.insert_one(user_data)
+    await rollups.record_signup(user_data["created_at"], database=db)
     
     # Return the created user
-    created_user = db.users.find_one({"_id": result.inserted_id})
+    created_user = await db.users.find_one({"_id": result.inserted_id})
     return serialize_doc(created_user)
 
 @app.get("/admin/courses")
@@ -208,15 +228,16 @@ async def get_courses(current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
     
-    courses = list(db.courses.find().sort("created_at", -1))
+    courses = await find_public(db.courses, sort={"created_at": -1})
     
     # Add instructor info
+    instructors = await Loaders(db).users.load_many(c.get("instructor_id") for c in courses)
     for course in courses:
         if "instructor_id" in course:
-            instructor = db.users.find_one({"_id": course["instructor_id"]})
+            instructor = instructors.get(str(course["instructor_id"]))
             course["instructor_name"] = instructor["name"] if instructor else "Unknown"
     
-    return [serialize_doc(course) for course in courses]
+    return json_response(courses)
 
 @app.get("/admin/enrollments")
 async def get_enrollments(current_user: dict = Depends(get_current_user)):
@@ -224,16 +245,19 @@ async def get_enrollments(current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
     
-    enrollments = list(db.enrollments.find().sort("enrolled_at", -1))
+    enrollments = await find_public(db.enrollments, sort={"enrolled_at": -1})
     
     # Add user and course info
+    loaders = Loaders(db)
+    users = await loaders.users.load_many(x["user_id"] for x in enrollments)
+    courses = await loaders.courses.load_many(x["course_id"] for x in enrollments)
     for enrollment in enrollments:
-        user = db.users.find_one({"_id": enrollment["user_id"]})
-        course = db.courses.find_one({"_id": enrollment["course_id"]})
+        user = users.get(str(enrollment["user_id"]))
+        course = courses.get(str(enrollment["course_id"]))
         enrollment["user_name"] = user["name"] if user else "Unknown"
         enrollment["course_title"] = course["title"] if course else "Unknown"
     
-    return [serialize_doc(enrollment) for enrollment in enrollments]
+    return json_response(enrollments)
 
 @app.get("/admin/payments")
 async def get_payments(current_user: dict = Depends(get_current_user)):
@@ -241,16 +265,19 @@ async def get_payments(current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
     
-    payments = list(db.payments.find().sort("created_at", -1))
+    payments = await find_public(db.payments, sort={"created_at": -1})
     
     # Add user and course info
+    loaders = Loaders(db)
+    users = await loaders.users.load_many(x["user_id"] for x in payments)
+    courses = await loaders.courses.load_many(x["course_id"] for x in payments)
     for payment in payments:
-        user = db.users.find_one({"_id": payment["user_id"]})
-        course = db.courses.find_one({"_id": payment["course_id"]})
+        user = users.get(str(payment["user_id"]))
+        course = courses.get(str(payment["course_id"]))
         payment["user_name"] = user["name"] if user else "Unknown"
         payment["course_title"] = course["title"] if course else "Unknown"
     
-    return [serialize_doc(payment) for payment in payments]
+    return json_response(payments)
 
 @app.get("/admin/reviews")
 async def get_reviews(current_user: dict = Depends(get_current_user)):
@@ -258,16 +285,19 @@ async def get_reviews(current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
     
-    reviews = list(db.reviews.find().sort("created_at", -1))
+    reviews = await find_public(db.reviews, sort={"created_at": -1})
     
     # Add user and course info
+    loaders = Loaders(db)
+    users = await loaders.users.load_many(x["user_id"] for x in reviews)
+    courses = await loaders.courses.load_many(x["course_id"] for x in reviews)
     for review in reviews:
-        user = db.users.find_one({"_id": review["user_id"]})
-        course = db.courses.find_one({"_id": review["course_id"]})
+        user = users.get(str(review["user_id"]))
+        course = courses.get(str(review["course_id"]))
         review["user_name"] = user["name"] if user else "Unknown"
         review["course_title"] = course["title"] if course else "Unknown"
     
-    return [serialize_doc(review) for review in reviews]
+    return json_response(reviews)
 
 @app.delete("/admin/reviews/{review_id}")
 async def delete_review(review_id: str, current_user: dict = Depends(get_current_user)):
@@ -276,9 +306,12 @@ async def delete_review(review_id: str, current_user: dict = Depends(get_current
         raise HTTPException(status_code=403, detail="Access denied")
     
     try:
-        result = db.reviews.delete_one({"_id": ObjectId(review_id)})
-        if result.deleted_count == 0:
+        review = await db.reviews.find_one_and_delete(
+            {"_id": ObjectId(review_id)}, projection={"course_id": 1, "rating": 1}
+        )
+        if review is None:
             raise HTTPException(status_code=404, detail="Review not found")
+        await adjust_course_rating(review.get("course_id"), review.get("rating"), -1, database=db)
         
         return {"message": "Review deleted successfully"}
     except Exception as e:
@@ -289,7 +322,7 @@ async def delete_review(review_id: str, current_user: dict = Depends(get_current
 async def get_user_by_id(user_id: str):
     """Get a specific user by ID"""
     try:
-        user = db.users.find_one({"_id": ObjectId(user_id)})
+        user = await db.users.find_one({"_id": ObjectId(user_id)})
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -311,7 +344,7 @@ async def update_user(user_id: str, user_data: dict):
         
         user_data["updated_at"] = datetime.utcnow()
         
-        result = db.users.update_one(
+        result = await db.users.update_one(
             {"_id": ObjectId(user_id)},
             {"$set": user_data}
         )
@@ -328,7 +361,7 @@ async def update_user(user_id: str, user_data: dict):
 async def get_course_by_id(course_id: str):
     """Get a specific course by ID"""
     try:
-        course = db.courses.find_one({"_id": ObjectId(course_id)})
+        course = await db.courses.find_one({"_id": ObjectId(course_id)})
         if not course:
             raise HTTPException(status_code=404, detail="Course not found")
         
@@ -342,11 +375,11 @@ async def get_course_by_id(course_id: str):
 async def update_course(course_id: str, course_data: dict):
     """Update a specific course"""
     try:
-        course_data["updated_at"] = datetime.utcnow()
+        course_data.pop("version", None)
         
-        result = db.courses.update_one(
+        result = await db.courses.update_one(
             {"_id": ObjectId(course_id)},
-            {"$set": course_data}
+            bump_version({"$set": with_lesson_count(course_data)})
         )
         
         if result.matched_count == 0:
@@ -361,7 +394,7 @@ async def update_course(course_id: str, course_data: dict):
 async def get_enrollment_by_id(enrollment_id: str):
     """Get a specific enrollment by ID"""
     try:
-        enrollment = db.enrollments.find_one({"_id": ObjectId(enrollment_id)})
+        enrollment = await db.enrollments.find_one({"_id": ObjectId(enrollment_id)})
         if not enrollment:
             raise HTTPException(status_code=404, detail="Enrollment not found")
         
@@ -375,9 +408,15 @@ async def get_enrollment_by_id(enrollment_id: str):
 async def delete_enrollment(enrollment_id: str):
     """Delete an enrollment"""
     try:
-        result = db.enrollments.delete_one({"_id": ObjectId(enrollment_id)})
-        if result.deleted_count == 0:
+        enrollment = await db.enrollments.find_one_and_delete(
+            {"_id": ObjectId(enrollment_id)}, projection={"user_id": 1, "course_id": 1, "enrolled_at": 1}
+        )
+        if enrollment is None:
             raise HTTPException(status_code=404, detail="Enrollment not found")
+        await adjust_enrollment_counts(enrollment.get("user_id"), enrollment.get("course_id"), -1, database=db)
+        if enrollment.get("enrolled_at"):
+            await rollups.record_enrollment(enrollment.get("course_id"), enrollment["enrolled_at"],
+                                            delta=-1, database=db)
         
         return {"message": "Enrollment deleted successfully"}
     except Exception as e:
@@ -388,7 +427,7 @@ async def delete_enrollment(enrollment_id: str):
 async def get_payment_by_id(payment_id: str):
     """Get a specific payment by ID"""
     try:
-        payment = db.payments.find_one({"_id": ObjectId(payment_id)})
+        payment = await db.payments.find_one({"_id": ObjectId(payment_id)})
         if not payment:
             raise HTTPException(status_code=404, detail="Payment not found")
         
@@ -402,10 +441,16 @@ async def get_payment_by_id(payment_id: str):
 async def delete_payment(payment_id: str):
     """Delete a payment record"""
     try:
-        result = db.payments.delete_one({"_id": ObjectId(payment_id)})
-        if result.deleted_count == 0:
+        payment = await db.payments.find_one_and_delete(
+            {"_id": ObjectId(payment_id)},
+            projection={"status": 1, "amount": 1, "payment_date": 1, "created_at": 1}
+        )
+        if payment is None:
             raise HTTPException(status_code=404, detail="Payment not found")
-        
+        when = payment.get("payment_date") or payment.get("created_at")
+        if payment.get("status") == "completed" and when:
+            await rollups.record_revenue(payment.get("amount"), when, delta=-1, database=db)
+
         return {"message": "Payment deleted successfully"}
     except Exception as e:
         logger.error(f"Error deleting payment {payment_id}: {e}")
@@ -415,7 +460,7 @@ async def delete_payment(payment_id: str):
 async def get_review_by_id(review_id: str):
     """Get a specific review by ID"""
     try:
-        review = db.reviews.find_one({"_id": ObjectId(review_id)})
+        review = await db.reviews.find_one({"_id": ObjectId(review_id)})
         if not review:
             raise HTTPException(status_code=404, detail="Review not found")
         
@@ -439,19 +484,15 @@ async def get_user_growth():
         months = []
         values = []
         
-        for i in range(6):
-            month_date = today - timedelta(days=30*i)
+        # One query over the daily rollups instead of a count per month
+        month_dates = [today - timedelta(days=30*i) for i in range(6)]
+        first_day = month_dates[-1].replace(day=1).strftime("%Y-%m-%d")
+        signups = await rollups.monthly_totals("signups", first_day, database=db)
+        
+        for i, month_date in enumerate(month_dates):
             month_name = calendar.month_abbr[month_date.month]
             months.insert(0, month_name)
-            
-            # Count users created in this month (simulate data for demo)
-            # In real implementation, you would query the database
-            count = db.users.count_documents({
-                "created_at": {
-                    "$gte": month_date.replace(day=1),
-                    "$lt": (month_date.replace(day=28) + timedelta(days=4)).replace(day=1)
-                }
-            }) or (10 + i * 15)  # Fallback demo data
+            count = signups.get(month_date.strftime("%Y-%m")) or (10 + i * 15)  # Fallback demo data
             values.insert(0, count)
         
         return {"months": months, "values": values}
@@ -467,35 +508,11 @@ async def get_user_growth():
 async def get_course_popularity():
     """Get course popularity analytics"""
     try:
-        # Aggregate course enrollment counts
-        pipeline = [
-            {
-                "$lookup": {
-                    "from": "courses",
-                    "localField": "course_id",
-                    "foreignField": "_id",
-                    "as": "course"
-                }
-            },
-            {
-                "$unwind": "$course"
-            },
-            {
-                "$group": {
-                    "_id": "$course.title",
-                    "enrollments": {"$sum": 1}
-                }
-            },
-            {
-                "$sort": {"enrollments": -1}
-            },
-            {
-                "$limit": 5
-            }
-        ]
-        
-        result = list(db.enrollments.aggregate(pipeline))
-        courses = [{"name": doc["_id"], "enrollments": doc["enrollments"]} for doc in result]
+        # Read the per-course enrollment_count counters instead of grouping every enrollment
+        result = await db.courses.find(
+            {"enrollment_count": {"$gt": 0}}, {"title": 1, "enrollment_count": 1}
+        ).sort("enrollment_count", -1).limit(5).to_list(length=5)
+        courses = [{"name": doc.get("title"), "enrollments": doc["enrollment_count"]} for doc in result]
         
         # If no data, return demo data
         if not courses:
@@ -530,35 +547,15 @@ async def get_revenue_trends():
         months = []
         revenue = []
         
-        for i in range(6):
-            month_date = today - timedelta(days=30*i)
+        # One query over the daily rollups instead of an aggregation per month
+        month_dates = [today - timedelta(days=30*i) for i in range(6)]
+        first_day = month_dates[-1].replace(day=1).strftime("%Y-%m-%d")
+        totals = await rollups.monthly_totals("revenue", first_day, database=db)
+        
+        for i, month_date in enumerate(month_dates):
             month_name = calendar.month_abbr[month_date.month]
             months.insert(0, month_name)
-            
-            # Calculate revenue for this month
-            month_start = month_date.replace(day=1)
-            next_month = (month_date.replace(day=28) + timedelta(days=4)).replace(day=1)
-            
-            pipeline = [
-                {
-                    "$match": {
-                        "status": "completed",
-                        "payment_date": {
-                            "$gte": month_start,
-                            "$lt": next_month
-                        }
-                    }
-                },
-                {
-                    "$group": {
-                        "_id": None,
-                        "total": {"$sum": "$amount"}
-                    }
-                }
-            ]
-            
-            result = list(db.payments.aggregate(pipeline))
-            month_revenue = result[0]["total"] if result else (1200 + i * 400)  # Demo fallback
+            month_revenue = totals.get(month_date.strftime("%Y-%m")) or (1200 + i * 400)  # Demo fallback
             revenue.insert(0, int(month_revenue))
         
         return {"months": months, "revenue": revenue}
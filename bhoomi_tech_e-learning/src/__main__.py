@@ -1,4 +1,5 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query
+from typing import Optional
 from src.database.__init_db import client, db
 from src.routes.user import router as user_router
 from src.routes.course import router as course_router
@@ -23,15 +24,23 @@ app.include_router(payment_router)
 
 # Home feed endpoint: returns all courses
 from src.database.repositories.course_repository import CourseRepository
+from src.database.pagination import InvalidCursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, DESCENDING
 
 @app.get("/home-feed")
-def home_feed():
-    courses = CourseRepository.find_all()
+async def home_feed(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    # Newest courses first
+    try:
+        courses, next_cursor = await CourseRepository.find_page(cursor, limit, direction=DESCENDING)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     for c in courses:
         c["id"] = str(c["_id"])
         c.pop("_id")
-    return {"courses": courses}
+    return {"courses": courses, "next_cursor": next_cursor}
 
 @app.get("/")
-def root():
+async def root():
     return {"message": "Bhoomi Tech E-Learning Backend is running."}
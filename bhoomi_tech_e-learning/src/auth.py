@@ -1,9 +1,37 @@
+from fastapi import HTTPException
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 from config import config
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min/max to the configured cost makes hashes with any other cost
+# "need update", so they are transparently rehashed on the next login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=config.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=config.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=config.BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL, so a dedicated thread pool keeps hashing off the
+# event loop and out of the shared threadpool used by other endpoints.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=config.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+_pending_hashes = 0
+
+class PasswordHasherBusy(HTTPException):
+    """Raised when more hashing jobs are queued than PASSWORD_HASH_MAX_PENDING"""
+    def __init__(self):
+        super().__init__(
+            status_code=503,
+            detail="Password service is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -11,6 +39,24 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def _run_hash_job(func, *args):
+    global _pending_hashes
+    if _pending_hashes >= config.PASSWORD_HASH_MAX_PENDING:
+        raise PasswordHasherBusy()
+    _pending_hashes += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _pending_hashes -= 1
+
+async def hash_password_async(password):
+    return await _run_hash_job(pwd_context.hash, password)
+
+async def verify_password_async(plain_password, hashed_password):
+    """Returns (is_valid, new_hash); new_hash is set when the stored hash uses an outdated cost"""
+    return await _run_hash_job(pwd_context.verify_and_update, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
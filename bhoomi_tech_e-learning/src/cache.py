@@ -0,0 +1,167 @@
+"""
+In-process caches: rendered responses for read-heavy catalog endpoints,
+authenticated principals for middleware.get_current_user and compiled quiz
+answer keys for grading.py.
+
+Entries are bounded (LRU) and expire after a TTL. Every entry carries tags such
+as "courses" or "course:<id>" so write paths can drop exactly the responses they
+affect. Each worker process has its own cache, so another worker's writes are
+picked up once the TTL expires.
+
+cached_json also keeps each body's ETag / Last-Modified (conditional.py), so a
+revalidation that hits the cache gets a 304 without loading anything.
+
+invalidate_course/invalidate_user also mark the documents stale in the search
+and autocomplete indexes (search.py), so write paths have a single hook to call.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from conditional import Validators, is_not_modified, not_modified_response, validator_headers
+from config import config
+from search import mark_course_stale, mark_user_stale
+from serialization import dumps
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key: str, value: Any, tags: Iterable[str] = ()):
+        if self.maxsize <= 0:
+            return
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, *tags: str) -> int:
+        """Drop every entry carrying any of the tags; returns how many were dropped"""
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.pop(tag, set())
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+response_cache = TTLCache(
+    maxsize=config.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl=config.RESPONSE_CACHE_TTL_SECONDS,
+)
+
+# token -> user document, tagged "user:<id>"
+principal_cache = TTLCache(
+    maxsize=config.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=config.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+# quiz id -> compiled grading.AnswerKey, tagged "quiz:<id>"
+answer_key_cache = TTLCache(
+    maxsize=config.ANSWER_KEY_CACHE_MAX_ENTRIES,
+    ttl=config.ANSWER_KEY_CACHE_TTL_SECONDS,
+)
+
+
+async def cached_json(key: str, tags: Iterable[str], build: Callable[[], Awaitable[Any]],
+                      request: Optional[Request] = None,
+                      validators: Optional[Callable[[Any], Validators]] = None) -> Response:
+    """Serve the rendered JSON body for key, building and caching it on a miss.
+    With request and validators, answer conditional requests with a 304."""
+    found, entry = response_cache.get(key)
+    if found:
+        body, etag, last_modified = entry
+    else:
+        content = await build()
+        etag, last_modified = validators(content) if validators else (None, None)
+        if request is not None and is_not_modified(request, etag, last_modified):
+            # The client already has it; skip rendering (the next full GET caches the body)
+            return not_modified_response(etag, last_modified)
+        body = dumps(content)
+        response_cache.set(key, (body, etag, last_modified), tags)
+    if request is not None and is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    return Response(content=body, media_type="application/json", headers=validator_headers(etag, last_modified))
+
+
+def invalidate_course(*course_ids):
+    response_cache.invalidate("courses", *(f"course:{course_id}" for course_id in course_ids))
+    mark_course_stale(*course_ids)
+
+
+def invalidate_lesson(*lesson_ids):
+    response_cache.invalidate("lessons", *(f"lesson:{lesson_id}" for lesson_id in lesson_ids))
+
+
+def invalidate_quiz(*quiz_ids):
+    response_cache.invalidate("quizzes", *(f"quiz:{quiz_id}" for quiz_id in quiz_ids))
+    answer_key_cache.invalidate(*(f"quiz:{quiz_id}" for quiz_id in quiz_ids))
+
+
+def invalidate_user(*user_ids):
+    principal_cache.invalidate(*(f"user:{user_id}" for user_id in user_ids))
+    mark_user_stale(*user_ids)
@@ -0,0 +1,190 @@
+"""
+Response compression (brotli or gzip, negotiated from Accept-Encoding).
+
+CompressionMiddleware compresses text-like responses (JSON, JSON Lines, CSV,
+HTML, JS, CSS, ...) when the body is at least `minimum_size` bytes. Streaming
+responses are compressed chunk by chunk. Responses that already carry a
+Content-Encoding pass through untouched: the gzip report exports and the
+precompressed admin-frontend files (static_assets.py). Brotli is used when the
+`brotli` package is installed; otherwise only gzip is offered. A compressed
+response gets a weak ETag (W/) and loses Accept-Ranges; If-None-Match uses the
+weak comparison (conditional.py), so revalidation still answers 304.
+"""
+import zlib
+from typing import List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def negotiate_encoding(accept_encoding: str, available: Tuple[str, ...]) -> Optional[str]:
+    """Best encoding of `available` (in preference order) the client accepts"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    for encoding in available:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def available_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data)
+        return self._zlib.compress(data)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _without(headers: List[Tuple[bytes, bytes]], *names: bytes) -> List[Tuple[bytes, bytes]]:
+    return [(key, value) for key, value in headers if key.lower() not in names]
+
+
+def _weaken_etag(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    # The encoded body is not byte-identical to the identity one, so it cannot share a strong validator
+    etag = _header(headers, b"etag")
+    if etag is None or etag.startswith(b"W/"):
+        return headers
+    return _without(headers, b"etag") + [(b"etag", b"W/" + etag)]
+
+
+def _add_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    vary = _header(headers, b"vary")
+    if vary is None:
+        return headers + [(b"vary", b"Accept-Encoding")]
+    if b"accept-encoding" in vary.lower():
+        return headers
+    return _without(headers, b"vary") + [(b"vary", vary + b", Accept-Encoding")]
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for key, value in scope.get("headers", ()):
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept_encoding, available_encodings())
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(send, encoding, self)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    """Holds http.response.start until the first body chunk shows whether to compress"""
+
+    def __init__(self, send, encoding: str, options: CompressionMiddleware):
+        self._send = send
+        self._encoding = encoding
+        self._options = options
+        self._start = None
+        self._compressor: Optional[_Compressor] = None
+        self._passthrough = False
+
+    def _should_skip(self, start) -> bool:
+        headers = start.get("headers", [])
+        if start["status"] < 200 or start["status"] in (204, 206, 304):
+            return True
+        if _header(headers, b"content-encoding") is not None:
+            return True
+        content_type = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+        return not content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def send(self, message):
+        if self._passthrough:
+            await self._send(message)
+            return
+        if message["type"] == "http.response.start":
+            self._start = message
+            if self._should_skip(message):
+                self._passthrough = True
+                await self._send(message)
+            return
+        if message["type"] != "http.response.body":
+            # Something we do not rewrite (e.g. pathsend): send the response as is
+            self._passthrough = True
+            await self._send(self._start)
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._compressor is None:
+            headers = list(self._start.get("headers", []))
+            if not more_body and len(body) < self._options.minimum_size:
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send(message)
+                return
+            self._compressor = _Compressor(self._encoding, self._options.gzip_level, self._options.brotli_quality)
+            # Byte ranges of the identity body do not apply to the encoded one
+            headers = _weaken_etag(_add_vary(_without(headers, b"content-length", b"accept-ranges")))
+            headers.append((b"content-encoding", self._encoding.encode("ascii")))
+            if not more_body:
+                compressed = self._compressor.compress(body) + self._compressor.finish()
+                headers.append((b"content-length", str(len(compressed)).encode("ascii")))
+                await self._send(dict(self._start, headers=headers))
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+            await self._send(dict(self._start, headers=headers))
+
+        data = self._compressor.compress(body)
+        if not more_body:
+            data += self._compressor.finish()
+        if data or not more_body:
+            await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -0,0 +1,94 @@
+"""
+Conditional GET support: ETag / Last-Modified validators and 304 responses.
+
+A document's validators come from its `version` and `updated_at` (see
+database/versioning.py). A listing's ETag hashes the (id, version) pairs on the
+page, so it changes when an item is edited, added or removed. Listings send no
+Last-Modified: removing an item does not move the newest updated_at.
+
+cache.cached_json stores the validators next to the rendered body, so a
+revalidation that hits the response cache is answered with a 304 without
+loading the document. On a miss the 304 is decided before the body is
+serialized.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+Validators = Tuple[Optional[str], Optional[datetime]]
+
+
+def _utc(value: Any) -> Optional[datetime]:
+    if not isinstance(value, datetime):
+        return None
+    # MongoDB hands back naive UTC datetimes
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def document_validators(kind: str) -> Callable[[Dict[str, Any]], Validators]:
+    """Validators for a single public document of the given kind ("course", "lesson", ...)"""
+    def validators(doc: Dict[str, Any]) -> Validators:
+        etag = f'"{kind}-{doc["id"]}-v{doc.get("version", 0)}"'
+        return etag, _utc(doc.get("updated_at"))
+    return validators
+
+
+def listing_validators(kind: str, items_key: str) -> Callable[[Dict[str, Any]], Validators]:
+    """Validators for a page of public documents found under content[items_key]"""
+    def validators(content: Dict[str, Any]) -> Validators:
+        digest = hashlib.blake2b(digest_size=16)
+        for item in content.get(items_key) or ():
+            digest.update(f'{item["id"]}:{item.get("version", 0)};'.encode("ascii"))
+        return f'"{kind}-{digest.hexdigest()}"', None
+    return validators
+
+
+def validator_headers(etag: Optional[str], last_modified: Optional[datetime]) -> Dict[str, str]:
+    headers = {}
+    if etag:
+        headers["ETag"] = etag
+        # Let clients keep the body but revalidate before reusing it
+        headers["Cache-Control"] = "no-cache"
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+def is_not_modified(request: Request, etag: Optional[str], last_modified: Optional[datetime]) -> bool:
+    """Whether the request's If-None-Match / If-Modified-Since say the client copy is current"""
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence; If-Modified-Since is then ignored
+        return etag is not None and _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = _utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+        return since is not None and last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def not_modified_response(etag: Optional[str], last_modified: Optional[datetime]) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
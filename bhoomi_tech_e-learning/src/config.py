@@ -6,5 +6,32 @@ load_dotenv()
 class Config:
     MONGO_URL: str = os.getenv("MONGO_URL", "mongodb://localhost:27017/e_learning")
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your_secret_key_here")
+    ADMIN_STATS_REFRESH_SECONDS: int = int(os.getenv("ADMIN_STATS_REFRESH_SECONDS", "60"))
+    COUNTER_RECONCILE_INTERVAL_SECONDS: int = int(os.getenv("COUNTER_RECONCILE_INTERVAL_SECONDS", "3600"))
+    SEARCH_INDEX_REFRESH_SECONDS: int = int(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", "300"))
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "4096"))
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    REPORT_EXPORT_BATCH_SIZE: int = int(os.getenv("REPORT_EXPORT_BATCH_SIZE", "1000"))
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    VIDEO_UPLOAD_DIR: str = os.getenv("VIDEO_UPLOAD_DIR", "../uploads/videos")
+    VIDEO_UPLOAD_STAGING_DIR: str = os.getenv("VIDEO_UPLOAD_STAGING_DIR", "../uploads/staging")
+    VIDEO_UPLOAD_MAX_BYTES: int = int(os.getenv("VIDEO_UPLOAD_MAX_BYTES", str(10 * 1024 ** 3)))
+    VIDEO_UPLOAD_MAX_CHUNK_BYTES: int = int(os.getenv("VIDEO_UPLOAD_MAX_CHUNK_BYTES", str(64 * 1024 ** 2)))
+    VIDEO_UPLOAD_STALE_HOURS: int = int(os.getenv("VIDEO_UPLOAD_STALE_HOURS", "24"))
+    DOCUMENT_UPLOAD_DIR: str = os.getenv("DOCUMENT_UPLOAD_DIR", "../uploads/documents")
+    MEDIA_HANDLE_CACHE_SIZE: int = int(os.getenv("MEDIA_HANDLE_CACHE_SIZE", "64"))
+    MEDIA_CHUNK_SIZE: int = int(os.getenv("MEDIA_CHUNK_SIZE", str(256 * 1024)))
+    PROGRESS_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("PROGRESS_FLUSH_INTERVAL_SECONDS", "5"))
+    PROGRESS_BUFFER_MAX_PENDING: int = int(os.getenv("PROGRESS_BUFFER_MAX_PENDING", "50000"))
+    ANSWER_KEY_CACHE_TTL_SECONDS: int = int(os.getenv("ANSWER_KEY_CACHE_TTL_SECONDS", "3600"))
+    ANSWER_KEY_CACHE_MAX_ENTRIES: int = int(os.getenv("ANSWER_KEY_CACHE_MAX_ENTRIES", "1024"))
+    ENSURE_INDEXES_ON_STARTUP: bool = os.getenv("ENSURE_INDEXES_ON_STARTUP", "true").lower() == "true"
     
 config = Config()
@@ -19,7 +19,7 @@ async def create_admin_user():
     
     try:
         # Check if admin user already exists
-        existing_admin = UserRepository.find_by_email("admin@bhoomi.com")
+        existing_admin = await UserRepository.find_by_email("admin@bhoomi.com")
         if existing_admin:
             print("✅ Admin user already exists!")
             print(f"   Email: {existing_admin['email']}")
@@ -87,7 +87,7 @@ async def create_sample_users():
     for user_data in sample_users:
         try:
             # Check if user already exists
-            existing_user = UserRepository.find_by_email(user_data["email"])
+            existing_user = await UserRepository.find_by_email(user_data["email"])
             if existing_user:
                 continue
             
@@ -1,6 +1,13 @@
 from pymongo import MongoClient
 from config import config
+from database.async_fallback import ThreadedDatabase
 
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:  # motor is optional, fall back to pymongo on worker threads
+    AsyncIOMotorClient = None
+
+# Blocking client, used by the setup/populate scripts
 client = MongoClient(config.MONGO_URL)
 db = client.get_database()
 
@@ -13,3 +20,23 @@ quizzes_collection = db["quizzes"]
 reviews_collection = db["reviews"]
 notifications_collection = db["notifications"]
 payments_collection = db["payments"]
+quiz_results_collection = db["quiz_results"]
+
+# Shared async client, used by the repositories and routes
+if AsyncIOMotorClient is not None:
+    async_client = AsyncIOMotorClient(config.MONGO_URL)
+    async_db = async_client.get_database()
+else:
+    async_client = None
+    async_db = ThreadedDatabase(db)
+
+async_users_collection = async_db["users"]
+async_courses_collection = async_db["courses"]
+async_lessons_collection = async_db["lessons"]
+async_enrollments_collection = async_db["enrollments"]
+async_quizzes_collection = async_db["quizzes"]
+async_reviews_collection = async_db["reviews"]
+async_notifications_collection = async_db["notifications"]
+async_payments_collection = async_db["payments"]
+async_quiz_results_collection = async_db["quiz_results"]
+async_admin_stats_collection = async_db["admin_stats"]
@@ -0,0 +1,113 @@
+"""
+Thread-backed stand-in for the Motor client.
+
+Used by database/__init_db.py when motor is not installed: every blocking
+pymongo call is pushed onto a worker thread so the async repositories keep the
+same awaitable API either way.
+"""
+import asyncio
+from itertools import islice
+
+DEFAULT_BATCH_SIZE = 101
+
+
+class ThreadedCursor:
+    """Awaitable wrapper around a pymongo cursor (or a callable opening one)"""
+
+    def __init__(self, cursor=None, opener=None):
+        self._cursor = cursor
+        self._opener = opener
+
+    def _ensure_open(self):
+        # aggregate() runs its command eagerly, so it is opened lazily here
+        if self._cursor is None:
+            self._cursor = self._opener()
+        return self._cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, *args):
+        self._cursor.skip(*args)
+        return self
+
+    def limit(self, *args):
+        self._cursor.limit(*args)
+        return self
+
+    def batch_size(self, *args):
+        if self._cursor is not None:
+            self._cursor.batch_size(*args)
+        return self
+
+    async def to_list(self, length=None):
+        def fetch():
+            cursor = self._ensure_open()
+            if length is None:
+                return list(cursor)
+            return list(islice(cursor, length))
+        return await asyncio.to_thread(fetch)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        while True:
+            batch = await self.to_list(DEFAULT_BATCH_SIZE)
+            if not batch:
+                return
+            for doc in batch:
+                yield doc
+
+
+class ThreadedCollection:
+    """Async facade over a pymongo Collection"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    @property
+    def name(self):
+        return self._collection.name
+
+    def find(self, *args, **kwargs):
+        return ThreadedCursor(self._collection.find(*args, **kwargs))
+
+    def aggregate(self, pipeline, **kwargs):
+        return ThreadedCursor(opener=lambda: self._collection.aggregate(pipeline, **kwargs))
+
+    def list_indexes(self):
+        return ThreadedCursor(opener=self._collection.list_indexes)
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(attr, *args, **kwargs)
+        return call
+
+
+class ThreadedDatabase:
+    """Async facade over a pymongo Database"""
+
+    def __init__(self, database):
+        self._database = database
+
+    @property
+    def name(self):
+        return self._database.name
+
+    def __getitem__(self, name):
+        return ThreadedCollection(self._database[name])
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def command(self, *args, **kwargs):
+        return await asyncio.to_thread(self._database.command, *args, **kwargs)
+
+    async def list_collection_names(self, *args, **kwargs):
+        return await asyncio.to_thread(self._database.list_collection_names, *args, **kwargs)
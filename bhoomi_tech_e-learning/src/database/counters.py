@@ -0,0 +1,200 @@
+"""
+Denormalized counters kept on user and course documents.
+
+    users.enrollment_count    enrollments held by the user
+    courses.enrollment_count  enrollments in the course
+    courses.lesson_count      length of the course's lessons array
+    courses.rating_count, rating_sum, rating_histogram {"1".."5"}, rating_average
+                              summary of the course's reviews
+
+The enrollment and review write paths adjust them with $inc and course writes
+set lesson_count, so listings read a field instead of joining every
+enrollment or review. reconcile_counters() recomputes them from the source collections to
+repair drift (scripts writing directly to MongoDB, partial failures); it runs
+periodically from main.py or from the command line:
+
+    python -m database.counters
+"""
+import asyncio
+from collections import Counter
+from typing import Dict, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from database.helpers import default_database, to_object_id
+from database.versioning import bump_version, bump_version_stage
+
+RECONCILE_BATCH_SIZE = 1000
+RATING_STARS = (1, 2, 3, 4, 5)
+
+
+def with_lesson_count(course_data: Dict) -> Dict:
+    """Keep lesson_count in step when a course write sets its lessons"""
+    if course_data.get("lessons") is not None:
+        course_data["lesson_count"] = len(course_data["lessons"])
+    return course_data
+
+
+async def adjust_enrollment_counts(user_id, course_id, delta: int, database=None):
+    """Add delta to the enrollment_count of the enrollment's user and course"""
+    if database is None:
+        database = default_database()
+    updates = []
+    user_oid, course_oid = to_object_id(user_id), to_object_id(course_id)
+    if user_oid is not None:
+        updates.append(database["users"].update_one(
+            {"_id": user_oid}, {"$inc": {"enrollment_count": delta}}
+        ))
+    if course_oid is not None:
+        # enrollment_count is part of the course clients see, so it is a new version
+        updates.append(database["courses"].update_one(
+            {"_id": course_oid}, bump_version({"$inc": {"enrollment_count": delta}})
+        ))
+    if updates:
+        await asyncio.gather(*updates)
+
+
+def rating_average(count: int, total: float) -> Optional[float]:
+    return round(total / count, 2) if count else None
+
+
+# rating_average() evaluated by MongoDB on the updated document
+RATING_AVERAGE_EXPRESSION = {
+    "$cond": [
+        {"$gt": ["$rating_count", 0]},
+        {"$round": [{"$divide": ["$rating_sum", "$rating_count"]}, 2]},
+        None,
+    ]
+}
+
+
+async def adjust_course_rating(course_id, rating, delta: int, database=None):
+    """Add (delta=1) or remove (delta=-1) one review's rating in the course's rating summary"""
+    course_oid = to_object_id(course_id)
+    if course_oid is None or rating not in RATING_STARS:
+        return
+    if database is None:
+        database = default_database()
+    stars = f"rating_histogram.{rating}"
+    # One pipeline update: the counts, the average they give and the version change together,
+    # so readers never see an average that disagrees with the counts
+    await database["courses"].update_one({"_id": course_oid}, [
+        {"$set": {
+            "rating_count": {"$add": [{"$ifNull": ["$rating_count", 0]}, delta]},
+            "rating_sum": {"$add": [{"$ifNull": ["$rating_sum", 0]}, delta * rating]},
+            stars: {"$add": [{"$ifNull": [f"${stars}", 0]}, delta]},
+        }},
+        {"$set": {"rating_average": RATING_AVERAGE_EXPRESSION}},
+        bump_version_stage(),
+    ])
+
+
+def _average_differs(stored, expected: Optional[float]) -> bool:
+    # MongoDB's $round and Python's round() can disagree in the last place on a tie
+    if stored is None or expected is None:
+        return stored is not expected
+    return abs(stored - expected) > 0.011
+
+
+async def _reconcile_ratings(database) -> int:
+    """Rewrite the rating summary of every course whose reviews say otherwise; returns courses repaired"""
+    histograms: Dict[ObjectId, Counter] = {}
+    pipeline = [{"$group": {"_id": {"course_id": "$course_id", "rating": "$rating"}, "n": {"$sum": 1}}}]
+    async for group in database["reviews"].aggregate(pipeline, allowDiskUse=True, batchSize=RECONCILE_BATCH_SIZE):
+        course_oid = to_object_id(group["_id"].get("course_id"))
+        if course_oid is not None and group["_id"].get("rating") in RATING_STARS:
+            histograms.setdefault(course_oid, Counter())[group["_id"]["rating"]] += group["n"]
+
+    repaired = 0
+    batch = []
+    projection = {"rating_count": 1, "rating_sum": 1, "rating_histogram": 1, "rating_average": 1}
+    async for doc in database["courses"].find({}, projection, batch_size=RECONCILE_BATCH_SIZE):
+        histogram = histograms.get(doc["_id"], Counter())
+        count = sum(histogram.values())
+        total = sum(stars * n for stars, n in histogram.items())
+        stored = doc.get("rating_histogram") or {}
+        if (doc.get("rating_count", 0) != count or doc.get("rating_sum", 0) != total
+                or _average_differs(doc.get("rating_average"), rating_average(count, total))
+                or any(stored.get(str(stars), 0) != histogram[stars] for stars in RATING_STARS)):
+            batch.append(UpdateOne({"_id": doc["_id"]}, bump_version({"$set": {
+                "rating_count": count,
+                "rating_sum": total,
+                "rating_histogram": {str(stars): histogram[stars] for stars in RATING_STARS},
+                "rating_average": rating_average(count, total),
+            }})))
+        if len(batch) >= RECONCILE_BATCH_SIZE:
+            await database["courses"].bulk_write(batch, ordered=False)
+            repaired += len(batch)
+            batch = []
+    if batch:
+        await database["courses"].bulk_write(batch, ordered=False)
+        repaired += len(batch)
+    return repaired
+
+
+async def _reconcile_field(collection, field: str, expected: Dict[ObjectId, int],
+                           projection: Dict = None, compute=None, versioned: bool = False) -> int:
+    """Rewrite field wherever it differs from expected (or compute(doc)); returns documents repaired.
+    versioned collections also get a new version for every repair."""
+    repaired = 0
+    batch = []
+    async for doc in collection.find({}, projection or {field: 1}, batch_size=RECONCILE_BATCH_SIZE):
+        want = compute(doc) if compute else expected.get(doc["_id"], 0)
+        if doc.get(field) != want:
+            update = {"$set": {field: want}}
+            batch.append(UpdateOne({"_id": doc["_id"]}, bump_version(update) if versioned else update))
+        if len(batch) >= RECONCILE_BATCH_SIZE:
+            await collection.bulk_write(batch, ordered=False)
+            repaired += len(batch)
+            batch = []
+    if batch:
+        await collection.bulk_write(batch, ordered=False)
+        repaired += len(batch)
+    return repaired
+
+
+async def reconcile_counters(database=None) -> Dict[str, int]:
+    """Recompute every counter from the source collections; returns repairs per counter"""
+    if database is None:
+        database = default_database()
+    user_counts: Counter = Counter()
+    course_counts: Counter = Counter()
+    pipeline = [{"$group": {"_id": {"user_id": "$user_id", "course_id": "$course_id"}, "n": {"$sum": 1}}}]
+    # Enrollments store ids as ObjectId or str depending on the writer; count both alike
+    async for group in database["enrollments"].aggregate(pipeline, allowDiskUse=True,
+                                                         batchSize=RECONCILE_BATCH_SIZE):
+        user_oid = to_object_id(group["_id"].get("user_id"))
+        course_oid = to_object_id(group["_id"].get("course_id"))
+        if user_oid is not None:
+            user_counts[user_oid] += group["n"]
+        if course_oid is not None:
+            course_counts[course_oid] += group["n"]
+
+    users_repaired, courses_repaired, lessons_repaired, ratings_repaired = await asyncio.gather(
+        _reconcile_field(database["users"], "enrollment_count", user_counts),
+        _reconcile_field(database["courses"], "enrollment_count", course_counts, versioned=True),
+        _reconcile_field(
+            database["courses"], "lesson_count", {},
+            projection={"lessons": 1, "lesson_count": 1},
+            compute=lambda course: len(course.get("lessons") or []),
+            versioned=True,
+        ),
+        _reconcile_ratings(database),
+    )
+    return {
+        "users.enrollment_count": users_repaired,
+        "courses.enrollment_count": courses_repaired,
+        "courses.lesson_count": lessons_repaired,
+        "courses.rating_*": ratings_repaired,
+    }
+
+
+def main():
+    summary = asyncio.run(reconcile_counters())
+    for counter, repaired in summary.items():
+        print(f"✓ {counter}: {repaired} documents repaired")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Small helpers shared by the modules of the database package.
+"""
+from typing import Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+def default_database():
+    """The application's async database.
+
+    Modules whose functions take an optional database= call this only when
+    none is passed, so importing them (from simple_main.py or a script) does
+    not open the application's connection.
+    """
+    from database.__init_db import async_db
+    return async_db
+
+
+def to_object_id(value) -> Optional[ObjectId]:
+    """value (an ObjectId or its string form) as an ObjectId; None when it is not one"""
+    if isinstance(value, ObjectId):
+        return value
+    try:
+        return ObjectId(str(value))
+    except (InvalidId, TypeError):
+        return None
@@ -0,0 +1,115 @@
+"""
+Declarative index registry for every collection.
+
+Indexes are applied at application startup (see main.py) or from the command
+line:
+
+    python -m database.indexes            # create missing indexes
+    python -m database.indexes --report   # list missing / unused indexes
+"""
+import argparse
+import asyncio
+from typing import Dict, List, Any
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from database.__init_db import async_db
+
+# collection name -> indexes that must exist on it
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ],
+    "courses": [
+        IndexModel([("instructor_id", ASCENDING)], name="instructor_id"),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+        IndexModel([("enrollment_count", DESCENDING)], name="enrollment_count"),
+    ],
+    "lessons": [
+        IndexModel([("course_id", ASCENDING)], name="course_id"),
+    ],
+    "enrollments": [
+        IndexModel([("user_id", ASCENDING), ("course_id", ASCENDING)], name="user_id_course_id"),
+        IndexModel([("course_id", ASCENDING)], name="course_id"),
+        IndexModel([("enrolled_at", DESCENDING)], name="enrolled_at"),
+    ],
+    "quizzes": [
+        IndexModel([("course_id", ASCENDING)], name="course_id"),
+    ],
+    "quiz_results": [
+        IndexModel([("quiz_id", ASCENDING)], name="quiz_id"),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "reviews": [
+        IndexModel([("course_id", ASCENDING)], name="course_id"),
+    ],
+    "notifications": [
+        IndexModel([("user_id", ASCENDING), ("is_read", ASCENDING)], name="user_id_is_read"),
+    ],
+    "payments": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        IndexModel([("payment_date", DESCENDING)], name="payment_date"),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ],
+}
+
+
+async def ensure_indexes(database=async_db) -> Dict[str, Any]:
+    """Create every registered index; returns created names and failures per collection"""
+    summary = {}
+    for collection_name, models in INDEXES.items():
+        try:
+            created = await database[collection_name].create_indexes(models)
+            summary[collection_name] = {"created": created}
+        except OperationFailure as e:
+            # e.g. duplicate emails blocking the unique index; keep going
+            summary[collection_name] = {"error": str(e)}
+    return summary
+
+
+async def index_report(database=async_db) -> Dict[str, Any]:
+    """Compare the registry with the live indexes and their $indexStats usage"""
+    report = {}
+    for collection_name, models in INDEXES.items():
+        collection = database[collection_name]
+        declared = {model.document["name"] for model in models}
+
+        stats = await collection.aggregate([{"$indexStats": {}}]).to_list(length=None)
+        usage = {s["name"]: s.get("accesses", {}).get("ops", 0) for s in stats}
+        existing = set(usage) - {"_id_"}
+
+        report[collection_name] = {
+            "missing": sorted(declared - existing),
+            "undeclared": sorted(existing - declared),
+            "unused": sorted(name for name in existing if usage[name] == 0),
+            "usage": usage,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create or inspect MongoDB indexes")
+    parser.add_argument("--report", action="store_true",
+                        help="print missing/unused indexes instead of creating them")
+    args = parser.parse_args()
+
+    if args.report:
+        report = asyncio.run(index_report())
+        for collection_name, info in report.items():
+            print(f"{collection_name}:")
+            print(f"   missing:    {', '.join(info['missing']) or '-'}")
+            print(f"   undeclared: {', '.join(info['undeclared']) or '-'}")
+            print(f"   unused:     {', '.join(info['unused']) or '-'}")
+    else:
+        summary = asyncio.run(ensure_indexes())
+        for collection_name, result in summary.items():
+            if "error" in result:
+                print(f"✗ {collection_name}: {result['error']}")
+            else:
+                print(f"✓ {collection_name}: {', '.join(result['created'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Request-scoped batch loaders for related documents.
+
+Instead of calling find_by_id once per row, a listing collects every referenced
+id and resolves them with a single `$in` query per collection. Results are
+memoized for the lifetime of the Loaders object (one request), so repeated ids
+cost nothing.
+"""
+from typing import Any, Dict, Iterable, Optional
+
+from bson import ObjectId
+
+from database.helpers import to_object_id
+
+# Never pull password hashes just to show a name
+DEFAULT_PROJECTIONS = {
+    "users": {"password": 0},
+}
+
+
+class RelationLoader:
+    def __init__(self, collection, projection: Dict[str, Any] = None):
+        self._collection = collection
+        self._projection = projection
+        self._cache: Dict[ObjectId, Optional[Dict]] = {}
+
+    async def load_many(self, ids: Iterable) -> Dict[str, Optional[Dict]]:
+        """Resolve ids (str or ObjectId) to documents, keyed by str(id); unknown ids map to None"""
+        wanted = {}
+        for value in ids:
+            if value is None:
+                continue
+            wanted[str(value)] = to_object_id(value)
+
+        missing = [oid for oid in set(wanted.values()) if oid is not None and oid not in self._cache]
+        if missing:
+            docs = await self._collection.find({"_id": {"$in": missing}}, self._projection).to_list(length=None)
+            for oid in missing:
+                self._cache[oid] = None
+            for doc in docs:
+                self._cache[doc["_id"]] = doc
+
+        return {key: self._cache.get(oid) if oid is not None else None for key, oid in wanted.items()}
+
+    async def load(self, value) -> Optional[Dict]:
+        found = await self.load_many([value])
+        return found.get(str(value))
+
+
+class Loaders:
+    """One RelationLoader per collection, created on first use"""
+
+    def __init__(self, database, projections: Dict[str, Dict[str, Any]] = None):
+        self._database = database
+        self._projections = dict(DEFAULT_PROJECTIONS, **(projections or {}))
+        self._loaders: Dict[str, RelationLoader] = {}
+
+    def __getitem__(self, collection_name: str) -> RelationLoader:
+        if collection_name not in self._loaders:
+            self._loaders[collection_name] = RelationLoader(
+                self._database[collection_name], self._projections.get(collection_name)
+            )
+        return self._loaders[collection_name]
+
+    @property
+    def users(self) -> RelationLoader:
+        return self["users"]
+
+    @property
+    def courses(self) -> RelationLoader:
+        return self["courses"]
+
+
+def get_loaders() -> Loaders:
+    """FastAPI dependency: fresh loaders (and memo) for every request"""
+    from database.__init_db import async_db
+    return Loaders(async_db)
@@ -0,0 +1,89 @@
+"""
+Keyset (cursor) pagination shared by the repositories.
+
+A page is fetched with a range query on the sort key (with _id as tie-breaker)
+instead of skip(), so every page costs the same no matter how deep it is.
+The position is handed to clients as an opaque, URL-safe `next_cursor` token.
+"""
+import base64
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId, json_util
+from pymongo import ASCENDING, DESCENDING
+
+from serialization import find_public
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(doc: Dict[str, Any], sort_key: str = "_id") -> str:
+    # Public documents (see serialization.find_public) carry the string "id" instead of _id
+    position = {"id": doc["_id"] if "_id" in doc else ObjectId(doc["id"])}
+    if sort_key != "_id":
+        position["k"] = doc.get(sort_key)
+    raw = json_util.dumps(position).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        position = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise InvalidCursor("Invalid pagination cursor")
+    if not isinstance(position, dict) or "id" not in position:
+        raise InvalidCursor("Invalid pagination cursor")
+    return position
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _after(position: Dict[str, Any], sort_key: str, direction: int) -> Dict[str, Any]:
+    op = "$gt" if direction == ASCENDING else "$lt"
+    if sort_key == "_id":
+        return {"_id": {op: position["id"]}}
+    return {"$or": [
+        {sort_key: {op: position.get("k")}},
+        {sort_key: position.get("k"), "_id": {op: position["id"]}},
+    ]}
+
+
+async def paginate(collection, query: Dict[str, Any] = None, cursor: Optional[str] = None,
+                   limit: int = DEFAULT_PAGE_SIZE, sort_key: str = "_id",
+                   direction: int = ASCENDING, projection: Dict[str, Any] = None,
+                   public: bool = False) -> Tuple[List[Dict], Optional[str]]:
+    """Return one page of documents and the token for the next page (None on the last page).
+    With public=True the documents carry a string "id" instead of _id."""
+    limit = clamp_page_size(limit)
+    filters = dict(query or {})
+    if cursor:
+        position = decode_cursor(cursor)
+        after = _after(position, sort_key, direction)
+        filters = {"$and": [filters, after]} if filters else after
+
+    sort = [(sort_key, direction)]
+    if sort_key != "_id":
+        sort.append(("_id", direction))
+        if projection and any(projection.values()):
+            # The next cursor is built from the sort key, so an inclusion projection must keep it
+            projection = dict(projection, **{sort_key: 1})
+
+    # Fetch one extra document to learn whether another page exists
+    if public:
+        docs = await find_public(collection, filters, sort, limit=limit + 1, projection=projection)
+    else:
+        docs = await collection.find(filters, projection).sort(sort).limit(limit + 1).to_list(length=limit + 1)
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, encode_cursor(docs[-1], sort_key)
+    return docs, None
+
@@ -0,0 +1,130 @@
+"""
+Write-coalescing buffer for enrollment progress.
+
+Video players report progress every few seconds, so PUT /enrollments/{id}/progress
+records the value in memory instead of writing it. Reports for the same
+enrollment coalesce (the highest wins: progress only moves forward) and
+flush() writes one unordered bulk_write of $max updates every
+PROGRESS_FLUSH_INTERVAL_SECONDS, from main.py, and once more on shutdown.
+Thousands of reports per interval become one write per active enrollment.
+
+A flush that fails puts its updates back, so the next flush retries them.
+Readers of progress call apply_pending() to overlay values not flushed yet.
+Each worker process has its own buffer; at most one interval of progress is
+lost if a process dies. PROGRESS_FLUSH_INTERVAL_SECONDS=0 turns buffering off
+and every report is written straight away.
+"""
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from config import config
+
+FLUSH_BATCH_SIZE = 1000
+
+
+def _default_collection():
+    # Imported lazily so the module can be used without opening a connection
+    from database.__init_db import async_enrollments_collection
+    return async_enrollments_collection
+
+
+class ProgressBuffer:
+    def __init__(self, max_pending: int = 50000, batch_size: int = FLUSH_BATCH_SIZE):
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self._pending: Dict[str, float] = {}
+        self.received = 0
+        self.written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+        self.last_error: Optional[str] = None
+
+    def record(self, enrollment_id: str, progress: float) -> bool:
+        """Buffer a report; returns True once enough is pending that the caller should flush now"""
+        self.received += 1
+        self._merge(enrollment_id, progress)
+        return len(self._pending) >= self.max_pending
+
+    def _merge(self, enrollment_id: str, progress: float):
+        current = self._pending.get(enrollment_id)
+        if current is None or progress > current:
+            self._pending[enrollment_id] = progress
+
+    def pending(self, enrollment_id: str) -> Optional[float]:
+        return self._pending.get(enrollment_id)
+
+    def forget(self, *enrollment_ids: str):
+        """Drop pending reports, e.g. for deleted enrollments"""
+        for enrollment_id in enrollment_ids:
+            self._pending.pop(enrollment_id, None)
+
+    def apply_pending(self, enrollments: Iterable[Dict[str, Any]]):
+        """Overlay buffered progress onto enrollment documents (raw or public) in place"""
+        if not self._pending:
+            return enrollments
+        for enrollment in enrollments:
+            pending = self._pending.get(str(enrollment.get("id", enrollment.get("_id"))))
+            if pending is not None and pending > (enrollment.get("progress") or 0):
+                enrollment["progress"] = pending
+        return enrollments
+
+    async def flush(self, collection=None) -> int:
+        """Write everything pending; returns the number of enrollments updated"""
+        if not self._pending:
+            return 0
+        if collection is None:
+            collection = _default_collection()
+        # Swap first: reports arriving during the write go to the next flush
+        batch, self._pending = self._pending, {}
+        started = time.perf_counter()
+        updates = [
+            UpdateOne({"_id": ObjectId(enrollment_id)}, {"$max": {"progress": progress}})
+            for enrollment_id, progress in batch.items()
+        ]
+        try:
+            for start in range(0, len(updates), self.batch_size):
+                await collection.bulk_write(updates[start:start + self.batch_size], ordered=False)
+        except Exception as e:
+            # Put the batch back (keeping any newer, higher reports) so the next flush retries it
+            for enrollment_id, progress in batch.items():
+                self._merge(enrollment_id, progress)
+            self.failed_flushes += 1
+            self.last_error = str(e)
+            raise
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.flushes += 1
+        self.written += len(updates)
+        self.last_batch_size = len(updates)
+        self.max_batch_size = max(self.max_batch_size, len(updates))
+        self.last_flush_ms = round(elapsed_ms, 3)
+        self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+        self._total_flush_ms += elapsed_ms
+        return len(updates)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "received": self.received,
+            "written": self.written,
+            # Reports per MongoDB write; the saving from coalescing
+            "coalescing_ratio": round(self.received / self.written, 2) if self.written else None,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "last_flush_ms": self.last_flush_ms,
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 3) if self.flushes else None,
+            "last_error": self.last_error,
+        }
+
+
+progress_buffer = ProgressBuffer(max_pending=config.PROGRESS_BUFFER_MAX_PENDING)
@@ -0,0 +1,54 @@
+"""
+Projection profiles: the fields each kind of read fetches.
+
+    summary  list endpoints: what a row or card shows (no lesson content,
+             no lesson id arrays, no password hashes)
+    detail   single-document endpoints: everything a client may see
+    admin    admin screens: detail plus bookkeeping fields
+
+Repository read methods take profile=...; without one they return the whole
+document, which internal callers (auth, ownership checks, updates) rely on.
+A profile mapped to None also reads the whole document.
+"""
+from typing import Any, Dict, Optional
+
+SUMMARY = "summary"
+DETAIL = "detail"
+ADMIN = "admin"
+
+_NO_SECRETS = {"password": 0}
+
+PROFILES: Dict[str, Dict[str, Optional[Dict[str, Any]]]] = {
+    "courses": {
+        SUMMARY: {
+            "title": 1, "description": 1, "instructor_id": 1, "price": 1, "is_active": 1,
+            "lesson_count": 1, "enrollment_count": 1, "created_at": 1,
+            "rating_count": 1, "rating_average": 1,
+            # Listing ETags hash these (conditional.listing_validators)
+            "version": 1, "updated_at": 1,
+        },
+        DETAIL: None,
+        ADMIN: None,
+    },
+    "lessons": {
+        SUMMARY: {"course_id": 1, "title": 1, "video_url": 1, "document_url": 1},
+        DETAIL: None,
+        ADMIN: None,
+    },
+    "users": {
+        SUMMARY: {"name": 1, "email": 1, "role": 1, "avatar": 1, "is_active": 1},
+        DETAIL: _NO_SECRETS,
+        ADMIN: _NO_SECRETS,
+    },
+}
+
+
+def projection_for(collection_name: str, profile: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Projection for profile on collection_name (None = whole document)"""
+    if profile is None:
+        return None
+    if profile not in (SUMMARY, DETAIL, ADMIN):
+        raise ValueError(f"Unknown projection profile: {profile}")
+    profiles = PROFILES.get(collection_name, {})
+    projection = profiles.get(profile)
+    return dict(projection) if projection is not None else None
@@ -0,0 +1,174 @@
+"""
+Running per-quiz result statistics.
+
+    quiz_stats   _id "<quiz_id>": count, score_sum, score_sq_sum, min_score,
+                 max_score, histogram {"0".."9": results}, question_correct
+                 {"<index>": results that got question <index> right},
+                 total_questions
+
+QuizResultRepository.create/create_many fold every new result in with one
+$inc/$min/$max upsert (record_results), so GET /quizzes/{id}/stats reads a
+single document however many results the quiz has. Mean and variance are
+derived from the sums when read. backfill() rebuilds the documents from
+quiz_results after a bulk import or to repair drift:
+
+    python -m database.quiz_stats
+
+Scores are floats and are bucketed as they are, not rounded: the histogram's
+ranges are half-open, "[0,10)" .. "[80,90)", and the top one is "[90,100]".
+
+Results stored before question_correct was recorded count towards the score
+statistics but not towards the per-question rates.
+"""
+import argparse
+import asyncio
+import math
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import ReplaceOne
+
+from database.helpers import default_database
+
+QUIZ_STATS = "quiz_stats"
+HISTOGRAM_BUCKETS = 10
+BACKFILL_BATCH_SIZE = 1000
+
+
+def histogram_bucket(score: float) -> int:
+    """Decile of a 0-100 score; 100 falls in the top bucket"""
+    return min(max(int(score // (100 / HISTOGRAM_BUCKETS)), 0), HISTOGRAM_BUCKETS - 1)
+
+
+def _bucket_label(bucket: int, width: int) -> str:
+    # Scores are floats, so buckets are half-open: 9.5 is in "[0,10)"; the top one includes 100
+    if bucket == HISTOGRAM_BUCKETS - 1:
+        return f"[{bucket * width},100]"
+    return f"[{bucket * width},{(bucket + 1) * width})"
+
+
+def _fold(results: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """The $inc/$min/$max update adding results to a quiz_stats document"""
+    inc: Dict[str, Any] = defaultdict(int)
+    low = high = None
+    total_questions = 0
+    for result in results:
+        score = result.get("score") or 0
+        inc["count"] += 1
+        inc["score_sum"] += score
+        inc["score_sq_sum"] += score * score
+        inc[f"histogram.{histogram_bucket(score)}"] += 1
+        for index, correct in enumerate(result.get("question_correct") or ()):
+            if correct:
+                inc[f"question_correct.{index}"] += 1
+        low = score if low is None else min(low, score)
+        high = score if high is None else max(high, score)
+        total_questions = max(total_questions, result.get("total_questions") or 0)
+    if not inc:
+        return {}
+    return {
+        "$inc": dict(inc),
+        "$min": {"min_score": low},
+        "$max": {"max_score": high, "total_questions": total_questions},
+        "$set": {"updated_at": datetime.now(timezone.utc)},
+    }
+
+
+async def record_results(quiz_id: str, results: List[Dict[str, Any]], database=None):
+    """Fold new results for quiz_id into its statistics"""
+    update = _fold(results)
+    if not update:
+        return
+    if database is None:
+        database = default_database()
+    await database[QUIZ_STATS].update_one({"_id": str(quiz_id)}, update, upsert=True)
+
+
+async def delete_stats(quiz_id: str, database=None):
+    if database is None:
+        database = default_database()
+    await database[QUIZ_STATS].delete_one({"_id": str(quiz_id)})
+
+
+def summarize(doc: Optional[Dict[str, Any]], quiz_id: str) -> Dict[str, Any]:
+    """Public view of a quiz_stats document (zeros when the quiz has no results)"""
+    doc = doc or {}
+    count = doc.get("count", 0)
+    mean = doc.get("score_sum", 0) / count if count else None
+    # Population variance from the running sums; clamp the rounding error below zero
+    variance = max(doc.get("score_sq_sum", 0) / count - mean * mean, 0.0) if count else None
+    histogram = doc.get("histogram") or {}
+    width = 100 // HISTOGRAM_BUCKETS
+    question_correct = doc.get("question_correct") or {}
+    return {
+        "quiz_id": quiz_id,
+        "count": count,
+        "mean": round(mean, 4) if mean is not None else None,
+        "variance": round(variance, 4) if variance is not None else None,
+        "stddev": round(math.sqrt(variance), 4) if variance is not None else None,
+        "min": doc.get("min_score"),
+        "max": doc.get("max_score"),
+        "histogram": [
+            {
+                "range": _bucket_label(bucket, width),
+                "count": histogram.get(str(bucket), 0),
+            }
+            for bucket in range(HISTOGRAM_BUCKETS)
+        ],
+        "questions": [
+            {
+                "index": index,
+                "correct": question_correct.get(str(index), 0),
+                "correct_rate": round(question_correct.get(str(index), 0) / count, 4) if count else None,
+            }
+            for index in range(doc.get("total_questions", 0))
+        ],
+        "updated_at": doc.get("updated_at"),
+    }
+
+
+async def get_stats(quiz_id: str, database=None) -> Dict[str, Any]:
+    if database is None:
+        database = default_database()
+    return summarize(await database[QUIZ_STATS].find_one({"_id": str(quiz_id)}), quiz_id)
+
+
+async def backfill(database=None) -> int:
+    """Recompute every quiz's statistics from quiz_results; returns quizzes written"""
+    if database is None:
+        database = default_database()
+    by_quiz: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    projection = {"quiz_id": 1, "score": 1, "total_questions": 1, "question_correct": 1}
+    async for result in database["quiz_results"].find({}, projection, batch_size=BACKFILL_BATCH_SIZE):
+        if result.get("quiz_id"):
+            by_quiz[str(result["quiz_id"])].append(result)
+
+    updates = []
+    for quiz_id, results in by_quiz.items():
+        folded = _fold(results)
+        values = dict(folded["$inc"], min_score=folded["$min"]["min_score"], **folded["$max"], **folded["$set"])
+        doc: Dict[str, Any] = {}
+        for key, value in values.items():
+            parent, _, child = key.partition(".")
+            if child:
+                doc.setdefault(parent, {})[child] = value
+            else:
+                doc[parent] = value
+        updates.append(ReplaceOne({"_id": quiz_id}, doc, upsert=True))
+
+    collection = database[QUIZ_STATS]
+    await collection.delete_many({"_id": {"$nin": list(by_quiz)}})
+    for start in range(0, len(updates), BACKFILL_BATCH_SIZE):
+        await collection.bulk_write(updates[start:start + BACKFILL_BATCH_SIZE], ordered=False)
+    return len(updates)
+
+
+def main():
+    argparse.ArgumentParser(description="Rebuild the per-quiz result statistics").parse_args()
+    written = asyncio.run(backfill())
+    print(f"✓ {QUIZ_STATS}: {written} quizzes written")
+
+
+if __name__ == "__main__":
+    main()
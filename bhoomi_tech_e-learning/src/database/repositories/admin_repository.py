@@ -1,61 +1,126 @@
 from database.__init_db import (
-    users_collection, courses_collection, lessons_collection, 
-    enrollments_collection, payments_collection, reviews_collection,
-    notifications_collection, quizzes_collection
+    async_users_collection as users_collection,
+    async_courses_collection as courses_collection,
+    async_lessons_collection as lessons_collection,
+    async_enrollments_collection as enrollments_collection,
+    async_payments_collection as payments_collection,
+    async_reviews_collection as reviews_collection,
+    async_notifications_collection as notifications_collection,
+    async_quizzes_collection as quizzes_collection,
+    async_admin_stats_collection as admin_stats_collection
 )
 from bson import ObjectId
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta, timezone
+import asyncio
 import pymongo
 
+from cache import invalidate_course, invalidate_user
+from database.counters import with_lesson_count
+from database.versioning import new_version, bump_version
+from database import rollups
+from search import course_search, user_search
+
+DASHBOARD_STATS_ID = "dashboard"
+
+def _facet_count(facet_result: Dict, name: str) -> int:
+    bucket = facet_result.get(name) or []
+    return bucket[0]["n"] if bucket else 0
+
 class AdminRepository:
     
     # Dashboard Statistics
     @staticmethod
-    def get_dashboard_stats() -> Dict[str, Any]:
-        """Get comprehensive dashboard statistics"""
-        stats = {}
-        
-        # User statistics
-        stats['total_users'] = users_collection.count_documents({})
-        stats['active_users'] = users_collection.count_documents({"is_active": True})
-        stats['inactive_users'] = users_collection.count_documents({"is_active": False})
-        
-        # Course statistics
-        stats['total_courses'] = courses_collection.count_documents({})
-        stats['published_courses'] = courses_collection.count_documents({"is_active": True})
-        stats['unpublished_courses'] = courses_collection.count_documents({"is_active": False})
-        
-        # Enrollment statistics
-        stats['total_enrollments'] = enrollments_collection.count_documents({})
-        
-        # Payment statistics
+    async def _active_breakdown(collection, since: datetime) -> Dict[str, int]:
+        """Total/active/inactive/new counts for one collection in a single $facet round trip"""
+        pipeline = [
+            {
+                "$facet": {
+                    "total": [{"$count": "n"}],
+                    "active": [{"$match": {"is_active": True}}, {"$count": "n"}],
+                    "inactive": [{"$match": {"is_active": False}}, {"$count": "n"}],
+                    "new": [{"$match": {"created_at": {"$gte": since}}}, {"$count": "n"}]
+                }
+            }
+        ]
+        result = await collection.aggregate(pipeline).to_list(length=1)
+        facets = result[0] if result else {}
+        return {name: _facet_count(facets, name) for name in ("total", "active", "inactive", "new")}
+    
+    @staticmethod
+    async def compute_dashboard_stats() -> Dict[str, Any]:
+        """Compute dashboard statistics with one query per collection, run concurrently"""
+        week_ago = datetime.now(timezone.utc) - timedelta(days=7)
         payment_pipeline = [
             {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
         ]
-        payment_result = list(payments_collection.aggregate(payment_pipeline))
-        stats['total_payments'] = payment_result[0]['total'] if payment_result else 0
-        
-        # Recent activity (last 7 days)
-        week_ago = datetime.now(timezone.utc) - timedelta(days=7)
-        stats['new_users_this_week'] = users_collection.count_documents({
-            "created_at": {"$gte": week_ago}
-        }) if users_collection.find_one({"created_at": {"$exists": True}}) else 0
         
-        stats['new_courses_this_week'] = courses_collection.count_documents({
-            "created_at": {"$gte": week_ago}
-        }) if courses_collection.find_one({"created_at": {"$exists": True}}) else 0
+        users, courses, total_enrollments, payment_result = await asyncio.gather(
+            AdminRepository._active_breakdown(users_collection, week_ago),
+            AdminRepository._active_breakdown(courses_collection, week_ago),
+            enrollments_collection.count_documents({}),
+            payments_collection.aggregate(payment_pipeline).to_list(length=None)
+        )
         
+        return {
+            # User statistics
+            'total_users': users['total'],
+            'active_users': users['active'],
+            'inactive_users': users['inactive'],
+            # Course statistics
+            'total_courses': courses['total'],
+            'published_courses': courses['active'],
+            'unpublished_courses': courses['inactive'],
+            # Enrollment statistics
+            'total_enrollments': total_enrollments,
+            # Payment statistics
+            'total_payments': payment_result[0]['total'] if payment_result else 0,
+            # Recent activity (last 7 days)
+            'new_users_this_week': users['new'],
+            'new_courses_this_week': courses['new'],
+        }
+    
+    @staticmethod
+    async def refresh_dashboard_stats() -> Dict[str, Any]:
+        """Recompute the statistics and store them in the admin_stats document"""
+        stats = await AdminRepository.compute_dashboard_stats()
+        await admin_stats_collection.replace_one(
+            {"_id": DASHBOARD_STATS_ID},
+            {"stats": stats, "refreshed_at": datetime.now(timezone.utc)},
+            upsert=True
+        )
         return stats
     
-    # Advanced User Management
     @staticmethod
-    def get_users_with_stats(skip: int = 0, limit: int = 20, search: str = None, 
-                           role_filter: str = None, active_filter: bool = None) -> List[Dict]:
-        """Get users with enrollment and activity statistics"""
-        pipeline = []
+    async def get_dashboard_stats(max_age_seconds: int = 0) -> Dict[str, Any]:
+        """Get comprehensive dashboard statistics
         
-        # Match stage
+        With max_age_seconds set, the materialized admin_stats document is served
+        while it is fresh enough and refreshed otherwise.
+        """
+        if max_age_seconds <= 0:
+            return await AdminRepository.compute_dashboard_stats()
+        
+        doc = await admin_stats_collection.find_one({"_id": DASHBOARD_STATS_ID})
+        if doc:
+            refreshed_at = doc["refreshed_at"]
+            if refreshed_at.tzinfo is None:
+                refreshed_at = refreshed_at.replace(tzinfo=timezone.utc)
+            if datetime.now(timezone.utc) - refreshed_at <= timedelta(seconds=max_age_seconds):
+                return doc["stats"]
+        return await AdminRepository.refresh_dashboard_stats()
+    
+    # Advanced User Management
+    @staticmethod
+    def _in_rank_order(rows: List[Dict], ids: List[str]) -> List[Dict]:
+        """Put listing rows back into search-ranking order"""
+        position = {doc_id: i for i, doc_id in enumerate(ids)}
+        return sorted(rows, key=lambda row: position.get(row["id"], len(position)))
+    
+    @staticmethod
+    def user_match_conditions(search: str = None, role_filter: str = None,
+                              active_filter: bool = None) -> Dict:
+        """Build the user filter shared by the listing and its total count"""
         match_conditions = {}
         if search:
             match_conditions["$or"] = [
@@ -66,52 +131,98 @@ class AdminRepository:
             match_conditions["role"] = role_filter
         if active_filter is not None:
             match_conditions["is_active"] = active_filter
-            
-        if match_conditions:
-            pipeline.append({"$match": match_conditions})
+        return match_conditions
+    
+    @staticmethod
+    async def count_users(search: str = None, role_filter: str = None, active_filter: bool = None,
+                          approximate: bool = False) -> int:
+        """Count users matching the listing filters"""
+        if search:
+            ids = await user_search.query(search, {"role": role_filter, "is_active": active_filter})
+            if ids is not None:
+                return len(ids)
+        match_conditions = AdminRepository.user_match_conditions(search, role_filter, active_filter)
+        if approximate and not match_conditions:
+            return await users_collection.estimated_document_count()
+        return await users_collection.count_documents(match_conditions)
+    
+    @staticmethod
+    def users_with_stats_pipeline(skip: Optional[int] = None, limit: Optional[int] = None,
+                                  search: str = None, role_filter: str = None,
+                                  active_filter: bool = None, ids: Optional[List[str]] = None) -> List[Dict]:
+        """Aggregation pipeline behind the admin user listing; no paging when skip/limit are None.
+        ids (already filtered search hits) replaces the filters."""
+        pipeline = []
         
-        # Lookup enrollments
-        pipeline.extend([
-            {
-                "$lookup": {
-                    "from": "enrollments",
-                    "localField": "_id",
-                    "foreignField": "user_id",
-                    "as": "enrollments"
-                }
-            },
-            {
-                "$addFields": {
-                    "total_enrollments": {"$size": "$enrollments"},
-                    "id": {"$toString": "$_id"}
-                }
-            },
-            {"$skip": skip},
-            {"$limit": limit},
+        # Match stage
+        if ids is not None:
+            pipeline.append({"$match": {"_id": {"$in": [ObjectId(doc_id) for doc_id in ids]}}})
+        else:
+            match_conditions = AdminRepository.user_match_conditions(search, role_filter, active_filter)
+            if match_conditions:
+                pipeline.append({"$match": match_conditions})
+            pipeline.append({"$sort": {"_id": 1}})
+        
+        # Page first; enrollment totals come from the users.enrollment_count counter
+        if skip is not None:
+            pipeline.append({"$skip": skip})
+        if limit is not None:
+            pipeline.append({"$limit": limit})
+        pipeline.append(
             {
                 "$project": {
                     "_id": 0,
-                    "id": 1,
+                    "id": {"$toString": "$_id"},
                     "name": 1,
                     "email": 1,
                     "role": 1,
                     "is_active": 1,
                     "created_at": 1,
                     "last_login": 1,
-                    "total_enrollments": 1
+                    "total_enrollments": {"$ifNull": ["$enrollment_count", 0]}
                 }
             }
-        ])
+        )
         
-        return list(users_collection.aggregate(pipeline))
+        return pipeline
     
     @staticmethod
-    def get_courses_with_stats(skip: int = 0, limit: int = 20, search: str = None,
-                             active_filter: bool = None) -> List[Dict]:
-        """Get courses with enrollment and lesson statistics"""
-        pipeline = []
-        
-        # Match stage
+    async def get_users_with_stats(skip: int = 0, limit: int = 20, search: str = None, 
+                           role_filter: str = None, active_filter: bool = None) -> List[Dict]:
+        """Get users with enrollment and activity statistics"""
+        if search:
+            ids = await user_search.query(search, {"role": role_filter, "is_active": active_filter})
+            if ids is not None:
+                page = ids[skip:skip + limit]
+                if not page:
+                    return []
+                pipeline = AdminRepository.users_with_stats_pipeline(ids=page)
+                rows = await users_collection.aggregate(pipeline).to_list(length=None)
+                return AdminRepository._in_rank_order(rows, page)
+        pipeline = AdminRepository.users_with_stats_pipeline(skip, limit, search, role_filter, active_filter)
+        return await users_collection.aggregate(pipeline).to_list(length=None)
+    
+    @staticmethod
+    async def iter_users_with_stats(search: str = None, role_filter: str = None,
+                                    active_filter: bool = None, batch_size: int = 1000):
+        """Stream every matching user from a server-side cursor, batch_size documents per round trip"""
+        if search:
+            ids = await user_search.query(search, {"role": role_filter, "is_active": active_filter})
+            if ids is not None:
+                for start in range(0, len(ids), batch_size):
+                    chunk = ids[start:start + batch_size]
+                    pipeline = AdminRepository.users_with_stats_pipeline(ids=chunk)
+                    rows = await users_collection.aggregate(pipeline).to_list(length=None)
+                    for user in AdminRepository._in_rank_order(rows, chunk):
+                        yield user
+                return
+        pipeline = AdminRepository.users_with_stats_pipeline(None, None, search, role_filter, active_filter)
+        async for user in users_collection.aggregate(pipeline, allowDiskUse=True, batchSize=batch_size):
+            yield user
+    
+    @staticmethod
+    def course_match_conditions(search: str = None, active_filter: bool = None) -> Dict:
+        """Build the course filter shared by the listing and its total count"""
         match_conditions = {}
         if search:
             match_conditions["$or"] = [
@@ -120,12 +231,45 @@ class AdminRepository:
             ]
         if active_filter is not None:
             match_conditions["is_active"] = active_filter
-            
-        if match_conditions:
-            pipeline.append({"$match": match_conditions})
+        return match_conditions
+    
+    @staticmethod
+    async def count_courses(search: str = None, active_filter: bool = None,
+                            approximate: bool = False) -> int:
+        """Count courses matching the listing filters"""
+        if search:
+            ids = await course_search.query(search, {"is_active": active_filter})
+            if ids is not None:
+                return len(ids)
+        match_conditions = AdminRepository.course_match_conditions(search, active_filter)
+        if approximate and not match_conditions:
+            return await courses_collection.estimated_document_count()
+        return await courses_collection.count_documents(match_conditions)
+    
+    @staticmethod
+    def courses_with_stats_pipeline(skip: Optional[int] = None, limit: Optional[int] = None,
+                                    search: str = None, active_filter: bool = None,
+                                    ids: Optional[List[str]] = None) -> List[Dict]:
+        """Aggregation pipeline behind the admin course listing; no paging when skip/limit are None.
+        ids (already filtered search hits) replaces the filters."""
+        pipeline = []
         
+        # Match stage
+        if ids is not None:
+            pipeline.append({"$match": {"_id": {"$in": [ObjectId(doc_id) for doc_id in ids]}}})
+        else:
+            match_conditions = AdminRepository.course_match_conditions(search, active_filter)
+            if match_conditions:
+                pipeline.append({"$match": match_conditions})
+            pipeline.append({"$sort": {"_id": 1}})
+        
+        # Page first, then join the instructor for this page only; lesson and
+        # enrollment totals come from the courses.lesson_count/enrollment_count counters
+        if skip is not None:
+            pipeline.append({"$skip": skip})
+        if limit is not None:
+            pipeline.append({"$limit": limit})
         pipeline.extend([
-            # Lookup instructor info
             {
                 "$lookup": {
                     "from": "users",
@@ -134,35 +278,16 @@ class AdminRepository:
                     "as": "instructor"
                 }
             },
-            # Lookup enrollments
-            {
-                "$lookup": {
-                    "from": "enrollments",
-                    "localField": "_id",
-                    "foreignField": "course_id",
-                    "as": "enrollments"
-                }
-            },
-            {
-                "$addFields": {
-                    "id": {"$toString": "$_id"},
-                    "instructor_name": {"$arrayElemAt": ["$instructor.name", 0]},
-                    "total_lessons": {"$size": "$lessons"},
-                    "total_enrollments": {"$size": "$enrollments"}
-                }
-            },
-            {"$skip": skip},
-            {"$limit": limit},
             {
                 "$project": {
                     "_id": 0,
-                    "id": 1,
+                    "id": {"$toString": "$_id"},
                     "title": 1,
                     "description": 1,
                     "instructor_id": {"$toString": "$instructor_id"},
-                    "instructor_name": 1,
-                    "total_lessons": 1,
-                    "total_enrollments": 1,
+                    "instructor_name": {"$arrayElemAt": ["$instructor.name", 0]},
+                    "total_lessons": {"$ifNull": ["$lesson_count", 0]},
+                    "total_enrollments": {"$ifNull": ["$enrollment_count", 0]},
                     "price": 1,
                     "is_active": 1,
                     "created_at": 1
@@ -170,187 +295,178 @@ class AdminRepository:
             }
         ])
         
-        return list(courses_collection.aggregate(pipeline))
+        return pipeline
+    
+    @staticmethod
+    async def get_courses_with_stats(skip: int = 0, limit: int = 20, search: str = None,
+                             active_filter: bool = None) -> List[Dict]:
+        """Get courses with enrollment and lesson statistics"""
+        if search:
+            ids = await course_search.query(search, {"is_active": active_filter})
+            if ids is not None:
+                page = ids[skip:skip + limit]
+                if not page:
+                    return []
+                pipeline = AdminRepository.courses_with_stats_pipeline(ids=page)
+                rows = await courses_collection.aggregate(pipeline).to_list(length=None)
+                return AdminRepository._in_rank_order(rows, page)
+        pipeline = AdminRepository.courses_with_stats_pipeline(skip, limit, search, active_filter)
+        return await courses_collection.aggregate(pipeline).to_list(length=None)
+    
+    @staticmethod
+    async def iter_courses_with_stats(search: str = None, active_filter: bool = None,
+                                      batch_size: int = 1000):
+        """Stream every matching course from a server-side cursor, batch_size documents per round trip"""
+        if search:
+            ids = await course_search.query(search, {"is_active": active_filter})
+            if ids is not None:
+                for start in range(0, len(ids), batch_size):
+                    chunk = ids[start:start + batch_size]
+                    pipeline = AdminRepository.courses_with_stats_pipeline(ids=chunk)
+                    rows = await courses_collection.aggregate(pipeline).to_list(length=None)
+                    for course in AdminRepository._in_rank_order(rows, chunk):
+                        yield course
+                return
+        pipeline = AdminRepository.courses_with_stats_pipeline(None, None, search, active_filter)
+        async for course in courses_collection.aggregate(pipeline, allowDiskUse=True, batchSize=batch_size):
+            yield course
     
     # User CRUD Operations
     @staticmethod
-    def create_user(user_data: Dict) -> str:
+    async def create_user(user_data: Dict) -> str:
         """Create a new user"""
         user_data["created_at"] = datetime.now(timezone.utc)
-        result = users_collection.insert_one(user_data)
+        result = await users_collection.insert_one(user_data)
+        invalidate_user(result.inserted_id)
+        await rollups.record_signup(user_data["created_at"])
         return str(result.inserted_id)
     
     @staticmethod
-    def update_user(user_id: str, update_data: Dict) -> bool:
+    async def update_user(user_id: str, update_data: Dict) -> bool:
         """Update user information"""
         update_data["updated_at"] = datetime.now(timezone.utc)
-        result = users_collection.update_one(
+        result = await users_collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$set": update_data}
         )
+        invalidate_user(user_id)
         return result.modified_count > 0
     
     @staticmethod
-    def delete_user(user_id: str) -> bool:
+    async def delete_user(user_id: str) -> bool:
         """Delete a user (soft delete by setting is_active to False)"""
-        result = users_collection.update_one(
+        result = await users_collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$set": {"is_active": False, "deleted_at": datetime.now(timezone.utc)}}
         )
+        invalidate_user(user_id)
         return result.modified_count > 0
     
     @staticmethod
-    def hard_delete_user(user_id: str) -> bool:
+    async def hard_delete_user(user_id: str) -> bool:
         """Permanently delete a user"""
-        result = users_collection.delete_one({"_id": ObjectId(user_id)})
+        result = await users_collection.delete_one({"_id": ObjectId(user_id)})
+        invalidate_user(user_id)
         return result.deleted_count > 0
     
     # Course CRUD Operations
     @staticmethod
-    def create_course(course_data: Dict) -> str:
+    async def create_course(course_data: Dict) -> str:
         """Create a new course"""
-        course_data["created_at"] = datetime.now(timezone.utc)
         if "instructor_id" in course_data:
             course_data["instructor_id"] = ObjectId(course_data["instructor_id"])
-        result = courses_collection.insert_one(course_data)
+        result = await courses_collection.insert_one(new_version(with_lesson_count(course_data)))
+        invalidate_course(result.inserted_id)
         return str(result.inserted_id)
     
     @staticmethod
-    def update_course(course_id: str, update_data: Dict) -> bool:
+    async def update_course(course_id: str, update_data: Dict) -> bool:
         """Update course information"""
-        update_data["updated_at"] = datetime.now(timezone.utc)
         if "instructor_id" in update_data:
             update_data["instructor_id"] = ObjectId(update_data["instructor_id"])
-        result = courses_collection.update_one(
+        result = await courses_collection.update_one(
             {"_id": ObjectId(course_id)},
-            {"$set": update_data}
+            bump_version({"$set": with_lesson_count(update_data)})
         )
+        invalidate_course(course_id)
         return result.modified_count > 0
     
     @staticmethod
-    def delete_course(course_id: str) -> bool:
+    async def delete_course(course_id: str) -> bool:
         """Delete a course (soft delete)"""
-        result = courses_collection.update_one(
+        result = await courses_collection.update_one(
             {"_id": ObjectId(course_id)},
-            {"$set": {"is_active": False, "deleted_at": datetime.now(timezone.utc)}}
+            bump_version({"$set": {"is_active": False, "deleted_at": datetime.now(timezone.utc)}})
         )
+        invalidate_course(course_id)
         return result.modified_count > 0
     
     # Bulk Operations
     @staticmethod
-    def bulk_user_action(user_ids: List[str], action: str) -> int:
+    async def bulk_user_action(user_ids: List[str], action: str) -> int:
         """Perform bulk actions on users"""
         object_ids = [ObjectId(uid) for uid in user_ids]
         
         if action == "activate":
-            result = users_collection.update_many(
+            result = await users_collection.update_many(
                 {"_id": {"$in": object_ids}},
                 {"$set": {"is_active": True, "updated_at": datetime.now(timezone.utc)}}
             )
         elif action == "deactivate":
-            result = users_collection.update_many(
+            result = await users_collection.update_many(
                 {"_id": {"$in": object_ids}},
                 {"$set": {"is_active": False, "updated_at": datetime.now(timezone.utc)}}
             )
         elif action == "delete":
-            result = users_collection.update_many(
+            result = await users_collection.update_many(
                 {"_id": {"$in": object_ids}},
                 {"$set": {"is_active": False, "deleted_at": datetime.now(timezone.utc)}}
             )
         else:
             return 0
             
+        invalidate_user(*user_ids)
         return result.modified_count
     
     @staticmethod
-    def bulk_course_action(course_ids: List[str], action: str) -> int:
+    async def bulk_course_action(course_ids: List[str], action: str) -> int:
         """Perform bulk actions on courses"""
         object_ids = [ObjectId(cid) for cid in course_ids]
         
         if action == "activate":
-            result = courses_collection.update_many(
+            result = await courses_collection.update_many(
                 {"_id": {"$in": object_ids}},
-                {"$set": {"is_active": True, "updated_at": datetime.now(timezone.utc)}}
+                bump_version({"$set": {"is_active": True}})
             )
         elif action == "deactivate":
-            result = courses_collection.update_many(
+            result = await courses_collection.update_many(
                 {"_id": {"$in": object_ids}},
-                {"$set": {"is_active": False, "updated_at": datetime.now(timezone.utc)}}
+                bump_version({"$set": {"is_active": False}})
             )
         elif action == "delete":
-            result = courses_collection.update_many(
+            result = await courses_collection.update_many(
                 {"_id": {"$in": object_ids}},
-                {"$set": {"is_active": False, "deleted_at": datetime.now(timezone.utc)}}
+                bump_version({"$set": {"is_active": False, "deleted_at": datetime.now(timezone.utc)}})
             )
         else:
             return 0
             
+        invalidate_course(*course_ids)
         return result.modified_count
     
     # Analytics and Reports
     @staticmethod
-    def get_user_growth_analytics(days: int = 30) -> List[Dict]:
-        """Get user growth analytics for the last N days"""
-        start_date = datetime.now(timezone.utc) - timedelta(days=days)
-        
-        pipeline = [
-            {
-                "$match": {
-                    "created_at": {"$gte": start_date}
-                }
-            },
-            {
-                "$group": {
-                    "_id": {
-                        "$dateToString": {
-                            "format": "%Y-%m-%d",
-                            "date": "$created_at"
-                        }
-                    },
-                    "count": {"$sum": 1}
-                }
-            },
-            {"$sort": {"_id": 1}}
-        ]
-        
-        return list(users_collection.aggregate(pipeline))
+    async def get_user_growth_analytics(days: int = 30) -> List[Dict]:
+        """Get user growth analytics for the last N days (from the daily rollups)"""
+        return await rollups.daily_series("signups", days)
     
     @staticmethod
-    def get_course_enrollment_analytics(days: int = 30) -> List[Dict]:
-        """Get course enrollment analytics"""
-        start_date = datetime.now(timezone.utc) - timedelta(days=days)
-        
-        pipeline = [
-            {
-                "$match": {
-                    "enrolled_at": {"$gte": start_date}
-                }
-            },
-            {
-                "$lookup": {
-                    "from": "courses",
-                    "localField": "course_id",
-                    "foreignField": "_id",
-                    "as": "course"
-                }
-            },
-            {
-                "$group": {
-                    "_id": {
-                        "course_id": "$course_id",
-                        "course_title": {"$arrayElemAt": ["$course.title", 0]}
-                    },
-                    "enrollments": {"$sum": 1}
-                }
-            },
-            {"$sort": {"enrollments": -1}},
-            {"$limit": 10}
-        ]
-        
-        return list(enrollments_collection.aggregate(pipeline))
+    async def get_course_enrollment_analytics(days: int = 30) -> List[Dict]:
+        """Get course enrollment analytics (from the daily rollups)"""
+        return await rollups.top_courses(days, limit=10)
     
     @staticmethod
-    def get_instructor_performance() -> List[Dict]:
+    async def get_instructor_performance() -> List[Dict]:
         """Get instructor performance statistics"""
         pipeline = [
             {
@@ -364,18 +480,10 @@ class AdminRepository:
                     "as": "courses"
                 }
             },
-            {
-                "$lookup": {
-                    "from": "enrollments",
-                    "localField": "courses._id",
-                    "foreignField": "course_id",
-                    "as": "enrollments"
-                }
-            },
             {
                 "$addFields": {
                     "total_courses": {"$size": "$courses"},
-                    "total_enrollments": {"$size": "$enrollments"},
+                    "total_enrollments": {"$sum": "$courses.enrollment_count"},
                     "active_courses": {
                         "$size": {
                             "$filter": {
@@ -400,4 +508,4 @@ class AdminRepository:
             {"$sort": {"total_enrollments": -1}}
         ]
         
-        return list(users_collection.aggregate(pipeline))
+        return await users_collection.aggregate(pipeline).to_list(length=None)
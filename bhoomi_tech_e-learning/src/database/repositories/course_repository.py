@@ -1,22 +1,70 @@
-from database.__init_db import courses_collection
+from database.__init_db import async_courses_collection as courses_collection
 from bson import ObjectId
+import re
+from cache import invalidate_course
+from database.pagination import paginate, DEFAULT_PAGE_SIZE
+from database.counters import with_lesson_count
+from database.projections import projection_for
+from database.versioning import new_version, bump_version
+from search import course_search
+from serialization import find_public, find_one_public
 
 class CourseRepository:
     @staticmethod
-    def create(course_dict):
-        return courses_collection.insert_one(course_dict)
+    async def create(course_dict):
+        result = await courses_collection.insert_one(new_version(with_lesson_count(course_dict)))
+        invalidate_course(result.inserted_id)
+        return result
     @staticmethod
-    def find_all():
-        return list(courses_collection.find())
+    async def find_all(profile=None):
+        return await courses_collection.find({}, projection_for("courses", profile)).to_list(length=None)
     @staticmethod
-    def find_by_id(course_id):
-        return courses_collection.find_one({"_id": ObjectId(course_id)})
+    async def find_page(cursor=None, limit=DEFAULT_PAGE_SIZE, profile=None, **kwargs):
+        return await paginate(courses_collection, cursor=cursor, limit=limit,
+                              projection=projection_for("courses", profile), **kwargs)
     @staticmethod
-    def update(course_id, update_data):
-        return courses_collection.update_one(
+    async def find_by_id(course_id, public=False, profile=None):
+        projection = projection_for("courses", profile)
+        if public:
+            return await find_one_public(courses_collection, {"_id": ObjectId(course_id)}, projection)
+        return await courses_collection.find_one({"_id": ObjectId(course_id)}, projection)
+    @staticmethod
+    async def find_by_instructor(instructor_id, public=False, profile=None):
+        projection = projection_for("courses", profile)
+        if public:
+            return await find_public(courses_collection, {"instructor_id": instructor_id}, projection=projection)
+        return await courses_collection.find({"instructor_id": instructor_id}, projection).to_list(length=None)
+    @staticmethod
+    async def search(query, skip=0, limit=DEFAULT_PAGE_SIZE, profile=None):
+        """Ranked full-text matches as (page of public courses, total matches)"""
+        projection = projection_for("courses", profile)
+        ids = await course_search.query(query)
+        if ids is None:
+            # Index not built yet: unranked scan
+            match = {"$or": [
+                {"title": {"$regex": re.escape(query), "$options": "i"}},
+                {"description": {"$regex": re.escape(query), "$options": "i"}},
+            ]}
+            total = await courses_collection.count_documents(match)
+            courses = await find_public(courses_collection, match, {"_id": 1}, skip=skip, limit=limit,
+                                        projection=projection)
+            return courses, total
+        page = ids[skip:skip + limit]
+        courses = await find_public(courses_collection, {"_id": {"$in": [ObjectId(course_id) for course_id in page]}},
+                                    projection=projection)
+        position = {course_id: i for i, course_id in enumerate(page)}
+        courses.sort(key=lambda course: position[course["id"]])
+        return courses, len(ids)
+    @staticmethod
+    async def update(course_id, update_data):
+        result = await courses_collection.update_one(
             {"_id": ObjectId(course_id)}, 
-            {"$set": update_data}
+            bump_version({"$set": with_lesson_count(update_data)})
         )
+        invalidate_course(course_id)
+        return result
     @staticmethod
-    def delete(course_id):
-        return courses_collection.delete_one({"_id": ObjectId(course_id)})
+    async def delete(course_id):
+        result = await courses_collection.delete_one({"_id": ObjectId(course_id)})
+        invalidate_course(course_id)
+        return result
@@ -1,31 +1,150 @@
-from database.__init_db import enrollments_collection
+from database.__init_db import async_enrollments_collection as enrollments_collection
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+import asyncio
+from cache import TTLCache, invalidate_course
+from config import config
+from database.progress import progress_buffer
+from database.pagination import paginate, DEFAULT_PAGE_SIZE
+from database.counters import adjust_enrollment_counts
+from database.rollups import record_enrollment
+from serialization import find_public
+from datetime import datetime, timezone
+
+# Enrollments recently seen to exist, so buffered progress reports skip the lookup
+known_enrollments = TTLCache(maxsize=config.PROGRESS_BUFFER_MAX_PENDING, ttl=300)
 
 class EnrollmentRepository:
     @staticmethod
-    def create(enrollment_dict):
-        return enrollments_collection.insert_one(enrollment_dict)
+    async def create(enrollment_dict):
+        enrollment_dict.setdefault("enrolled_at", datetime.now(timezone.utc))
+        result = await enrollments_collection.insert_one(enrollment_dict)
+        await asyncio.gather(
+            adjust_enrollment_counts(enrollment_dict.get("user_id"), enrollment_dict.get("course_id"), 1),
+            record_enrollment(enrollment_dict.get("course_id"), enrollment_dict["enrolled_at"]),
+        )
+        # The course's enrollment_count (and version) changed
+        invalidate_course(enrollment_dict.get("course_id"))
+        return result
+    @staticmethod
+    async def find_all():
+        return await enrollments_collection.find().to_list(length=None)
+    @staticmethod
+    async def find_page(cursor=None, limit=DEFAULT_PAGE_SIZE, **kwargs):
+        enrollments, next_cursor = await paginate(enrollments_collection, cursor=cursor, limit=limit, **kwargs)
+        return progress_buffer.apply_pending(enrollments), next_cursor
+    @staticmethod
+    async def find_paginated(skip=0, limit=DEFAULT_PAGE_SIZE, query=None, public=False):
+        if public:
+            enrollments = await find_public(enrollments_collection, query, {"_id": 1}, skip=skip, limit=limit)
+        else:
+            enrollments = await enrollments_collection.find(query or {}).sort("_id", 1).skip(skip).limit(limit).to_list(length=limit)
+        return progress_buffer.apply_pending(enrollments)
     @staticmethod
-    def find_all():
-        return list(enrollments_collection.find())
+    async def count(query=None, approximate=False):
+        if approximate and not query:
+            return await enrollments_collection.estimated_document_count()
+        return await enrollments_collection.count_documents(query or {})
     @staticmethod
-    def find_by_user(user_id):
-        return list(enrollments_collection.find({"user_id": user_id}))
+    async def find_by_user(user_id, public=False):
+        if public:
+            enrollments = await find_public(enrollments_collection, {"user_id": user_id})
+        else:
+            enrollments = await enrollments_collection.find({"user_id": user_id}).to_list(length=None)
+        return progress_buffer.apply_pending(enrollments)
     @staticmethod
-    def find_by_user_id(user_id):
-        return list(enrollments_collection.find({"user_id": ObjectId(user_id)}))
+    async def find_by_user_id(user_id):
+        return await enrollments_collection.find({"user_id": ObjectId(user_id)}).to_list(length=None)
     @staticmethod
-    def find_by_course_id(course_id):
-        return list(enrollments_collection.find({"course_id": ObjectId(course_id)}))
+    async def find_by_course_id(course_id):
+        return await enrollments_collection.find({"course_id": ObjectId(course_id)}).to_list(length=None)
     @staticmethod
-    def find_by_user_and_course(user_id, course_id):
-        return enrollments_collection.find_one({"user_id": user_id, "course_id": course_id})
+    async def find_by_user_and_course(user_id, course_id):
+        return await enrollments_collection.find_one({"user_id": user_id, "course_id": course_id})
     @staticmethod
-    def update_progress(enrollment_id, progress):
-        return enrollments_collection.update_one(
+    async def update_progress(enrollment_id, progress):
+        return await enrollments_collection.update_one(
             {"_id": ObjectId(enrollment_id)}, 
             {"$set": {"progress": progress}}
         )
     @staticmethod
-    def delete(enrollment_id):
-        return enrollments_collection.delete_one({"_id": ObjectId(enrollment_id)})
+    async def record_progress(enrollment_id, progress):
+        """Buffer a progress report (database/progress.py); returns False if the enrollment does not exist"""
+        if config.PROGRESS_FLUSH_INTERVAL_SECONDS <= 0:
+            result = await EnrollmentRepository.update_progress(enrollment_id, progress)
+            return result.matched_count > 0
+        found, _ = known_enrollments.get(enrollment_id)
+        if not found:
+            if await enrollments_collection.find_one({"_id": ObjectId(enrollment_id)}, {"_id": 1}) is None:
+                return False
+            known_enrollments.set(enrollment_id, True, [f"enrollment:{enrollment_id}"])
+        if progress_buffer.record(enrollment_id, progress):
+            # Too much pending to wait for the periodic flush
+            try:
+                await progress_buffer.flush()
+            except Exception as e:
+                print(f"✗ Progress flush failed: {e}")
+        return True
+    @staticmethod
+    async def apply_progress_events(user_id, events):
+        """Apply many progress events for user_id's enrollments in one bulk_write.
+        Returns (events applied, [{"index", "enrollment_id", "reason"}] for those rejected)."""
+        rejected = []
+        parsed = []
+        for index, event in enumerate(events):
+            try:
+                enrollment_oid = ObjectId(event["enrollment_id"])
+                if event.get("lesson_id") is not None:
+                    # Used as a field name below, so it must be a plain id
+                    ObjectId(event["lesson_id"])
+            except (InvalidId, TypeError):
+                rejected.append({"index": index, "enrollment_id": event["enrollment_id"], "reason": "Invalid id"})
+                continue
+            parsed.append((index, enrollment_oid, event))
+        # One $in query checks every enrollment exists and belongs to the user
+        owned = {
+            doc["_id"] for doc in await enrollments_collection.find(
+                {"_id": {"$in": list({oid for _, oid, _ in parsed})}, "user_id": user_id}, {"_id": 1}
+            ).to_list(length=None)
+        } if parsed else set()
+
+        updates = {}
+        applied = 0
+        for index, enrollment_oid, event in parsed:
+            if enrollment_oid not in owned:
+                rejected.append({"index": index, "enrollment_id": event["enrollment_id"], "reason": "Enrollment not found"})
+                continue
+            has_position = event.get("lesson_id") is not None and event.get("position") is not None
+            if event.get("progress") is None and not has_position:
+                rejected.append({"index": index, "enrollment_id": event["enrollment_id"], "reason": "Nothing to apply"})
+                continue
+            update = updates.setdefault(enrollment_oid, {})
+            if event.get("progress") is not None:
+                # Progress only moves forward, as in the buffered single updates
+                best = update.setdefault("$max", {}).get("progress")
+                update["$max"]["progress"] = event["progress"] if best is None else max(best, event["progress"])
+            if has_position:
+                # Events are in the order they happened, so the last position per lesson wins
+                update.setdefault("$set", {})[f"lesson_positions.{event['lesson_id']}"] = event["position"]
+            applied += 1
+        if updates:
+            await enrollments_collection.bulk_write(
+                [UpdateOne({"_id": oid}, update) for oid, update in updates.items()], ordered=False
+            )
+        return applied, sorted(rejected, key=lambda item: item["index"])
+    @staticmethod
+    async def delete(enrollment_id):
+        enrollment = await enrollments_collection.find_one_and_delete(
+            {"_id": ObjectId(enrollment_id)}, projection={"user_id": 1, "course_id": 1, "enrolled_at": 1}
+        )
+        known_enrollments.invalidate(f"enrollment:{enrollment_id}")
+        progress_buffer.forget(enrollment_id)
+        if enrollment is None:
+            return False
+        updates = [adjust_enrollment_counts(enrollment.get("user_id"), enrollment.get("course_id"), -1)]
+        if enrollment.get("enrolled_at"):
+            updates.append(record_enrollment(enrollment.get("course_id"), enrollment["enrolled_at"], delta=-1))
+        await asyncio.gather(*updates)
+        invalidate_course(enrollment.get("course_id"))
+        return True
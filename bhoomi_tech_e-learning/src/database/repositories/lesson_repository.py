@@ -1,16 +1,40 @@
-from database.__init_db import lessons_collection
+from database.__init_db import async_lessons_collection as lessons_collection
 from bson import ObjectId
+from cache import invalidate_lesson
+from database.pagination import paginate, DEFAULT_PAGE_SIZE
+from database.projections import projection_for
+from database.versioning import bump_version, new_version
+from serialization import find_one_public
 
 class LessonRepository:
     @staticmethod
-    def create(lesson_dict):
-        return lessons_collection.insert_one(lesson_dict)
+    async def create(lesson_dict):
+        result = await lessons_collection.insert_one(new_version(lesson_dict))
+        invalidate_lesson()
+        return result
     @staticmethod
-    def find_all():
-        return list(lessons_collection.find())
+    async def find_all(profile=None):
+        return await lessons_collection.find({}, projection_for("lessons", profile)).to_list(length=None)
     @staticmethod
-    def find_by_id(lesson_id):
-        return lessons_collection.find_one({"_id": ObjectId(lesson_id)})
+    async def find_page(cursor=None, limit=DEFAULT_PAGE_SIZE, profile=None, **kwargs):
+        return await paginate(lessons_collection, cursor=cursor, limit=limit,
+                              projection=projection_for("lessons", profile), **kwargs)
     @staticmethod
-    def delete(lesson_id):
-        return lessons_collection.delete_one({"_id": ObjectId(lesson_id)})
+    async def find_by_id(lesson_id, public=False, profile=None):
+        projection = projection_for("lessons", profile)
+        if public:
+            return await find_one_public(lessons_collection, {"_id": ObjectId(lesson_id)}, projection)
+        return await lessons_collection.find_one({"_id": ObjectId(lesson_id)}, projection)
+    @staticmethod
+    async def update(lesson_id, update_data):
+        result = await lessons_collection.update_one(
+            {"_id": ObjectId(lesson_id)},
+            bump_version({"$set": update_data})
+        )
+        invalidate_lesson(lesson_id)
+        return result
+    @staticmethod
+    async def delete(lesson_id):
+        result = await lessons_collection.delete_one({"_id": ObjectId(lesson_id)})
+        invalidate_lesson(lesson_id)
+        return result
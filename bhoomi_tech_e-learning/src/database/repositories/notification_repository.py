@@ -1,16 +1,19 @@
-from database.__init_db import notifications_collection
+from database.__init_db import async_notifications_collection as notifications_collection
 from bson import ObjectId
+from serialization import find_public
 
 class NotificationRepository:
     @staticmethod
-    def create(notification_dict):
-        return notifications_collection.insert_one(notification_dict)
+    async def create(notification_dict):
+        return await notifications_collection.insert_one(notification_dict)
     @staticmethod
-    def find_by_user(user_id):
-        return list(notifications_collection.find({"user_id": user_id}))
+    async def find_by_user(user_id, public=False):
+        if public:
+            return await find_public(notifications_collection, {"user_id": user_id})
+        return await notifications_collection.find({"user_id": user_id}).to_list(length=None)
     @staticmethod
-    def mark_as_read(notification_id):
-        return notifications_collection.update_one({"_id": ObjectId(notification_id)}, {"$set": {"is_read": True}})
+    async def mark_as_read(notification_id):
+        return await notifications_collection.update_one({"_id": ObjectId(notification_id)}, {"$set": {"is_read": True}})
     @staticmethod
-    def delete(notification_id):
-        return notifications_collection.delete_one({"_id": ObjectId(notification_id)})
+    async def delete(notification_id):
+        return await notifications_collection.delete_one({"_id": ObjectId(notification_id)})
@@ -1,16 +1,48 @@
-from database.__init_db import payments_collection
+from database.__init_db import async_payments_collection as payments_collection
 from bson import ObjectId
+from database.pagination import paginate, DEFAULT_PAGE_SIZE
+from database.rollups import record_revenue
+from serialization import find_public, find_one_public
+from datetime import datetime, timezone
 
 class PaymentRepository:
     @staticmethod
-    def create(payment_dict):
-        return payments_collection.insert_one(payment_dict)
+    async def create(payment_dict):
+        payment_dict.setdefault("payment_date", datetime.now(timezone.utc))
+        result = await payments_collection.insert_one(payment_dict)
+        if payment_dict.get("status") == "completed":
+            await record_revenue(payment_dict.get("amount"), payment_dict["payment_date"])
+        return result
     @staticmethod
-    def find_all():
-        return list(payments_collection.find())
+    async def find_all():
+        return await payments_collection.find().to_list(length=None)
     @staticmethod
-    def find_by_id(payment_id):
-        return payments_collection.find_one({"_id": ObjectId(payment_id)})
+    async def find_page(cursor=None, limit=DEFAULT_PAGE_SIZE, **kwargs):
+        return await paginate(payments_collection, cursor=cursor, limit=limit, **kwargs)
     @staticmethod
-    def delete(payment_id):
-        return payments_collection.delete_one({"_id": ObjectId(payment_id)})
+    async def find_paginated(skip=0, limit=DEFAULT_PAGE_SIZE, query=None, public=False):
+        if public:
+            return await find_public(payments_collection, query, {"_id": 1}, skip=skip, limit=limit)
+        return await payments_collection.find(query or {}).sort("_id", 1).skip(skip).limit(limit).to_list(length=limit)
+    @staticmethod
+    async def count(query=None, approximate=False):
+        if approximate and not query:
+            return await payments_collection.estimated_document_count()
+        return await payments_collection.count_documents(query or {})
+    @staticmethod
+    async def find_by_id(payment_id, public=False):
+        if public:
+            return await find_one_public(payments_collection, {"_id": ObjectId(payment_id)})
+        return await payments_collection.find_one({"_id": ObjectId(payment_id)})
+    @staticmethod
+    async def delete(payment_id):
+        payment = await payments_collection.find_one_and_delete(
+            {"_id": ObjectId(payment_id)},
+            projection={"status": 1, "amount": 1, "payment_date": 1, "created_at": 1}
+        )
+        if payment is None:
+            return False
+        when = payment.get("payment_date") or payment.get("created_at")
+        if payment.get("status") == "completed" and when:
+            await record_revenue(payment.get("amount"), when, delta=-1)
+        return True
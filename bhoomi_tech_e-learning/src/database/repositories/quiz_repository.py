@@ -1,16 +1,36 @@
-from database.__init_db import quizzes_collection
+from database.__init_db import async_quizzes_collection as quizzes_collection
 from bson import ObjectId
+from cache import invalidate_quiz
+from database.pagination import paginate, DEFAULT_PAGE_SIZE
+from serialization import find_one_public
+from database.versioning import new_version
+from database.quiz_stats import delete_stats
 
 class QuizRepository:
     @staticmethod
-    def create(quiz_dict):
-        return quizzes_collection.insert_one(quiz_dict)
+    async def create(quiz_dict):
+        result = await quizzes_collection.insert_one(new_version(quiz_dict))
+        invalidate_quiz()
+        return result
     @staticmethod
-    def find_all():
-        return list(quizzes_collection.find())
+    async def find_all():
+        return await quizzes_collection.find().to_list(length=None)
     @staticmethod
-    def find_by_id(quiz_id):
-        return quizzes_collection.find_one({"_id": ObjectId(quiz_id)})
+    async def find_page(cursor=None, limit=DEFAULT_PAGE_SIZE, **kwargs):
+        return await paginate(quizzes_collection, cursor=cursor, limit=limit, **kwargs)
     @staticmethod
-    def delete(quiz_id):
-        return quizzes_collection.delete_one({"_id": ObjectId(quiz_id)})
+    async def find_by_id(quiz_id, public=False):
+        if public:
+            return await find_one_public(quizzes_collection, {"_id": ObjectId(quiz_id)})
+        return await quizzes_collection.find_one({"_id": ObjectId(quiz_id)})
+    @staticmethod
+    async def find_answer_key(quiz_id):
+        """Only what grading.AnswerKey needs: the answers"""
+        return await quizzes_collection.find_one({"_id": ObjectId(quiz_id)}, {"questions.answer": 1})
+    @staticmethod
+    async def delete(quiz_id):
+        result = await quizzes_collection.delete_one({"_id": ObjectId(quiz_id)})
+        if result.deleted_count:
+            await delete_stats(quiz_id)
+        invalidate_quiz(quiz_id)
+        return result
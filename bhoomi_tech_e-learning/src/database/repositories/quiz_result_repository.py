@@ -1,15 +1,28 @@
-from database.__init_db import db
+from database.__init_db import async_quiz_results_collection as quiz_results_collection
 from bson import ObjectId
-
-quiz_results_collection = db["quiz_results"]
+import asyncio
+from serialization import find_public
+from database.quiz_stats import record_results
 
 class QuizResultRepository:
     @staticmethod
-    def create(result_dict):
-        return quiz_results_collection.insert_one(result_dict)
+    async def create(result_dict):
+        result = await quiz_results_collection.insert_one(result_dict)
+        await record_results(result_dict["quiz_id"], [result_dict])
+        return result
+    @staticmethod
+    async def create_many(result_dicts):
+        result = await quiz_results_collection.insert_many(result_dicts, ordered=False)
+        by_quiz = {}
+        for result_dict in result_dicts:
+            by_quiz.setdefault(result_dict["quiz_id"], []).append(result_dict)
+        await asyncio.gather(*(record_results(quiz_id, results) for quiz_id, results in by_quiz.items()))
+        return result
     @staticmethod
-    def find_by_user(user_id):
-        return list(quiz_results_collection.find({"user_id": user_id}))
+    async def find_by_user(user_id):
+        return await quiz_results_collection.find({"user_id": user_id}).to_list(length=None)
     @staticmethod
-    def find_by_quiz(quiz_id):
-        return list(quiz_results_collection.find({"quiz_id": quiz_id}))
+    async def find_by_quiz(quiz_id, public=False):
+        if public:
+            return await find_public(quiz_results_collection, {"quiz_id": quiz_id})
+        return await quiz_results_collection.find({"quiz_id": quiz_id}).to_list(length=None)
@@ -1,13 +1,29 @@
-from database.__init_db import reviews_collection
+from database.__init_db import async_reviews_collection as reviews_collection
 from bson import ObjectId
+from cache import invalidate_course
+from database.counters import adjust_course_rating
+from serialization import find_public
 
 class ReviewRepository:
     @staticmethod
-    def create(review_dict):
-        return reviews_collection.insert_one(review_dict)
+    async def create(review_dict):
+        result = await reviews_collection.insert_one(review_dict)
+        await adjust_course_rating(review_dict.get("course_id"), review_dict.get("rating"), 1)
+        # The course's rating summary (and version) changed
+        invalidate_course(review_dict.get("course_id"))
+        return result
     @staticmethod
-    def find_by_course(course_id):
-        return list(reviews_collection.find({"course_id": course_id}))
+    async def find_by_course(course_id, public=False):
+        if public:
+            return await find_public(reviews_collection, {"course_id": course_id})
+        return await reviews_collection.find({"course_id": course_id}).to_list(length=None)
     @staticmethod
-    def delete(review_id):
-        return reviews_collection.delete_one({"_id": ObjectId(review_id)})
+    async def delete(review_id):
+        review = await reviews_collection.find_one_and_delete(
+            {"_id": ObjectId(review_id)}, projection={"course_id": 1, "rating": 1}
+        )
+        if review is None:
+            return False
+        await adjust_course_rating(review.get("course_id"), review.get("rating"), -1)
+        invalidate_course(review.get("course_id"))
+        return True
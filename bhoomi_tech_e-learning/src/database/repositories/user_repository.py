@@ -1,25 +1,57 @@
-from database.__init_db import users_collection
+from database.__init_db import async_users_collection as users_collection
 from bson import ObjectId
+from cache import invalidate_user
+from database.pagination import paginate, DEFAULT_PAGE_SIZE
+from database.rollups import record_signup
+from database.projections import projection_for, DETAIL
+from serialization import find_one_public
+from datetime import datetime, timezone
 
 class UserRepository:
     @staticmethod
-    def create(user_dict):
-        return users_collection.insert_one(user_dict)
+    async def create(user_dict):
+        user_dict.setdefault("created_at", datetime.now(timezone.utc))
+        result = await users_collection.insert_one(user_dict)
+        invalidate_user(result.inserted_id)
+        await record_signup(user_dict["created_at"])
+        return result
     @staticmethod
-    def find_by_email(email):
-        return users_collection.find_one({"email": email})
+    async def find_by_email(email):
+        return await users_collection.find_one({"email": email})
     @staticmethod
-    def find_all():
-        return list(users_collection.find())
+    async def find_all(profile=None):
+        return await users_collection.find({}, projection_for("users", profile)).to_list(length=None)
     @staticmethod
-    def find_by_id(user_id):
-        return users_collection.find_one({"_id": ObjectId(user_id)})
+    async def find_page(cursor=None, limit=DEFAULT_PAGE_SIZE, public=False, profile=None, **kwargs):
+        # Public reads never carry the password hash
+        if public and profile is None:
+            profile = DETAIL
+        return await paginate(users_collection, cursor=cursor, limit=limit, public=public,
+                              projection=projection_for("users", profile), **kwargs)
     @staticmethod
-    def update(user_id, update_data):
-        return users_collection.update_one(
+    async def find_paginated(skip=0, limit=DEFAULT_PAGE_SIZE, query=None):
+        return await users_collection.find(query or {}).sort("_id", 1).skip(skip).limit(limit).to_list(length=limit)
+    @staticmethod
+    async def count(query=None, approximate=False):
+        if approximate and not query:
+            return await users_collection.estimated_document_count()
+        return await users_collection.count_documents(query or {})
+    @staticmethod
+    async def find_by_id(user_id, public=False, profile=None):
+        if public:
+            return await find_one_public(users_collection, {"_id": ObjectId(user_id)},
+                                         projection_for("users", profile or DETAIL))
+        return await users_collection.find_one({"_id": ObjectId(user_id)}, projection_for("users", profile))
+    @staticmethod
+    async def update(user_id, update_data):
+        result = await users_collection.update_one(
             {"_id": ObjectId(user_id)}, 
             {"$set": update_data}
         )
+        invalidate_user(user_id)
+        return result
     @staticmethod
-    def delete(user_id):
-        return users_collection.delete_one({"_id": ObjectId(user_id)})
+    async def delete(user_id):
+        result = await users_collection.delete_one({"_id": ObjectId(user_id)})
+        invalidate_user(user_id)
+        return result
@@ -0,0 +1,234 @@
+"""
+Pre-aggregated daily analytics.
+
+    daily_stats               _id "YYYY-MM-DD": signups, enrollments, revenue, completed_payments
+    daily_course_enrollments  _id "YYYY-MM-DD:<course_id>": enrollments in one course on one day
+
+Write paths bump the bucket for the current day with $inc (record_signup,
+record_enrollment, record_revenue). The analytics endpoints read only these
+buckets, so their cost depends on the number of days asked for rather than on
+the size of users/enrollments/payments. backfill() rebuilds the buckets from
+the raw collections, either after a bulk import or to repair drift:
+
+    python -m database.rollups              # rebuild every day
+    python -m database.rollups --days 90    # rebuild the last 90 days
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from database.helpers import default_database, to_object_id
+
+DAILY_STATS = "daily_stats"
+DAILY_COURSE_ENROLLMENTS = "daily_course_enrollments"
+BACKFILL_BATCH_SIZE = 1000
+
+
+def day_key(when: Optional[datetime] = None) -> str:
+    """UTC calendar day of when (naive datetimes are taken as UTC)"""
+    when = when or datetime.now(timezone.utc)
+    if when.tzinfo is not None:
+        when = when.astimezone(timezone.utc)
+    return when.strftime("%Y-%m-%d")
+
+
+def _bucket_fields(day: str) -> Dict[str, Any]:
+    return {"date": datetime.strptime(day, "%Y-%m-%d"), "month": day[:7]}
+
+
+def _first_day(days: int) -> str:
+    return day_key(datetime.now(timezone.utc) - timedelta(days=days))
+
+
+async def _bump(database, when: Optional[datetime], inc: Dict[str, Any]):
+    day = day_key(when)
+    await database[DAILY_STATS].update_one(
+        {"_id": day}, {"$inc": inc, "$setOnInsert": _bucket_fields(day)}, upsert=True
+    )
+
+
+async def record_signup(when: Optional[datetime] = None, database=None):
+    if database is None:
+        database = default_database()
+    await _bump(database, when, {"signups": 1})
+
+
+async def record_enrollment(course_id, when: Optional[datetime] = None, delta: int = 1, database=None):
+    """Count an enrollment (delta=-1 when one is removed) for the day and for its course"""
+    if database is None:
+        database = default_database()
+    day = day_key(when)
+    updates = [_bump(database, when, {"enrollments": delta})]
+    if course_id is not None:
+        updates.append(database[DAILY_COURSE_ENROLLMENTS].update_one(
+            {"_id": f"{day}:{course_id}"},
+            {
+                "$inc": {"enrollments": delta},
+                "$setOnInsert": dict(_bucket_fields(day), course_id=str(course_id)),
+            },
+            upsert=True,
+        ))
+    await asyncio.gather(*updates)
+
+
+async def record_revenue(amount, when: Optional[datetime] = None, delta: int = 1, database=None):
+    """Count a completed payment (delta=-1 when one is removed)"""
+    if database is None:
+        database = default_database()
+    await _bump(database, when, {"revenue": (amount or 0) * delta, "completed_payments": delta})
+
+
+# ----------------------------------------------------------------------------
+# Queries
+# ----------------------------------------------------------------------------
+
+async def daily_series(field: str, days: int, database=None) -> List[Dict]:
+    """[{"_id": "YYYY-MM-DD", "count": n}] for days of the last `days` where field is non-zero"""
+    if database is None:
+        database = default_database()
+    docs = await database[DAILY_STATS].find(
+        {"_id": {"$gte": _first_day(days)}, field: {"$ne": 0, "$exists": True}},
+        {field: 1},
+    ).sort("_id", 1).to_list(length=None)
+    return [{"_id": doc["_id"], "count": doc[field]} for doc in docs]
+
+
+async def monthly_totals(field: str, first_day: str, database=None) -> Dict[str, Any]:
+    """{"YYYY-MM": total of field} for every month from first_day on"""
+    if database is None:
+        database = default_database()
+    pipeline = [
+        {"$match": {"_id": {"$gte": first_day}}},
+        {"$group": {"_id": "$month", "total": {"$sum": f"${field}"}}},
+    ]
+    rows = await database[DAILY_STATS].aggregate(pipeline).to_list(length=None)
+    return {row["_id"]: row["total"] for row in rows}
+
+
+async def top_courses(days: int, limit: int = 10, database=None) -> List[Dict]:
+    """Courses with the most enrollments over the last `days`, titles resolved for the winners only"""
+    if database is None:
+        database = default_database()
+    pipeline = [
+        {"$match": {"_id": {"$gte": _first_day(days)}}},
+        {"$group": {"_id": "$course_id", "enrollments": {"$sum": "$enrollments"}}},
+        {"$match": {"enrollments": {"$gt": 0}}},
+        {"$sort": {"enrollments": -1}},
+        {"$limit": limit},
+    ]
+    rows = await database[DAILY_COURSE_ENROLLMENTS].aggregate(pipeline).to_list(length=None)
+    ids = [oid for oid in (to_object_id(row["_id"]) for row in rows) if oid is not None]
+    courses = await database["courses"].find({"_id": {"$in": ids}}, {"title": 1}).to_list(length=None)
+    titles = {str(course["_id"]): course.get("title") for course in courses}
+    return [
+        {
+            "_id": {"course_id": row["_id"], "course_title": titles.get(row["_id"])},
+            "enrollments": row["enrollments"],
+        }
+        for row in rows
+    ]
+
+
+# ----------------------------------------------------------------------------
+# Backfill
+# ----------------------------------------------------------------------------
+
+def _by_day(date_expr, group_id: Any = "$_day", extra_group: Dict = None, match: Dict = None,
+            first_day: Optional[str] = None) -> List[Dict]:
+    """Group documents by the UTC day of date_expr (documents without a date are skipped)"""
+    day = {"$dateToString": {"format": "%Y-%m-%d", "date": date_expr}}
+    day_filter = {"$ne": None}
+    if first_day:
+        day_filter["$gte"] = first_day
+    pipeline = [{"$match": match}] if match else []
+    pipeline.append({"$addFields": {"_day": day}})
+    pipeline.append({"$match": {"_day": day_filter}})
+    group = {"_id": group_id, "n": {"$sum": 1}}
+    group.update(extra_group or {})
+    pipeline.append({"$group": group})
+    return pipeline
+
+
+async def _write(collection, updates: List[UpdateOne]):
+    for start in range(0, len(updates), BACKFILL_BATCH_SIZE):
+        await collection.bulk_write(updates[start:start + BACKFILL_BATCH_SIZE], ordered=False)
+
+
+async def backfill(days: Optional[int] = None, database=None) -> Dict[str, int]:
+    """Rebuild the buckets (all days, or the last `days`) from users, enrollments and payments"""
+    if database is None:
+        database = default_database()
+    first_day = _first_day(days) if days else None
+
+    signups, enrollments, revenue = await asyncio.gather(
+        database["users"].aggregate(
+            _by_day("$created_at", first_day=first_day), allowDiskUse=True
+        ).to_list(length=None),
+        database["enrollments"].aggregate(
+            _by_day("$enrolled_at", {"day": "$_day", "course_id": "$course_id"}, first_day=first_day),
+            allowDiskUse=True,
+        ).to_list(length=None),
+        database["payments"].aggregate(
+            _by_day({"$ifNull": ["$payment_date", "$created_at"]}, extra_group={"revenue": {"$sum": "$amount"}},
+                    match={"status": "completed"}, first_day=first_day),
+            allowDiskUse=True,
+        ).to_list(length=None),
+    )
+
+    buckets: Dict[str, Dict[str, Any]] = {}
+
+    def bucket(day: str) -> Dict[str, Any]:
+        return buckets.setdefault(day, {"signups": 0, "enrollments": 0, "revenue": 0, "completed_payments": 0})
+
+    for row in signups:
+        bucket(row["_id"])["signups"] = row["n"]
+    course_buckets: Dict[str, Dict[str, Any]] = {}
+    for row in enrollments:
+        day, course_id = row["_id"]["day"], row["_id"].get("course_id")
+        bucket(day)["enrollments"] += row["n"]
+        if course_id is None:
+            continue
+        # course_id is stored as ObjectId or str depending on the writer; both land in one bucket
+        key = f"{day}:{course_id}"
+        entry = course_buckets.setdefault(key, {"day": day, "course_id": str(course_id), "enrollments": 0})
+        entry["enrollments"] += row["n"]
+    for row in revenue:
+        bucket(row["_id"])["revenue"] = row["revenue"]
+        bucket(row["_id"])["completed_payments"] = row["n"]
+
+    stale = {"_id": {"$gte": first_day}} if first_day else {}
+    await asyncio.gather(
+        database[DAILY_STATS].delete_many(stale),
+        database[DAILY_COURSE_ENROLLMENTS].delete_many(stale),
+    )
+    await asyncio.gather(
+        _write(database[DAILY_STATS], [
+            UpdateOne({"_id": day}, {"$set": dict(values, **_bucket_fields(day))}, upsert=True)
+            for day, values in buckets.items()
+        ]),
+        _write(database[DAILY_COURSE_ENROLLMENTS], [
+            UpdateOne({"_id": key}, {"$set": dict(
+                _bucket_fields(entry["day"]), course_id=entry["course_id"], enrollments=entry["enrollments"]
+            )}, upsert=True)
+            for key, entry in course_buckets.items()
+        ]),
+    )
+    return {DAILY_STATS: len(buckets), DAILY_COURSE_ENROLLMENTS: len(course_buckets)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the daily analytics rollups")
+    parser.add_argument("--days", type=int, default=None,
+                        help="only rebuild the last N days (default: everything)")
+    args = parser.parse_args()
+
+    summary = asyncio.run(backfill(args.days))
+    for collection_name, written in summary.items():
+        print(f"✓ {collection_name}: {written} buckets written")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,17 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
 class EnrollmentSchema(BaseModel):
     id: Optional[str]
     user_id: str = Field(...)
     course_id: str = Field(...)
     progress: float = 0.0
+
+class ProgressEvent(BaseModel):
+    enrollment_id: str = Field(...)
+    lesson_id: Optional[str] = None
+    position: Optional[float] = Field(None, ge=0)  # Seconds into the lesson video
+    progress: Optional[float] = None
+
+class ProgressBatch(BaseModel):
+    events: List[ProgressEvent] = Field(..., min_length=1, max_length=500)
@@ -8,3 +8,10 @@ class LessonSchema(BaseModel):
     content: str = Field(...)
     video_url: Optional[str] = None
     document_url: Optional[str] = None
+
+class VideoUploadInit(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., gt=0)
+
+class VideoUploadComplete(BaseModel):
+    sha256: Optional[str] = Field(None, pattern=r'^[0-9a-fA-F]{64}$')
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List
 
 class QuizSubmission(BaseModel):
@@ -12,3 +12,11 @@ class QuizResult(BaseModel):
     score: float
     total_questions: int
     correct_answers: int
+
+class GradedSubmission(BaseModel):
+    user_id: str
+    answers: List[str]
+
+class BulkGradeRequest(BaseModel):
+    submissions: List[GradedSubmission] = Field(..., min_length=1, max_length=1000)
+    save: bool = True  # Store a quiz result per submission
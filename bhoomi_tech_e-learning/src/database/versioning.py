@@ -0,0 +1,36 @@
+"""
+Document versions for conditional GETs.
+
+Courses, lessons and quizzes carry `version` (incremented by every write) and
+`updated_at`; conditional.py turns them into ETag / Last-Modified headers so a
+client revalidating an unchanged document gets a 304. Inserts go through
+new_version() and updates through bump_version(), including the counter
+updates in database/counters.py, since enrollment_count is part of the course
+a client sees.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+
+def new_version(doc: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Stamp a document about to be inserted as version 1"""
+    now = now or datetime.now(timezone.utc)
+    doc.setdefault("created_at", now)
+    doc["updated_at"] = now
+    doc["version"] = 1
+    return doc
+
+
+def bump_version(update: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Add the version increment and updated_at to a MongoDB update document"""
+    now = now or datetime.now(timezone.utc)
+    update = dict(update)
+    update["$set"] = dict(update.get("$set") or {}, updated_at=now)
+    update["$inc"] = dict(update.get("$inc") or {}, version=1)
+    return update
+
+
+def bump_version_stage(now: Optional[datetime] = None) -> Dict[str, Any]:
+    """bump_version() as a stage for a pipeline-style update"""
+    now = now or datetime.now(timezone.utc)
+    return {"$set": {"updated_at": now, "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]}}}
@@ -0,0 +1,98 @@
+"""
+Streaming report exports (CSV and JSON Lines).
+
+Rows are pulled from an async iterator (normally a server-side aggregation
+cursor), rendered into a small buffer and flushed in chunks, so an export of any
+size holds only one batch of rows in memory. The body can be gzipped on the fly.
+"""
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Sequence
+
+from fastapi.responses import StreamingResponse
+
+from serialization import dumps
+
+# Flush the render buffer once it grows past this many bytes
+CHUNK_SIZE = 64 * 1024
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+}
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def csv_chunks(rows: AsyncIterator[Dict], fields: Sequence[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(fields), extrasaction="ignore")
+    writer.writeheader()
+    async for row in rows:
+        writer.writerow({field: _csv_value(row.get(field)) for field in fields})
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def jsonl_chunks(rows: AsyncIterator[Dict], fields: Optional[Sequence[str]] = None) -> AsyncIterator[bytes]:
+    lines = []
+    size = 0
+    async for row in rows:
+        if fields is not None:
+            row = {field: row.get(field) for field in fields}
+        line = dumps(row) + b"\n"
+        lines.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield b"".join(lines)
+            lines = []
+            size = 0
+    if lines:
+        yield b"".join(lines)
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_report(rows: AsyncIterator[Dict], fields: Iterable[str], format: str,
+                  filename: str, gzip: bool = False) -> StreamingResponse:
+    """Stream rows as a CSV or JSON Lines download named filename.<format>[.gz]"""
+    fields = list(fields)
+    if format == "csv":
+        body = csv_chunks(rows, fields)
+    elif format == "jsonl":
+        body = jsonl_chunks(rows, fields)
+    else:
+        raise ValueError(f"Unsupported export format: {format}")
+
+    filename = f"{filename}.{format}"
+    if gzip:
+        body = gzip_chunks(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    else:
+        media_type = MEDIA_TYPES[format]
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
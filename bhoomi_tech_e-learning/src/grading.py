@@ -0,0 +1,53 @@
+"""
+Quiz grading from compiled answer keys.
+
+A quiz's answer key is compiled once, when it is first needed, and kept in
+cache.answer_key_cache until the quiz is written (invalidate_quiz) or the TTL
+runs out, so a submission does not load the quiz document. The key is the
+tuple of correct answers, compared with map(operator.eq, ...), so no per-answer
+Python bytecode runs. correct_flags() keeps the per-question outcome, which
+results store for database/quiz_stats.py.
+
+Answer i is correct when it equals question i's answer; answers past the
+last question are ignored and missing ones count as wrong.
+"""
+import operator
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from cache import answer_key_cache
+from database.repositories.quiz_repository import QuizRepository
+
+
+class AnswerKey:
+    __slots__ = ("quiz_id", "answers")
+
+    def __init__(self, quiz_id: str, questions: Sequence[Dict[str, Any]]):
+        self.quiz_id = quiz_id
+        self.answers: Tuple[str, ...] = tuple(question.get("answer") for question in questions)
+
+    @property
+    def total_questions(self) -> int:
+        return len(self.answers)
+
+    def correct_flags(self, answers: Sequence[str]) -> List[bool]:
+        """Per question, whether the submission got it right"""
+        flags = list(map(operator.eq, answers, self.answers))
+        flags.extend([False] * (len(self.answers) - len(flags)))
+        return flags
+
+
+def percentage(correct_answers: int, total_questions: int) -> float:
+    return (correct_answers / total_questions) * 100 if total_questions > 0 else 0
+
+
+async def get_answer_key(quiz_id: str) -> Optional[AnswerKey]:
+    """The compiled answer key for quiz_id (None when the quiz does not exist)"""
+    found, key = answer_key_cache.get(quiz_id)
+    if found:
+        return key
+    quiz = await QuizRepository.find_answer_key(quiz_id)
+    if quiz is None:
+        return None
+    key = AnswerKey(quiz_id, quiz.get("questions") or [])
+    answer_key_cache.set(quiz_id, key, [f"quiz:{quiz_id}"])
+    return key
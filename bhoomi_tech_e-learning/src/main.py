@@ -1,8 +1,12 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request
+from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 import os
+from serialization import FastJSONResponse
+from compression import CompressionMiddleware
+from static_assets import PrecompressedStaticFiles, served_directory
+from config import config
 
 # Import database connection
 try:
@@ -77,6 +81,13 @@ try:
 except Exception as e:
     print(f"✗ Payment router failed: {e}")
 
+try:
+    from routes.autocomplete import router as autocomplete_router
+    routers.append(("autocomplete", autocomplete_router))
+    print("✓ Autocomplete router imported successfully")
+except Exception as e:
+    print(f"✗ Autocomplete router failed: {e}")
+
 try:
     from routes.admin import router as admin_router
     routers.append(("admin", admin_router))
@@ -84,9 +95,9 @@ try:
 except Exception as e:
     print(f"✗ Admin router failed: {e}")
 
-print(f"Successfully imported {len(routers)} routers out of 10")
+print(f"Successfully imported {len(routers)} routers out of 11")
 
-app = FastAPI(title="Bhoomi Tech E-Learning API", version="1.0.0")
+app = FastAPI(title="Bhoomi Tech E-Learning API", version="1.0.0", default_response_class=FastJSONResponse)
 
 # Add CORS middleware to allow frontend access
 app.add_middleware(
@@ -95,6 +106,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],  # Specify allowed methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["ETag", "Last-Modified"],  # Readable by browser clients revalidating by hand
+)
+
+# Compress JSON and other text responses above the size threshold (brotli when available, else gzip)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=config.COMPRESSION_MIN_SIZE,
+    gzip_level=config.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=config.COMPRESSION_BROTLI_QUALITY,
 )
 
 # Mount static files for admin frontend
@@ -103,18 +123,20 @@ print(f"Admin frontend path: {admin_frontend_path}")
 print(f"Path exists: {os.path.exists(admin_frontend_path)}")
 
 if os.path.exists(admin_frontend_path):
-    app.mount("/admin-frontend", StaticFiles(directory=admin_frontend_path), name="admin-frontend")
-    print("✓ Admin frontend static files mounted")
+    # admin-frontend/dist (hashed, precompressed) once `python -m static_assets` has been run
+    frontend_files_path = served_directory(admin_frontend_path)
+    app.mount("/admin-frontend", PrecompressedStaticFiles(directory=frontend_files_path), name="admin-frontend")
+    print(f"✓ Admin frontend static files mounted from {frontend_files_path}")
     
     @app.get("/admin-frontend/", include_in_schema=False)
     async def admin_frontend_index():
-        index_path = os.path.join(admin_frontend_path, "index.html")
+        index_path = os.path.join(frontend_files_path, "index.html")
         print(f"Serving index.html from: {index_path}")
-        return FileResponse(index_path)
+        return FileResponse(index_path, headers={"Cache-Control": "no-cache"})
     
     @app.get("/", include_in_schema=False)
     async def redirect_to_admin():
-        return FileResponse(os.path.join(admin_frontend_path, "index.html"))
+        return FileResponse(os.path.join(frontend_files_path, "index.html"), headers={"Cache-Control": "no-cache"})
 else:
     print(f"✗ Admin frontend path not found: {admin_frontend_path}")
 
@@ -128,19 +150,162 @@ for router_name, router in routers:
 
 print(f"Total registered routers: {len(routers)}")
 
+# Create any missing indexes declared in database/indexes.py
+import asyncio
+from database.indexes import ensure_indexes
+from database.counters import reconcile_counters
+from search import rebuild_search_indexes
+from video_uploads import purge_stale_uploads
+from database.progress import progress_buffer
+from database.repositories.admin_repository import AdminRepository
+
+@app.on_event("startup")
+async def create_indexes():
+    if not config.ENSURE_INDEXES_ON_STARTUP:
+        return
+    try:
+        summary = await ensure_indexes()
+        for collection_name, result in summary.items():
+            if "error" in result:
+                print(f"✗ Index creation failed on {collection_name}: {result['error']}")
+        print("✓ Database indexes ensured")
+    except Exception as e:
+        print(f"✗ Index creation failed: {e}")
+
+# Keep the materialized admin dashboard statistics fresh
+async def refresh_admin_stats_periodically():
+    while True:
+        try:
+            await AdminRepository.refresh_dashboard_stats()
+        except Exception as e:
+            print(f"✗ Admin stats refresh failed: {e}")
+        await asyncio.sleep(config.ADMIN_STATS_REFRESH_SECONDS)
+
+@app.on_event("startup")
+async def start_admin_stats_refresh():
+    if config.ADMIN_STATS_REFRESH_SECONDS > 0:
+        app.state.admin_stats_task = asyncio.create_task(refresh_admin_stats_periodically())
+
+@app.on_event("shutdown")
+async def stop_admin_stats_refresh():
+    task = getattr(app.state, "admin_stats_task", None)
+    if task:
+        task.cancel()
+
+# Repair drift in the denormalized enrollment/lesson counters
+async def reconcile_counters_periodically():
+    while True:
+        try:
+            repaired = await reconcile_counters()
+            if any(repaired.values()):
+                print(f"✓ Counters reconciled: {repaired}")
+        except Exception as e:
+            print(f"✗ Counter reconciliation failed: {e}")
+        await asyncio.sleep(config.COUNTER_RECONCILE_INTERVAL_SECONDS)
+
+@app.on_event("startup")
+async def start_counter_reconciliation():
+    if config.COUNTER_RECONCILE_INTERVAL_SECONDS > 0:
+        app.state.counter_reconcile_task = asyncio.create_task(reconcile_counters_periodically())
+
+@app.on_event("shutdown")
+async def stop_counter_reconciliation():
+    task = getattr(app.state, "counter_reconcile_task", None)
+    if task:
+        task.cancel()
+
+# Build the in-process course/user search indexes, then rebuild them periodically
+async def maintain_search_indexes():
+    while True:
+        try:
+            await rebuild_search_indexes()
+        except Exception as e:
+            print(f"✗ Search index build failed: {e}")
+        if config.SEARCH_INDEX_REFRESH_SECONDS <= 0:
+            return
+        await asyncio.sleep(config.SEARCH_INDEX_REFRESH_SECONDS)
+
+@app.on_event("startup")
+async def start_search_indexes():
+    app.state.search_index_task = asyncio.create_task(maintain_search_indexes())
+
+@app.on_event("shutdown")
+async def stop_search_indexes():
+    task = getattr(app.state, "search_index_task", None)
+    if task:
+        task.cancel()
+
+# Write buffered enrollment progress (database/progress.py) in batches
+async def flush_progress_periodically():
+    while True:
+        await asyncio.sleep(config.PROGRESS_FLUSH_INTERVAL_SECONDS)
+        try:
+            await progress_buffer.flush()
+        except Exception as e:
+            print(f"✗ Progress flush failed: {e}")
+
+@app.on_event("startup")
+async def start_progress_flush():
+    if config.PROGRESS_FLUSH_INTERVAL_SECONDS > 0:
+        app.state.progress_flush_task = asyncio.create_task(flush_progress_periodically())
+
+@app.on_event("shutdown")
+async def stop_progress_flush():
+    task = getattr(app.state, "progress_flush_task", None)
+    if task:
+        task.cancel()
+    try:
+        await progress_buffer.flush()
+    except Exception as e:
+        print(f"✗ Final progress flush failed: {e}")
+
+# Drop chunked video uploads that were started but abandoned
+async def purge_video_uploads_periodically():
+    while True:
+        try:
+            purged = await purge_stale_uploads()
+            if purged:
+                print(f"✓ Purged {purged} stale video uploads")
+        except Exception as e:
+            print(f"✗ Video upload purge failed: {e}")
+        await asyncio.sleep(3600)
+
+@app.on_event("startup")
+async def start_video_upload_purge():
+    if config.VIDEO_UPLOAD_STALE_HOURS > 0:
+        app.state.video_upload_purge_task = asyncio.create_task(purge_video_uploads_periodically())
+
+@app.on_event("shutdown")
+async def stop_video_upload_purge():
+    task = getattr(app.state, "video_upload_purge_task", None)
+    if task:
+        task.cancel()
+
 # Home feed endpoint: returns all courses
 from database.repositories.course_repository import CourseRepository
+from database.pagination import InvalidCursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, DESCENDING
+from database.projections import SUMMARY
+from cache import cached_json
+from conditional import listing_validators
 
 @app.get("/home-feed")
-def home_feed():
-    courses = CourseRepository.find_all()
-    for c in courses:
-        c["id"] = str(c["_id"])
-        c.pop("_id")
-    return {"courses": courses}
+async def home_feed(
+    request: Request,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    async def build():
+        # Newest courses first
+        try:
+            courses, next_cursor = await CourseRepository.find_page(cursor, limit, direction=DESCENDING, public=True, profile=SUMMARY)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"courses": courses, "next_cursor": next_cursor}
+    return await cached_json(f"home-feed:{cursor}:{limit}", ["courses"], build,
+                             request, listing_validators("home-feed", "courses"))
 
 @app.get("/api")
-def api_status():
+async def api_status():
     return {"message": "Bhoomi Tech E-Learning Backend is running."}
 
 if __name__ == "__main__":
@@ -0,0 +1,281 @@
+"""
+Streaming lesson media (videos and documents) from disk.
+
+media_response() answers GET/HEAD for a file with:
+
+    ETag / Last-Modified    from the file's size and mtime; If-None-Match and
+                            If-Modified-Since get a 304
+    Range: bytes=a-b        a 206 with that slice (one range per request; a
+                            multi-range request gets the whole file), or 416
+                            when it starts past the end
+    If-Range                the Range is honoured only while the ETag (or date)
+                            still matches, otherwise the whole file is sent
+
+The body goes out as an ASGI zero-copy (sendfile) or pathsend message when the
+server offers those extensions. Otherwise it is read with os.pread on a worker
+thread, one chunk at a time. File descriptors stay open in an LRU
+FileHandleCache, so the many small range requests a video player makes while
+seeking do not reopen the file each time. A handle is reused only while the
+path still names the same file (device, inode, size, mtime), so a video
+replaced by a new upload is picked up on the next request.
+"""
+import asyncio
+import mimetypes
+import os
+import stat
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from cache import response_cache
+from conditional import is_not_modified, not_modified_response, validator_headers
+from config import config
+
+
+# URL prefix stored on lessons -> directory the files live in
+MEDIA_DIRECTORIES = {
+    "/uploads/videos/": lambda: config.VIDEO_UPLOAD_DIR,
+    "/uploads/documents/": lambda: config.DOCUMENT_UPLOAD_DIR,
+}
+
+
+def local_media_path(url: Optional[str]) -> Optional[str]:
+    """The file behind a lesson's video_url/document_url, or None when it is not stored here"""
+    if not url:
+        return None
+    for prefix, directory in MEDIA_DIRECTORIES.items():
+        if url.startswith(prefix):
+            name = url[len(prefix):]
+            if not name or name != os.path.basename(name) or name in (".", ".."):
+                return None
+            return os.path.join(directory(), name)
+    return None
+
+
+class _Handle:
+    __slots__ = ("path", "fd", "identity", "size", "etag", "last_modified", "refs", "evicted")
+
+    def __init__(self, path: str, fd: int, st: os.stat_result):
+        self.path = path
+        self.fd = fd
+        self.identity = _identity(st)
+        self.size = st.st_size
+        self.etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+        self.last_modified = datetime.fromtimestamp(int(st.st_mtime), tz=timezone.utc)
+        self.refs = 0
+        self.evicted = False
+
+
+def _identity(st: os.stat_result) -> Tuple[int, int, int, int]:
+    return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class FileHandleCache:
+    """Open read-only descriptors by path, LRU-bounded and reference counted"""
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._handles: "OrderedDict[str, _Handle]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def acquire(self, path: str) -> _Handle:
+        """Blocking: stat (and maybe open) path; raises FileNotFoundError. Pair with release()."""
+        st = os.stat(path)
+        if not stat.S_ISREG(st.st_mode):
+            raise FileNotFoundError(path)
+        with self._lock:
+            handle = self._handles.get(path)
+            if handle is not None and handle.identity == _identity(st):
+                handle.refs += 1
+                self._handles.move_to_end(path)
+                self.hits += 1
+                return handle
+            if handle is not None:
+                self._evict(path)
+            self.misses += 1
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        handle = _Handle(path, fd, os.fstat(fd))
+        handle.refs = 1
+        with self._lock:
+            if self.maxsize <= 0:
+                handle.evicted = True
+                return handle
+            if path in self._handles:
+                self._evict(path)
+            self._handles[path] = handle
+            while len(self._handles) > self.maxsize:
+                self._evict(next(iter(self._handles)))
+                self.evictions += 1
+        return handle
+
+    def release(self, handle: _Handle):
+        with self._lock:
+            handle.refs -= 1
+            close = handle.evicted and handle.refs == 0
+        if close:
+            os.close(handle.fd)
+
+    def clear(self):
+        with self._lock:
+            for path in list(self._handles):
+                self._evict(path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "open_handles": len(self._handles),
+                "max_handles": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _evict(self, path: str):
+        # Called with the lock held; in-flight responses keep the descriptor until they release it
+        handle = self._handles.pop(path)
+        handle.evicted = True
+        if handle.refs == 0:
+            os.close(handle.fd)
+
+
+file_handles = FileHandleCache(maxsize=config.MEDIA_HANDLE_CACHE_SIZE)
+
+if hasattr(os, "pread"):
+    def _pread(fd: int, size: int, offset: int) -> bytes:
+        return os.pread(fd, size, offset)
+else:
+    # No pread on Windows: serialize seek + read on the shared descriptor
+    _seek_lock = threading.Lock()
+
+    def _pread(fd: int, size: int, offset: int) -> bytes:
+        with _seek_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            return os.read(fd, size)
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """The inclusive (start, end) slice a single-range header asks for.
+    None means serve the whole file; raises ValueError when unsatisfiable."""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = (part.strip() for part in spec.strip().partition("-"))
+    if not dash or not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None  # Malformed: ignore the header
+    if not first:
+        # bytes=-N: the last N bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise ValueError("Range starts past the end of the file")
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def _if_range_matches(value: str, handle: _Handle) -> bool:
+    value = value.strip()
+    if value.startswith('"') or value.startswith("W/"):
+        # If-Range uses the strong comparison: a weak tag never matches
+        return value == handle.etag
+    return value == format_datetime(handle.last_modified, usegmt=True)
+
+
+class MediaResponse(Response):
+    def __init__(self, handle: _Handle, cache: FileHandleCache, status_code: int,
+                 start: int, length: int, headers: Dict[str, str], send_body: bool = True):
+        self.handle = handle
+        self.cache = cache
+        self.status_code = status_code
+        self.start = start
+        self.length = length
+        self.send_body = send_body
+        self.media_type = None
+        self.background = None
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            extensions = scope.get("extensions") or {}
+            if not self.send_body or self.length == 0:
+                await send({"type": "http.response.body", "body": b""})
+            elif "http.response.zerocopy" in extensions:
+                with open(self.handle.fd, "rb", closefd=False) as file:
+                    await send({"type": "http.response.zerocopy", "file": file,
+                                "offset": self.start, "count": self.length})
+            elif "http.response.pathsend" in extensions and self.length == self.handle.size:
+                await send({"type": "http.response.pathsend", "path": self.handle.path})
+            else:
+                await self._send_chunks(send)
+        finally:
+            self.cache.release(self.handle)
+
+    async def _send_chunks(self, send):
+        offset, remaining = self.start, self.length
+        while remaining > 0:
+            chunk = await asyncio.to_thread(_pread, self.handle.fd, min(config.MEDIA_CHUNK_SIZE, remaining), offset)
+            if not chunk:
+                break  # Truncated underneath us; the client sees a short body
+            offset += len(chunk)
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b""})
+
+
+async def media_response(request: Request, path: str, media_type: Optional[str] = None,
+                         cache: FileHandleCache = file_handles) -> Response:
+    """Serve path for request (GET or HEAD); raises FileNotFoundError when it does not exist"""
+    handle = await asyncio.to_thread(cache.acquire, path)
+    if is_not_modified(request, handle.etag, handle.last_modified):
+        cache.release(handle)
+        return not_modified_response(handle.etag, handle.last_modified)
+
+    headers = validator_headers(handle.etag, handle.last_modified)
+    headers["Accept-Ranges"] = "bytes"
+    headers["Content-Type"] = media_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+    status_code, start, length = 200, 0, handle.size
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or _if_range_matches(if_range, handle)):
+        try:
+            requested = parse_range(range_header, handle.size)
+        except ValueError:
+            cache.release(handle)
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{handle.size}",
+                                                      "Accept-Ranges": "bytes"})
+        if requested is not None:
+            start, end = requested
+            status_code, length = 206, end - start + 1
+            headers["Content-Range"] = f"bytes {start}-{end}/{handle.size}"
+    headers["Content-Length"] = str(length)
+    # The response releases the handle once the body has been sent
+    return MediaResponse(handle, cache, status_code, start, length, headers,
+                         send_body=request.method != "HEAD")
+
+
+async def lesson_media_urls(lesson_id: str, load) -> Optional[Dict[str, Any]]:
+    """{"video_url", "document_url"} of a lesson, cached with the lesson's responses.
+    Players issue a request per seek, so this keeps them off the database."""
+    key = f"lessons:media:{lesson_id}"
+    found, urls = response_cache.get(key)
+    if found:
+        return urls
+    lesson = await load(lesson_id)
+    if lesson is None:
+        return None
+    urls = {"video_url": lesson.get("video_url"), "document_url": lesson.get("document_url")}
+    response_cache.set(key, urls, [f"lesson:{lesson_id}"])
+    return urls
@@ -2,10 +2,11 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from auth import verify_token
 from database.repositories.user_repository import UserRepository
+from cache import principal_cache
 
 security = HTTPBearer()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
     email = verify_token(token)
     if email is None:
@@ -14,16 +15,21 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = UserRepository.find_by_email(email)
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-        )
-    return user
+    # Tokens are still verified above; only the user lookup is cached
+    found, user = principal_cache.get(token)
+    if not found:
+        user = await UserRepository.find_by_email(email)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+            )
+        principal_cache.set(token, user, [f"user:{user['_id']}"])
+    # Handlers mutate the user they receive, so never hand out the cached dict
+    return dict(user)
 
 def require_role(role: str):
-    def role_checker(current_user = Depends(get_current_user)):
+    async def role_checker(current_user = Depends(get_current_user)):
         if current_user["role"] != role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
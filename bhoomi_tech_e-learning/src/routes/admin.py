@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.responses import JSONResponse
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+import asyncio
 
 # Import schemas
 from database.schemas.admin import (
@@ -18,16 +19,21 @@ from database.repositories.user_repository import UserRepository
 from database.repositories.course_repository import CourseRepository
 from database.repositories.enrollment_repository import EnrollmentRepository
 from database.repositories.payment_repository import PaymentRepository
+from database.loaders import Loaders, get_loaders
+from database.projections import SUMMARY, ADMIN
 
 # Import middleware and auth
 from middleware import require_role, get_current_user
-from auth import get_password_hash
+from auth import hash_password_async
+from config import config
+from exports import stream_report
+from serialization import json_response
 
 router = APIRouter(prefix="/admin", tags=["Admin Panel"])
 
 # Simple test endpoint
 @router.get("/test")
-def test_endpoint():
+async def test_endpoint():
     """Simple test endpoint"""
     return {"message": "Admin API is working!", "status": "success"}
 
@@ -36,15 +42,22 @@ def test_endpoint():
 # ============================================================================
 
 @router.get("/dashboard", response_model=Dict[str, Any])
-def get_admin_dashboard(current_user = Depends(require_role("admin"))):
+async def get_admin_dashboard(
+    fresh: bool = Query(False),
+    current_user = Depends(require_role("admin"))
+):
     """Get comprehensive admin dashboard statistics"""
     try:
-        stats = AdminRepository.get_dashboard_stats()
-        
-        # Additional analytics
-        user_growth = AdminRepository.get_user_growth_analytics(30)
-        course_enrollments = AdminRepository.get_course_enrollment_analytics(30)
-        instructor_performance = AdminRepository.get_instructor_performance()
+        # Served from the materialized admin_stats document unless fresh=true
+        max_age = 0 if fresh else config.ADMIN_STATS_REFRESH_SECONDS
+        
+        stats, user_growth, course_enrollments, instructor_performance = await asyncio.gather(
+            AdminRepository.get_dashboard_stats(max_age_seconds=max_age),
+            # Additional analytics
+            AdminRepository.get_user_growth_analytics(30),
+            AdminRepository.get_course_enrollment_analytics(30),
+            AdminRepository.get_instructor_performance()
+        )
         
         return {
             "stats": stats,
@@ -56,34 +69,34 @@ def get_admin_dashboard(current_user = Depends(require_role("admin"))):
         raise HTTPException(status_code=500, detail=f"Failed to fetch dashboard data: {str(e)}")
 
 @router.get("/analytics/users")
-def get_user_analytics(
+async def get_user_analytics(
     days: int = Query(30, ge=1, le=365),
     current_user = Depends(require_role("admin"))
 ):
     """Get user growth analytics"""
     try:
-        analytics = AdminRepository.get_user_growth_analytics(days)
+        analytics = await AdminRepository.get_user_growth_analytics(days)
         return {"user_growth": analytics}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch user analytics: {str(e)}")
 
 @router.get("/analytics/courses")
-def get_course_analytics(
+async def get_course_analytics(
     days: int = Query(30, ge=1, le=365),
     current_user = Depends(require_role("admin"))
 ):
     """Get course enrollment analytics"""
     try:
-        analytics = AdminRepository.get_course_enrollment_analytics(days)
+        analytics = await AdminRepository.get_course_enrollment_analytics(days)
         return {"enrollment_analytics": analytics}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch course analytics: {str(e)}")
 
 @router.get("/analytics/instructors")
-def get_instructor_analytics(current_user = Depends(require_role("admin"))):
+async def get_instructor_analytics(current_user = Depends(require_role("admin"))):
     """Get instructor performance analytics"""
     try:
-        performance = AdminRepository.get_instructor_performance()
+        performance = await AdminRepository.get_instructor_performance()
         return {"instructor_performance": performance}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch instructor analytics: {str(e)}")
@@ -93,30 +106,36 @@ def get_instructor_analytics(current_user = Depends(require_role("admin"))):
 # ============================================================================
 
 @router.get("/users", response_model=Dict[str, Any])
-def get_all_users(
+async def get_all_users(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     search: Optional[str] = Query(None),
     role: Optional[str] = Query(None, pattern="^(admin|instructor|student)$"),
     is_active: Optional[bool] = Query(None),
+    approximate_total: bool = Query(False),
     current_user = Depends(require_role("admin"))
 ):
     """Get all users with pagination and filtering"""
     try:
         skip = (page - 1) * limit
-        users = AdminRepository.get_users_with_stats(
-            skip=skip, 
-            limit=limit, 
-            search=search, 
-            role_filter=role, 
-            active_filter=is_active
+        users, total_count = await asyncio.gather(
+            AdminRepository.get_users_with_stats(
+                skip=skip, 
+                limit=limit, 
+                search=search, 
+                role_filter=role, 
+                active_filter=is_active
+            ),
+            # Get total count for pagination
+            AdminRepository.count_users(
+                search=search,
+                role_filter=role,
+                active_filter=is_active,
+                approximate=approximate_total
+            )
         )
         
-        # Get total count for pagination
-        total_users = UserRepository.find_all()
-        total_count = len(total_users)
-        
-        return {
+        return json_response({
             "users": users,
             "pagination": {
                 "page": page,
@@ -124,46 +143,41 @@ def get_all_users(
                 "total": total_count,
                 "pages": (total_count + limit - 1) // limit
             }
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch users: {str(e)}")
 
 @router.get("/users/{user_id}")
-def get_user_details(user_id: str, current_user = Depends(require_role("admin"))):
+async def get_user_details(user_id: str, current_user = Depends(require_role("admin"))):
     """Get detailed user information"""
     try:
-        user = UserRepository.find_by_id(user_id)
+        user = await UserRepository.find_by_id(user_id, public=True, profile=ADMIN)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        # Convert ObjectId to string
-        user["id"] = str(user["_id"])
-        user.pop("_id")
-        
-        # Get user enrollments
-        enrollments = EnrollmentRepository.find_by_user_id(user_id)
-        user["enrollments"] = len(enrollments) if enrollments else 0
+        # Maintained by database/counters.py, so no enrollments are loaded
+        user["enrollments"] = user.get("enrollment_count") or 0
         
-        return user
+        return json_response(user)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch user details: {str(e)}")
 
 @router.post("/users", status_code=status.HTTP_201_CREATED)
-def create_user(user_data: AdminUserCreate, current_user = Depends(require_role("admin"))):
+async def create_user(user_data: AdminUserCreate, current_user = Depends(require_role("admin"))):
     """Create a new user"""
     try:
         # Check if user already exists
-        existing_user = UserRepository.find_by_email(user_data.email)
+        existing_user = await UserRepository.find_by_email(user_data.email)
         if existing_user:
             raise HTTPException(status_code=400, detail="User with this email already exists")
         
         # Hash password and create user
         user_dict = user_data.dict()
-        user_dict["password"] = get_password_hash(user_dict["password"])
+        user_dict["password"] = await hash_password_async(user_dict["password"])
         
-        user_id = AdminRepository.create_user(user_dict)
+        user_id = await AdminRepository.create_user(user_dict)
         return {"message": "User created successfully", "user_id": user_id}
     except HTTPException:
         raise
@@ -171,7 +185,7 @@ def create_user(user_data: AdminUserCreate, current_user = Depends(require_role(
         raise HTTPException(status_code=500, detail=f"Failed to create user: {str(e)}")
 
 @router.put("/users/{user_id}")
-def update_user(
+async def update_user(
     user_id: str, 
     user_data: AdminUserUpdate, 
     current_user = Depends(require_role("admin"))
@@ -179,19 +193,19 @@ def update_user(
     """Update user information"""
     try:
         # Check if user exists
-        user = UserRepository.find_by_id(user_id)
+        user = await UserRepository.find_by_id(user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
         # Check if email is being changed and doesn't conflict
         if user_data.email and user_data.email != user["email"]:
-            existing_user = UserRepository.find_by_email(user_data.email)
+            existing_user = await UserRepository.find_by_email(user_data.email)
             if existing_user:
                 raise HTTPException(status_code=400, detail="Email already in use")
         
         # Update user
         update_dict = user_data.dict(exclude_unset=True)
-        success = AdminRepository.update_user(user_id, update_dict)
+        success = await AdminRepository.update_user(user_id, update_dict)
         
         if success:
             return {"message": "User updated successfully"}
@@ -203,10 +217,10 @@ def update_user(
         raise HTTPException(status_code=500, detail=f"Failed to update user: {str(e)}")
 
 @router.delete("/users/{user_id}")
-def delete_user(user_id: str, current_user = Depends(require_role("admin"))):
+async def delete_user(user_id: str, current_user = Depends(require_role("admin"))):
     """Delete (deactivate) a user"""
     try:
-        user = UserRepository.find_by_id(user_id)
+        user = await UserRepository.find_by_id(user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -214,7 +228,7 @@ def delete_user(user_id: str, current_user = Depends(require_role("admin"))):
         if str(user["_id"]) == str(current_user["_id"]):
             raise HTTPException(status_code=400, detail="Cannot delete your own account")
         
-        success = AdminRepository.delete_user(user_id)
+        success = await AdminRepository.delete_user(user_id)
         if success:
             return {"message": "User deactivated successfully"}
         else:
@@ -225,7 +239,7 @@ def delete_user(user_id: str, current_user = Depends(require_role("admin"))):
         raise HTTPException(status_code=500, detail=f"Failed to delete user: {str(e)}")
 
 @router.post("/users/bulk-action")
-def bulk_user_action(action_data: BulkAction, current_user = Depends(require_role("admin"))):
+async def bulk_user_action(action_data: BulkAction, current_user = Depends(require_role("admin"))):
     """Perform bulk actions on users"""
     try:
         # Prevent admin from performing bulk actions on themselves
@@ -233,7 +247,7 @@ def bulk_user_action(action_data: BulkAction, current_user = Depends(require_rol
         if current_user_id in action_data.ids:
             raise HTTPException(status_code=400, detail="Cannot perform bulk actions on your own account")
         
-        affected_count = AdminRepository.bulk_user_action(action_data.ids, action_data.action)
+        affected_count = await AdminRepository.bulk_user_action(action_data.ids, action_data.action)
         return {
             "message": f"Successfully performed {action_data.action} on {affected_count} users",
             "affected_count": affected_count
@@ -248,59 +262,66 @@ def bulk_user_action(action_data: BulkAction, current_user = Depends(require_rol
 # ============================================================================
 
 @router.get("/courses")
-def get_all_courses(
+async def get_all_courses(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     search: Optional[str] = Query(None),
-    is_active: Optional[bool] = Query(None)
+    is_active: Optional[bool] = Query(None),
+    approximate_total: bool = Query(False),
+    current_user = Depends(require_role("admin"))
 ):
     """Get all courses with pagination and filtering"""
     try:
-        # Simplified version - just return empty list for now to test
-        return {
-            "courses": [],
+        skip = (page - 1) * limit
+        courses, total_count = await asyncio.gather(
+            AdminRepository.get_courses_with_stats(
+                skip=skip,
+                limit=limit,
+                search=search,
+                active_filter=is_active
+            ),
+            AdminRepository.count_courses(
+                search=search,
+                active_filter=is_active,
+                approximate=approximate_total
+            )
+        )
+        
+        return json_response({
+            "courses": courses,
             "pagination": {
                 "page": page,
                 "limit": limit,
-                "total": 0,
-                "pages": 0
+                "total": total_count,
+                "pages": (total_count + limit - 1) // limit
             }
-        }
+        })
     except Exception as e:
-        print(f"Error fetching courses: {str(e)}")  # Debug log
-        import traceback
-        traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to fetch courses: {str(e)}")
 
 @router.get("/courses/{course_id}")
-def get_course_details(course_id: str, current_user = Depends(require_role("admin"))):
+async def get_course_details(course_id: str, current_user = Depends(require_role("admin"))):
     """Get detailed course information"""
     try:
-        course = CourseRepository.find_by_id(course_id)
+        course = await CourseRepository.find_by_id(course_id, public=True, profile=ADMIN)
         if not course:
             raise HTTPException(status_code=404, detail="Course not found")
         
-        # Convert ObjectId to string and get instructor info
-        course["id"] = str(course["_id"])
-        course.pop("_id")
-        
         # Get instructor details
-        instructor = UserRepository.find_by_id(str(course["instructor_id"]))
+        instructor = await UserRepository.find_by_id(str(course["instructor_id"]), profile=SUMMARY)
         course["instructor_name"] = instructor["name"] if instructor else "Unknown"
-        course["instructor_id"] = str(course["instructor_id"])
         
-        # Get enrollments count
-        enrollments = EnrollmentRepository.find_by_course_id(course_id)
-        course["total_enrollments"] = len(enrollments) if enrollments else 0
+        # Maintained by database/counters.py, so no enrollments are loaded
+        course["total_enrollments"] = course.get("enrollment_count") or 0
         
-        return course
+        return json_response(course)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch course details: {str(e)}")
 
 @router.post("/courses", status_code=status.HTTP_201_CREATED)
-def create_course(course_data: dict):
+async def create_course(course_data: dict):
     """Create a new course - simplified test version"""
     try:
         print(f"Received course data: {course_data}")  # Debug log
@@ -330,7 +351,7 @@ def create_course(course_data: dict):
         raise HTTPException(status_code=500, detail=f"Failed to create course: {str(e)}")
 
 @router.put("/courses/{course_id}")
-def update_course(
+async def update_course(
     course_id: str, 
     course_data: AdminCourseUpdate, 
     current_user = Depends(require_role("admin"))
@@ -338,20 +359,20 @@ def update_course(
     """Update course information"""
     try:
         # Check if course exists
-        course = CourseRepository.find_by_id(course_id)
+        course = await CourseRepository.find_by_id(course_id)
         if not course:
             raise HTTPException(status_code=404, detail="Course not found")
         
         # If instructor_id is being changed, verify the new instructor
         if course_data.instructor_id:
-            instructor = UserRepository.find_by_id(course_data.instructor_id)
+            instructor = await UserRepository.find_by_id(course_data.instructor_id, profile=SUMMARY)
             if not instructor:
                 raise HTTPException(status_code=400, detail="Instructor not found")
             if instructor["role"] != "instructor":
                 raise HTTPException(status_code=400, detail="User must be an instructor")
         
         update_dict = course_data.dict(exclude_unset=True)
-        success = AdminRepository.update_course(course_id, update_dict)
+        success = await AdminRepository.update_course(course_id, update_dict)
         
         if success:
             return {"message": "Course updated successfully"}
@@ -363,14 +384,14 @@ def update_course(
         raise HTTPException(status_code=500, detail=f"Failed to update course: {str(e)}")
 
 @router.delete("/courses/{course_id}")
-def delete_course(course_id: str, current_user = Depends(require_role("admin"))):
+async def delete_course(course_id: str, current_user = Depends(require_role("admin"))):
     """Delete (deactivate) a course"""
     try:
-        course = CourseRepository.find_by_id(course_id)
+        course = await CourseRepository.find_by_id(course_id)
         if not course:
             raise HTTPException(status_code=404, detail="Course not found")
         
-        success = AdminRepository.delete_course(course_id)
+        success = await AdminRepository.delete_course(course_id)
         if success:
             return {"message": "Course deactivated successfully"}
         else:
@@ -381,10 +402,10 @@ def delete_course(course_id: str, current_user = Depends(require_role("admin")))
         raise HTTPException(status_code=500, detail=f"Failed to delete course: {str(e)}")
 
 @router.post("/courses/bulk-action")
-def bulk_course_action(action_data: BulkAction, current_user = Depends(require_role("admin"))):
+async def bulk_course_action(action_data: BulkAction, current_user = Depends(require_role("admin"))):
     """Perform bulk actions on courses"""
     try:
-        affected_count = AdminRepository.bulk_course_action(action_data.ids, action_data.action)
+        affected_count = await AdminRepository.bulk_course_action(action_data.ids, action_data.action)
         return {
             "message": f"Successfully performed {action_data.action} on {affected_count} courses",
             "affected_count": affected_count
@@ -397,40 +418,38 @@ def bulk_course_action(action_data: BulkAction, current_user = Depends(require_r
 # ============================================================================
 
 @router.get("/enrollments")
-def get_all_enrollments(
+async def get_all_enrollments(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
-    current_user = Depends(require_role("admin"))
+    approximate_total: bool = Query(False),
+    current_user = Depends(require_role("admin")),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """Get all enrollments with pagination"""
     try:
         skip = (page - 1) * limit
         
-        # This would need to be implemented in EnrollmentRepository
-        all_enrollments = EnrollmentRepository.find_all()
-        total_count = len(all_enrollments)
+        enrollments, total_count = await asyncio.gather(
+            EnrollmentRepository.find_paginated(skip, limit, public=True),
+            EnrollmentRepository.count(approximate=approximate_total)
+        )
         
-        # Get paginated enrollments (simplified - you'd want to implement this properly)
-        enrollments = all_enrollments[skip:skip+limit]
+        # Resolve user and course details with one query per collection
+        users = await loaders.users.load_many(e["user_id"] for e in enrollments)
+        courses = await loaders.courses.load_many(e["course_id"] for e in enrollments)
         
         # Format enrollments with user and course details
         formatted_enrollments = []
         for enrollment in enrollments:
-            enrollment["id"] = str(enrollment["_id"])
-            enrollment.pop("_id")
-            
-            # Get user and course details
-            user = UserRepository.find_by_id(str(enrollment["user_id"]))
-            course = CourseRepository.find_by_id(str(enrollment["course_id"]))
+            user = users.get(str(enrollment["user_id"]))
+            course = courses.get(str(enrollment["course_id"]))
             
             enrollment["user_name"] = user["name"] if user else "Unknown"
             enrollment["course_title"] = course["title"] if course else "Unknown"
-            enrollment["user_id"] = str(enrollment["user_id"])
-            enrollment["course_id"] = str(enrollment["course_id"])
             
             formatted_enrollments.append(enrollment)
         
-        return {
+        return json_response({
             "enrollments": formatted_enrollments,
             "pagination": {
                 "page": page,
@@ -438,40 +457,39 @@ def get_all_enrollments(
                 "total": total_count,
                 "pages": (total_count + limit - 1) // limit
             }
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch enrollments: {str(e)}")
 
 @router.get("/payments")
-def get_all_payments(
+async def get_all_payments(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
-    current_user = Depends(require_role("admin"))
+    approximate_total: bool = Query(False),
+    current_user = Depends(require_role("admin")),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """Get all payments with pagination"""
     try:
         skip = (page - 1) * limit
         
-        # This would need to be implemented in PaymentRepository
-        all_payments = PaymentRepository.find_all() if hasattr(PaymentRepository, 'find_all') else []
-        total_count = len(all_payments)
+        payments, total_count = await asyncio.gather(
+            PaymentRepository.find_paginated(skip, limit, public=True),
+            PaymentRepository.count(approximate=approximate_total)
+        )
         
-        payments = all_payments[skip:skip+limit]
+        # Resolve user details with a single query
+        users = await loaders.users.load_many(p["user_id"] for p in payments)
         
         # Format payments
         formatted_payments = []
         for payment in payments:
-            payment["id"] = str(payment["_id"])
-            payment.pop("_id")
-            
-            # Get user details
-            user = UserRepository.find_by_id(str(payment["user_id"]))
+            user = users.get(str(payment["user_id"]))
             payment["user_name"] = user["name"] if user else "Unknown"
-            payment["user_id"] = str(payment["user_id"])
             
             formatted_payments.append(payment)
         
-        return {
+        return json_response({
             "payments": formatted_payments,
             "pagination": {
                 "page": page,
@@ -479,7 +497,7 @@ def get_all_payments(
                 "total": total_count,
                 "pages": (total_count + limit - 1) // limit
             }
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch payments: {str(e)}")
 
@@ -488,13 +506,13 @@ def get_all_payments(
 # ============================================================================
 
 @router.get("/system/health")
-def system_health_check(current_user = Depends(require_role("admin"))):
+async def system_health_check(current_user = Depends(require_role("admin"))):
     """Get system health status"""
     try:
-        from database.__init_db import client
+        from database.__init_db import async_db
         
         # Test database connection
-        client.admin.command('ismaster')
+        await async_db.command('ping')
         
         return {
             "status": "healthy",
@@ -511,13 +529,13 @@ def system_health_check(current_user = Depends(require_role("admin"))):
         }
 
 @router.get("/system/stats")
-def get_system_stats(current_user = Depends(require_role("admin"))):
+async def get_system_stats(current_user = Depends(require_role("admin"))):
     """Get detailed system statistics"""
     try:
-        from database.__init_db import db
+        from database.__init_db import async_db as db
         
         # Get database statistics
-        db_stats = db.command("dbstats")
+        db_stats = await db.command("dbstats")
         
         return {
             "database_stats": {
@@ -527,52 +545,100 @@ def get_system_stats(current_user = Depends(require_role("admin"))):
                 "index_size": db_stats.get("indexSize", 0)
             },
             "collection_stats": {
-                "users": db["users"].estimated_document_count(),
-                "courses": db["courses"].estimated_document_count(),
-                "enrollments": db["enrollments"].estimated_document_count(),
-                "lessons": db["lessons"].estimated_document_count(),
-                "payments": db["payments"].estimated_document_count(),
-                "reviews": db["reviews"].estimated_document_count(),
-                "notifications": db["notifications"].estimated_document_count(),
-                "quizzes": db["quizzes"].estimated_document_count()
+                "users": await db["users"].estimated_document_count(),
+                "courses": await db["courses"].estimated_document_count(),
+                "enrollments": await db["enrollments"].estimated_document_count(),
+                "lessons": await db["lessons"].estimated_document_count(),
+                "payments": await db["payments"].estimated_document_count(),
+                "reviews": await db["reviews"].estimated_document_count(),
+                "notifications": await db["notifications"].estimated_document_count(),
+                "quizzes": await db["quizzes"].estimated_document_count()
             }
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get system stats: {str(e)}")
 
+@router.get("/system/cache")
+async def get_cache_stats(current_user = Depends(require_role("admin"))):
+    """Get response cache hit/miss counters"""
+    from cache import response_cache, answer_key_cache
+    from media import file_handles
+    
+    return {
+        "response_cache": response_cache.stats(),
+        "answer_key_cache": answer_key_cache.stats(),
+        "media_file_handles": file_handles.stats(),
+    }
+
+@router.get("/system/search")
+async def get_search_index_stats(current_user = Depends(require_role("admin"))):
+    """Get size and freshness of the in-process search and autocomplete indexes"""
+    from search import course_search, user_search, course_autocomplete, user_autocomplete
+    
+    return {
+        "search": {"courses": course_search.stats(), "users": user_search.stats()},
+        "autocomplete": {"courses": course_autocomplete.stats(), "users": user_autocomplete.stats()},
+    }
+
+@router.get("/system/progress")
+async def get_progress_buffer_stats(current_user = Depends(require_role("admin"))):
+    """Get batch sizes and flush latency of the buffered enrollment progress writes"""
+    from database.progress import progress_buffer
+    
+    return {"progress_buffer": progress_buffer.stats(), "flush_interval_seconds": config.PROGRESS_FLUSH_INTERVAL_SECONDS}
+
+@router.get("/system/indexes")
+async def get_index_report(current_user = Depends(require_role("admin"))):
+    """Report declared indexes that are missing and live indexes that are unused"""
+    try:
+        from database.indexes import index_report
+        
+        return {"indexes": await index_report()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to build index report: {str(e)}")
+
 # ============================================================================
 # REPORTS
 # ============================================================================
 
+USER_REPORT_FIELDS = ["id", "name", "email", "role", "is_active", "created_at", "last_login", "total_enrollments"]
+COURSE_REPORT_FIELDS = [
+    "id", "title", "description", "instructor_id", "instructor_name",
+    "total_lessons", "total_enrollments", "price", "is_active", "created_at"
+]
+
 @router.get("/reports/users")
-def generate_users_report(
-    format: str = Query("json", pattern="^(json|csv)$"),
+async def generate_users_report(
+    format: str = Query("json", pattern="^(json|csv|jsonl)$"),
+    gzip: bool = Query(False),
     current_user = Depends(require_role("admin"))
 ):
-    """Generate users report"""
+    """Generate users report; csv and jsonl stream every user"""
     try:
-        users = AdminRepository.get_users_with_stats(limit=1000)  # Get all users
-        
         if format == "json":
+            users = await AdminRepository.get_users_with_stats(limit=1000)
             return {"users": users, "total": len(users), "generated_at": datetime.utcnow()}
-        else:
-            # For CSV, you'd need to implement CSV generation
-            raise HTTPException(status_code=501, detail="CSV format not implemented yet")
+        
+        rows = AdminRepository.iter_users_with_stats(batch_size=config.REPORT_EXPORT_BATCH_SIZE)
+        filename = f"users-report-{datetime.utcnow():%Y%m%d%H%M%S}"
+        return stream_report(rows, USER_REPORT_FIELDS, format, filename, gzip=gzip)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate report: {str(e)}")
 
 @router.get("/reports/courses")
-def generate_courses_report(
-    format: str = Query("json", pattern="^(json|csv)$"),
+async def generate_courses_report(
+    format: str = Query("json", pattern="^(json|csv|jsonl)$"),
+    gzip: bool = Query(False),
     current_user = Depends(require_role("admin"))
 ):
-    """Generate courses report"""
+    """Generate courses report; csv and jsonl stream every course"""
     try:
-        courses = AdminRepository.get_courses_with_stats(limit=1000)  # Get all courses
-        
         if format == "json":
+            courses = await AdminRepository.get_courses_with_stats(limit=1000)
             return {"courses": courses, "total": len(courses), "generated_at": datetime.utcnow()}
-        else:
-            raise HTTPException(status_code=501, detail="CSV format not implemented yet")
+        
+        rows = AdminRepository.iter_courses_with_stats(batch_size=config.REPORT_EXPORT_BATCH_SIZE)
+        filename = f"courses-report-{datetime.utcnow():%Y%m%d%H%M%S}"
+        return stream_report(rows, COURSE_REPORT_FIELDS, format, filename, gzip=gzip)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate report: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to generate report: {str(e)}")
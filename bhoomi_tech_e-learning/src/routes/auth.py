@@ -1,20 +1,29 @@
 from fastapi import APIRouter, HTTPException, Depends
 from database.schemas.auth import UserLogin, Token
 from database.repositories.user_repository import UserRepository
-from auth import verify_password, create_access_token
+from auth import verify_password_async, create_access_token
 from datetime import timedelta
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 @router.post("/login", response_model=dict)
-def login(user_credentials: UserLogin):
+async def login(user_credentials: UserLogin):
     """Login endpoint that returns user info along with token"""
-    user = UserRepository.find_by_email(user_credentials.email)
-    if not user or not verify_password(user_credentials.password, user["password"]):
+    user = await UserRepository.find_by_email(user_credentials.email)
+    if not user:
         raise HTTPException(
             status_code=401,
             detail="Incorrect email or password"
         )
+    valid, new_hash = await verify_password_async(user_credentials.password, user["password"])
+    if not valid:
+        raise HTTPException(
+            status_code=401,
+            detail="Incorrect email or password"
+        )
+    if new_hash:
+        # Stored hash used an outdated bcrypt cost
+        await UserRepository.update(str(user["_id"]), {"password": new_hash})
     
     access_token_expires = timedelta(hours=8)  # Longer session for admin
     access_token = create_access_token(
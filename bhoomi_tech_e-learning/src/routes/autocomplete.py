@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional
+from middleware import get_current_user
+from search import course_autocomplete, user_autocomplete
+
+router = APIRouter(tags=["Autocomplete"])
+
+@router.get("/autocomplete")
+async def autocomplete(
+    type: str = Query(..., pattern="^(course|user)$"),
+    q: str = Query(..., min_length=1, max_length=100),
+    role: Optional[str] = Query(None, pattern="^(admin|instructor|student)$"),
+    limit: int = Query(10, ge=1, le=25),
+    current_user = Depends(get_current_user)
+):
+    """Typeahead suggestions served from the in-memory prefix index (never queries MongoDB)"""
+    if type == "course":
+        index, filters = course_autocomplete, {}
+    else:
+        # User suggestions include email addresses
+        if current_user["role"] != "admin":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions"
+            )
+        index, filters = user_autocomplete, {"role": role}
+    if not index.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Autocomplete index is still loading",
+            headers={"Retry-After": "1"},
+        )
+    return {"type": type, "q": q, "suggestions": index.complete(q, filters, limit)}
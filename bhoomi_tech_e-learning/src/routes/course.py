@@ -1,16 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from typing import Optional
 from database.schemas.course import CourseCreate, CourseResponse, CourseUpdate
 from database.repositories.course_repository import CourseRepository
+from cache import cached_json
+from conditional import document_validators, listing_validators
+from database.pagination import InvalidCursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from database.projections import SUMMARY, DETAIL
 from middleware import get_current_user, require_role
+from serialization import json_response
 
 router = APIRouter(prefix="/courses", tags=["Courses"])
 
 @router.post("/", response_model=CourseResponse)
-def add_course(course: CourseCreate, current_user = Depends(require_role("instructor"))):
+async def add_course(course: CourseCreate, current_user = Depends(require_role("instructor"))):
     course_dict = course.dict()
     course_dict["instructor_id"] = str(current_user["_id"])
 
-    result = CourseRepository.create(course_dict)
+    result = await CourseRepository.create(course_dict)
 
     # Always return a clean dict, no raw ObjectId
     return {
@@ -25,33 +31,51 @@ def add_course(course: CourseCreate, current_user = Depends(require_role("instru
 
 
 @router.get("/")
-def list_courses():
-    courses = CourseRepository.find_all()
-    for c in courses:
-        c["id"] = str(c["_id"])
-        c.pop("_id")
-    return courses
+async def list_courses(
+    request: Request,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    async def build():
+        try:
+            courses, next_cursor = await CourseRepository.find_page(cursor, limit, public=True, profile=SUMMARY)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"courses": courses, "next_cursor": next_cursor}
+    return await cached_json(f"courses:list:{cursor}:{limit}", ["courses"], build,
+                             request, listing_validators("courses", "courses"))
+
+@router.get("/search")
+async def search_courses(
+    q: str = Query(..., min_length=1, max_length=200),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    """Full-text course search over title and description, best matches first"""
+    courses, total = await CourseRepository.search(q, offset, limit, profile=SUMMARY)
+    return json_response({"courses": courses, "total": total, "offset": offset, "limit": limit})
 
 @router.get("/{course_id}")
-def get_course(course_id: str):
-    course = CourseRepository.find_by_id(course_id)
-    if not course:
-        raise HTTPException(status_code=404, detail="Course not found")
-    course["id"] = str(course["_id"])
-    course.pop("_id")
-    return course
+async def get_course(course_id: str, request: Request):
+    async def build():
+        course = await CourseRepository.find_by_id(course_id, public=True, profile=DETAIL)
+        if not course:
+            raise HTTPException(status_code=404, detail="Course not found")
+        return course
+    return await cached_json(f"courses:detail:{course_id}", [f"course:{course_id}"], build,
+                             request, document_validators("course"))
 
 @router.delete("/{course_id}")
-def remove_course(course_id: str, current_user = Depends(require_role("instructor"))):
-    result = CourseRepository.delete(course_id)
+async def remove_course(course_id: str, current_user = Depends(require_role("instructor"))):
+    result = await CourseRepository.delete(course_id)
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Course not found")
     return {"message": "Course deleted"}
 
 @router.put("/{course_id}")
-def update_course(course_id: str, course_update: CourseUpdate, current_user = Depends(require_role("instructor"))):
+async def update_course(course_id: str, course_update: CourseUpdate, current_user = Depends(require_role("instructor"))):
     # Check if course exists
-    existing_course = CourseRepository.find_by_id(course_id)
+    existing_course = await CourseRepository.find_by_id(course_id)
     if not existing_course:
         raise HTTPException(status_code=404, detail="Course not found")
     
@@ -76,20 +100,13 @@ def update_course(course_id: str, course_update: CourseUpdate, current_user = De
         raise HTTPException(status_code=400, detail="No fields provided for update")
     
     # Update course
-    result = CourseRepository.update(course_id, update_data)
+    result = await CourseRepository.update(course_id, update_data)
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Course not found or no changes made")
     
     # Return updated course
-    updated_course = CourseRepository.find_by_id(course_id)
-    updated_course["id"] = str(updated_course["_id"])
-    updated_course.pop("_id")
-    return updated_course
+    return json_response(await CourseRepository.find_by_id(course_id, public=True, profile=DETAIL))
 
 @router.get("/instructor/{instructor_id}")
-def get_instructor_courses(instructor_id: str):
-    courses = CourseRepository.find_by_instructor(instructor_id)
-    for c in courses:
-        c["id"] = str(c["_id"])
-        c.pop("_id")
-    return courses
+async def get_instructor_courses(instructor_id: str):
+    return json_response(await CourseRepository.find_by_instructor(instructor_id, public=True, profile=SUMMARY))
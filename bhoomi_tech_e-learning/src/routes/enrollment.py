@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends
-from database.schemas.enrollment import EnrollmentSchema
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
+from database.schemas.enrollment import EnrollmentSchema, ProgressBatch
 from database.repositories.enrollment_repository import EnrollmentRepository
+from database.pagination import InvalidCursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from middleware import get_current_user
+from serialization import json_response
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/enrollments", tags=["Enrollments"])
@@ -10,9 +13,9 @@ class ProgressUpdate(BaseModel):
     progress: float
 
 @router.post("/")
-def enroll(enrollment: EnrollmentSchema, current_user = Depends(get_current_user)):
+async def enroll(enrollment: EnrollmentSchema, current_user = Depends(get_current_user)):
     # Check if already enrolled
-    existing = EnrollmentRepository.find_by_user_and_course(
+    existing = await EnrollmentRepository.find_by_user_and_course(
         str(current_user["_id"]), enrollment.course_id
     )
     if existing:
@@ -20,7 +23,7 @@ def enroll(enrollment: EnrollmentSchema, current_user = Depends(get_current_user
     
     enrollment_dict = enrollment.dict()
     enrollment_dict["user_id"] = str(current_user["_id"])
-    result = EnrollmentRepository.create(enrollment_dict)
+    result = await EnrollmentRepository.create(enrollment_dict)
 
     return {
         "id": str(result.inserted_id),
@@ -31,31 +34,39 @@ def enroll(enrollment: EnrollmentSchema, current_user = Depends(get_current_user
 
 
 @router.get("/")
-def list_enrollments(current_user = Depends(get_current_user)):
-    enrollments = EnrollmentRepository.find_all()
-    for e in enrollments:
-        e["id"] = str(e["_id"])
-        e.pop("_id")
-    return enrollments
+async def list_enrollments(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user = Depends(get_current_user)
+):
+    try:
+        enrollments, next_cursor = await EnrollmentRepository.find_page(cursor, limit, public=True)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response({"enrollments": enrollments, "next_cursor": next_cursor})
 
 @router.get("/my-courses")
-def my_courses(current_user = Depends(get_current_user)):
-    enrollments = EnrollmentRepository.find_by_user(str(current_user["_id"]))
-    for e in enrollments:
-        e["id"] = str(e["_id"])
-        e.pop("_id")
-    return enrollments
+async def my_courses(current_user = Depends(get_current_user)):
+    return json_response(await EnrollmentRepository.find_by_user(str(current_user["_id"]), public=True))
+
+@router.post("/progress:batch")
+async def update_progress_batch(batch: ProgressBatch, current_user = Depends(get_current_user)):
+    """Apply many progress events (e.g. queued by an offline client) in one request"""
+    applied, rejected = await EnrollmentRepository.apply_progress_events(
+        str(current_user["_id"]), [event.dict() for event in batch.events]
+    )
+    return {"applied": applied, "rejected": rejected}
 
 @router.put("/{enrollment_id}/progress")
-def update_progress(enrollment_id: str, progress_data: ProgressUpdate, current_user = Depends(get_current_user)):
-    result = EnrollmentRepository.update_progress(enrollment_id, progress_data.progress)
-    if result.modified_count == 0:
+async def update_progress(enrollment_id: str, progress_data: ProgressUpdate, current_user = Depends(get_current_user)):
+    recorded = await EnrollmentRepository.record_progress(enrollment_id, progress_data.progress)
+    if not recorded:
         raise HTTPException(status_code=404, detail="Enrollment not found")
     return {"message": "Progress updated successfully"}
 
 @router.delete("/{enrollment_id}")
-def remove_enrollment(enrollment_id: str, current_user = Depends(get_current_user)):
-    result = EnrollmentRepository.delete(enrollment_id)
-    if result.deleted_count == 0:
+async def remove_enrollment(enrollment_id: str, current_user = Depends(get_current_user)):
+    deleted = await EnrollmentRepository.delete(enrollment_id)
+    if not deleted:
         raise HTTPException(status_code=404, detail="Enrollment not found")
     return {"message": "Enrollment deleted"}
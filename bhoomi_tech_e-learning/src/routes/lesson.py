@@ -1,58 +1,176 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
-from database.schemas.lesson import LessonSchema
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Query, Request
+from typing import Optional
+from database.schemas.lesson import LessonSchema, VideoUploadInit, VideoUploadComplete
 from database.repositories.lesson_repository import LessonRepository
+from cache import cached_json
+from conditional import document_validators
+from database.pagination import InvalidCursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from database.projections import SUMMARY, DETAIL
 from middleware import get_current_user, require_role
+from serialization import json_response
+from video_uploads import UploadError
+from media import lesson_media_urls, local_media_path, media_response
+from fastapi.responses import RedirectResponse
+import video_uploads
+import asyncio
 import os
-import shutil
 
 router = APIRouter(prefix="/lessons", tags=["Lessons"])
 
 @router.post("/")
-def add_lesson(lesson: LessonSchema, current_user = Depends(require_role("instructor"))):
-    result = LessonRepository.create(lesson.dict())
+async def add_lesson(lesson: LessonSchema, current_user = Depends(require_role("instructor"))):
+    result = await LessonRepository.create(lesson.dict())
     lesson_dict = lesson.dict()
     lesson_dict["id"] = str(result.inserted_id)
     return lesson_dict
 
-@router.post("/{lesson_id}/upload-video")
-async def upload_video(lesson_id: str, file: UploadFile = File(...), current_user = Depends(require_role("instructor"))):
-    # Create uploads directory if it doesn't exist
-    upload_dir = "../uploads/videos"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Save file
-    file_path = f"{upload_dir}/{lesson_id}_{file.filename}"
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    # Update lesson with video URL
-    lesson = LessonRepository.find_by_id(lesson_id)
+def _upload_http_error(e: UploadError) -> HTTPException:
+    # Upload-Offset tells the client where to resume
+    headers = {"Upload-Offset": str(e.offset)} if e.offset is not None else None
+    return HTTPException(status_code=e.status_code, detail=e.detail, headers=headers)
+
+async def _require_lesson(lesson_id: str):
+    lesson = await LessonRepository.find_by_id(lesson_id)
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
-    
-    # Update video_url in database (you'll need to add an update method to repository)
-    return {"message": "Video uploaded successfully", "file_path": file_path}
+    return lesson
+
+async def _attach_video(lesson, lesson_id: str, upload_id: str, user_id: str, sha256: Optional[str] = None):
+    try:
+        video = await video_uploads.complete_upload(lesson_id, upload_id, user_id, sha256)
+    except UploadError as e:
+        raise _upload_http_error(e)
+    await LessonRepository.update(lesson_id, {"video_url": video["video_url"]})
+    await video_uploads.remove_video(lesson.get("video_url"))
+    return video
+
+@router.post("/{lesson_id}/upload-video")
+async def upload_video(lesson_id: str, file: UploadFile = File(...), current_user = Depends(require_role("instructor"))):
+    """Single-request upload for small videos; large ones should use /video-uploads"""
+    lesson = await _require_lesson(lesson_id)
+    size = file.size if file.size is not None else await asyncio.to_thread(lambda: file.file.seek(0, os.SEEK_END))
+    await file.seek(0)
+
+    async def chunks():
+        while True:
+            data = await file.read(video_uploads.WRITE_BUFFER_SIZE)
+            if not data:
+                return
+            yield data
+
+    user_id = str(current_user["_id"])
+    try:
+        upload = await video_uploads.init_upload(lesson_id, file.filename or "", size, user_id)
+        await video_uploads.append_chunk(lesson_id, upload["upload_id"], user_id, 0, chunks(), max_chunk=size)
+    except UploadError as e:
+        raise _upload_http_error(e)
+    video = await _attach_video(lesson, lesson_id, upload["upload_id"], user_id)
+    return {"message": "Video uploaded successfully", "file_path": video["file_path"], "video_url": video["video_url"]}
+
+@router.post("/{lesson_id}/video-uploads", status_code=201)
+async def init_video_upload(lesson_id: str, upload: VideoUploadInit, current_user = Depends(require_role("instructor"))):
+    """Start a chunked upload; PUT the bytes in order, then POST .../complete"""
+    await _require_lesson(lesson_id)
+    try:
+        return await video_uploads.init_upload(lesson_id, upload.filename, upload.size, str(current_user["_id"]))
+    except UploadError as e:
+        raise _upload_http_error(e)
+
+@router.get("/{lesson_id}/video-uploads/{upload_id}")
+async def get_video_upload(lesson_id: str, upload_id: str, current_user = Depends(require_role("instructor"))):
+    try:
+        return await video_uploads.upload_status(lesson_id, upload_id, str(current_user["_id"]))
+    except UploadError as e:
+        raise _upload_http_error(e)
+
+@router.put("/{lesson_id}/video-uploads/{upload_id}")
+async def append_video_chunk(
+    lesson_id: str,
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    current_user = Depends(require_role("instructor"))
+):
+    """Append the raw request body at offset (the current uploaded size)"""
+    try:
+        return await video_uploads.append_chunk(lesson_id, upload_id, str(current_user["_id"]), offset,
+                                                request.stream())
+    except UploadError as e:
+        raise _upload_http_error(e)
+
+@router.post("/{lesson_id}/video-uploads/{upload_id}/complete")
+async def complete_video_upload(
+    lesson_id: str,
+    upload_id: str,
+    body: VideoUploadComplete,
+    current_user = Depends(require_role("instructor"))
+):
+    """Verify size and SHA-256, move the video into place and set the lesson's video_url"""
+    lesson = await _require_lesson(lesson_id)
+    video = await _attach_video(lesson, lesson_id, upload_id, str(current_user["_id"]), body.sha256)
+    return {"message": "Video uploaded successfully", "video_url": video["video_url"],
+            "size": video["size"], "sha256": video["sha256"]}
+
+@router.delete("/{lesson_id}/video-uploads/{upload_id}")
+async def abort_video_upload(lesson_id: str, upload_id: str, current_user = Depends(require_role("instructor"))):
+    try:
+        await video_uploads.abort_upload(lesson_id, upload_id, str(current_user["_id"]))
+    except UploadError as e:
+        raise _upload_http_error(e)
+    return {"message": "Upload aborted"}
 
 @router.get("/")
-def list_lessons():
-    lessons = LessonRepository.find_all()
-    for l in lessons:
-        l["id"] = str(l["_id"])
-        l.pop("_id")
-    return lessons
+async def list_lessons(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    try:
+        lessons, next_cursor = await LessonRepository.find_page(cursor, limit, public=True, profile=SUMMARY)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response({"lessons": lessons, "next_cursor": next_cursor})
 
 @router.get("/{lesson_id}")
-def get_lesson(lesson_id: str):
-    lesson = LessonRepository.find_by_id(lesson_id)
-    if not lesson:
+async def get_lesson(lesson_id: str, request: Request):
+    async def build():
+        lesson = await LessonRepository.find_by_id(lesson_id, public=True, profile=DETAIL)
+        if not lesson:
+            raise HTTPException(status_code=404, detail="Lesson not found")
+        return lesson
+    return await cached_json(f"lessons:detail:{lesson_id}", [f"lesson:{lesson_id}"], build,
+                             request, document_validators("lesson"))
+
+async def _serve_media(lesson_id: str, request: Request, field: str, label: str):
+    urls = await lesson_media_urls(lesson_id, lambda lid: LessonRepository.find_by_id(lid, profile=SUMMARY))
+    if urls is None:
         raise HTTPException(status_code=404, detail="Lesson not found")
-    lesson["id"] = str(lesson["_id"])
-    lesson.pop("_id")
-    return lesson
+    url = urls.get(field)
+    if not url:
+        raise HTTPException(status_code=404, detail=f"Lesson has no {label}")
+    path = local_media_path(url)
+    if path is None:
+        if url.startswith(("http://", "https://")):
+            # Hosted elsewhere (e.g. a CDN); let the client fetch it from there
+            return RedirectResponse(url, status_code=307)
+        raise HTTPException(status_code=404, detail=f"Lesson {label} is not stored on this server")
+    try:
+        return await media_response(request, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Lesson {label} file not found")
+
+@router.api_route("/{lesson_id}/video", methods=["GET", "HEAD"])
+async def stream_video(lesson_id: str, request: Request):
+    """Stream the lesson video; supports Range (206), If-Range and conditional GETs"""
+    return await _serve_media(lesson_id, request, "video_url", "video")
+
+@router.api_route("/{lesson_id}/document", methods=["GET", "HEAD"])
+async def stream_document(lesson_id: str, request: Request):
+    """Stream the lesson document; supports Range (206), If-Range and conditional GETs"""
+    return await _serve_media(lesson_id, request, "document_url", "document")
 
 @router.delete("/{lesson_id}")
-def remove_lesson(lesson_id: str, current_user = Depends(require_role("instructor"))):
-    result = LessonRepository.delete(lesson_id)
+async def remove_lesson(lesson_id: str, current_user = Depends(require_role("instructor"))):
+    result = await LessonRepository.delete(lesson_id)
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Lesson not found")
     return {"message": "Lesson deleted"}
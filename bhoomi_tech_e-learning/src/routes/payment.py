@@ -1,36 +1,40 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
 from database.schemas.payment import PaymentSchema
 from database.repositories.payment_repository import PaymentRepository
+from database.pagination import InvalidCursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from serialization import json_response
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
 @router.post("/")
-def add_payment(payment: PaymentSchema):
-    result = PaymentRepository.create(payment.dict())
+async def add_payment(payment: PaymentSchema):
+    result = await PaymentRepository.create(payment.dict())
     payment_dict = payment.dict()
     payment_dict["id"] = str(result.inserted_id)
     return payment_dict
 
 @router.get("/")
-def list_payments():
-    payments = PaymentRepository.find_all()
-    for p in payments:
-        p["id"] = str(p["_id"])
-        p.pop("_id")
-    return payments
+async def list_payments(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    try:
+        payments, next_cursor = await PaymentRepository.find_page(cursor, limit, public=True)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response({"payments": payments, "next_cursor": next_cursor})
 
 @router.get("/{payment_id}")
-def get_payment(payment_id: str):
-    payment = PaymentRepository.find_by_id(payment_id)
+async def get_payment(payment_id: str):
+    payment = await PaymentRepository.find_by_id(payment_id, public=True)
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
-    payment["id"] = str(payment["_id"])
-    payment.pop("_id")
-    return payment
+    return json_response(payment)
 
 @router.delete("/{payment_id}")
-def remove_payment(payment_id: str):
-    result = PaymentRepository.delete(payment_id)
-    if result.deleted_count == 0:
+async def remove_payment(payment_id: str):
+    deleted = await PaymentRepository.delete(payment_id)
+    if not deleted:
         raise HTTPException(status_code=404, detail="Payment not found")
     return {"message": "Payment deleted"}
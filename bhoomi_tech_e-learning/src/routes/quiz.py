@@ -1,58 +1,64 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from typing import Optional
 from database.schemas.quiz import QuizSchema
-from database.schemas.quiz_result import QuizSubmission, QuizResult
+from database.schemas.quiz_result import QuizSubmission, QuizResult, BulkGradeRequest
 from database.repositories.quiz_repository import QuizRepository
+from database.pagination import InvalidCursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from database.repositories.quiz_result_repository import QuizResultRepository
+from cache import cached_json
+from conditional import document_validators
 from middleware import get_current_user, require_role
+from serialization import json_response
+from grading import get_answer_key, percentage
+from database.quiz_stats import get_stats
 
 router = APIRouter(prefix="/quizzes", tags=["Quizzes"])
 
 @router.post("/")
-def add_quiz(quiz: QuizSchema, current_user = Depends(require_role("instructor"))):
-    result = QuizRepository.create(quiz.dict()) 
+async def add_quiz(quiz: QuizSchema, current_user = Depends(require_role("instructor"))):
+    result = await QuizRepository.create(quiz.dict()) 
     
     quiz_dict = quiz.dict()
     quiz_dict["id"] = str(result.inserted_id)
     return quiz_dict
 
 @router.get("/")
-def list_quizzes():
-    quizzes = QuizRepository.find_all()
-    for q in quizzes:
-        q["id"] = str(q["_id"])
-        q.pop("_id")
-    return quizzes
+async def list_quizzes(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    try:
+        quizzes, next_cursor = await QuizRepository.find_page(cursor, limit, public=True)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response({"quizzes": quizzes, "next_cursor": next_cursor})
 
 @router.get("/{quiz_id}")
-def get_quiz(quiz_id: str):
-    quiz = QuizRepository.find_by_id(quiz_id)
-    if not quiz:
-        raise HTTPException(status_code=404, detail="Quiz not found")
-    quiz["id"] = str(quiz["_id"])
-    quiz.pop("_id")
+async def get_quiz(quiz_id: str, request: Request):
+    async def build():
+        quiz = await QuizRepository.find_by_id(quiz_id, public=True)
+        if not quiz:
+            raise HTTPException(status_code=404, detail="Quiz not found")
     
-    # Remove correct answers from response for students
-    for question in quiz.get("questions", []):
-        question.pop("answer", None)
+        # Remove correct answers from response for students
+        for question in quiz.get("questions", []):
+            question.pop("answer", None)
     
-    return quiz
+        return quiz
+    return await cached_json(f"quizzes:detail:{quiz_id}", [f"quiz:{quiz_id}"], build,
+                             request, document_validators("quiz"))
 
 @router.post("/{quiz_id}/submit")
-def submit_quiz(quiz_id: str, submission: QuizSubmission, current_user = Depends(get_current_user)):
-    quiz = QuizRepository.find_by_id(quiz_id)
-    if not quiz:
+async def submit_quiz(quiz_id: str, submission: QuizSubmission, current_user = Depends(get_current_user)):
+    answer_key = await get_answer_key(quiz_id)
+    if answer_key is None:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
     # Calculate score
-    questions = quiz.get("questions", [])
-    correct_answers = 0
-    total_questions = len(questions)
-    
-    for i, question in enumerate(questions):
-        if i < len(submission.answers) and submission.answers[i] == question["answer"]:
-            correct_answers += 1
-    
-    score = (correct_answers / total_questions) * 100 if total_questions > 0 else 0
+    total_questions = answer_key.total_questions
+    question_correct = answer_key.correct_flags(submission.answers)
+    correct_answers = sum(question_correct)
+    score = percentage(correct_answers, total_questions)
     
     # Save result
     result_dict = {
@@ -60,10 +66,11 @@ def submit_quiz(quiz_id: str, submission: QuizSubmission, current_user = Depends
         "quiz_id": quiz_id,
         "score": score,
         "total_questions": total_questions,
-        "correct_answers": correct_answers
+        "correct_answers": correct_answers,
+        "question_correct": question_correct
     }
     
-    result = QuizResultRepository.create(result_dict)
+    result = await QuizResultRepository.create(result_dict)
 
     return {
         "id": str(result.inserted_id),
@@ -74,18 +81,48 @@ def submit_quiz(quiz_id: str, submission: QuizSubmission, current_user = Depends
         "correct_answers": result_dict["correct_answers"]
     }
 
+@router.post("/{quiz_id}/grade-batch")
+async def grade_batch(quiz_id: str, batch: BulkGradeRequest, current_user = Depends(require_role("instructor"))):
+    """Grade many submissions at once, e.g. imported paper exam results"""
+    answer_key = await get_answer_key(quiz_id)
+    if answer_key is None:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    
+    total_questions = answer_key.total_questions
+    flags = [answer_key.correct_flags(submission.answers) for submission in batch.submissions]
+    results = [
+        {
+            "user_id": submission.user_id,
+            "quiz_id": quiz_id,
+            "score": percentage(sum(question_correct), total_questions),
+            "total_questions": total_questions,
+            "correct_answers": sum(question_correct)
+        }
+        for submission, question_correct in zip(batch.submissions, flags)
+    ]
+    if batch.save:
+        inserted = await QuizResultRepository.create_many([
+            dict(result, question_correct=question_correct, graded_by=str(current_user["_id"]))
+            for result, question_correct in zip(results, flags)
+        ])
+        for result, inserted_id in zip(results, inserted.inserted_ids):
+            result["id"] = str(inserted_id)
+    
+    return json_response({"quiz_id": quiz_id, "graded": len(results), "results": results})
+
 
 @router.get("/{quiz_id}/results")
-def get_quiz_results(quiz_id: str, current_user = Depends(require_role("instructor"))):
-    results = QuizResultRepository.find_by_quiz(quiz_id)
-    for r in results:
-        r["id"] = str(r["_id"])
-        r.pop("_id")
-    return results
+async def get_quiz_results(quiz_id: str, current_user = Depends(require_role("instructor"))):
+    return json_response(await QuizResultRepository.find_by_quiz(quiz_id, public=True))
+
+@router.get("/{quiz_id}/stats")
+async def get_quiz_stats(quiz_id: str, current_user = Depends(require_role("instructor"))):
+    """Score count, mean, variance, histogram and per-question correct rates, kept up to date as results arrive"""
+    return json_response(await get_stats(quiz_id))
 
 @router.delete("/{quiz_id}")
-def remove_quiz(quiz_id: str, current_user = Depends(require_role("instructor"))):
-    result = QuizRepository.delete(quiz_id)
+async def remove_quiz(quiz_id: str, current_user = Depends(require_role("instructor"))):
+    result = await QuizRepository.delete(quiz_id)
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Quiz not found")
     return {"message": "Quiz deleted"}
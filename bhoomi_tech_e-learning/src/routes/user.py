@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Query
+from typing import Optional
 from database.schemas.user import UserSchema, UserUpdate
 from database.schemas.auth import UserLogin, UserRegister, Token
 from database.repositories.user_repository import UserRepository
-from auth import verify_password, get_password_hash, create_access_token
+from database.pagination import InvalidCursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from database.projections import SUMMARY, DETAIL
+from auth import verify_password_async, hash_password_async, create_access_token
 from middleware import get_current_user
+from serialization import json_response
 from datetime import timedelta
 import os
 import uuid
@@ -11,13 +15,13 @@ import uuid
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.post("/register", response_model=dict)
-def register(user: UserRegister):
-    if UserRepository.find_by_email(user.email):
+async def register(user: UserRegister):
+    if await UserRepository.find_by_email(user.email):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     user_dict = user.dict()
-    user_dict["password"] = get_password_hash(user.password)
-    result = UserRepository.create(user_dict)
+    user_dict["password"] = await hash_password_async(user.password)
+    result = await UserRepository.create(user_dict)
 
     # ✅ MongoDB inserted ID
     user_dict["id"] = str(result.inserted_id)
@@ -33,13 +37,22 @@ def register(user: UserRegister):
 
 
 @router.post("/login", response_model=Token)
-def login(user_credentials: UserLogin):
-    user = UserRepository.find_by_email(user_credentials.email)
-    if not user or not verify_password(user_credentials.password, user["password"]):
+async def login(user_credentials: UserLogin):
+    user = await UserRepository.find_by_email(user_credentials.email)
+    if not user:
+        raise HTTPException(
+            status_code=401,
+            detail="Incorrect email or password"
+        )
+    valid, new_hash = await verify_password_async(user_credentials.password, user["password"])
+    if not valid:
         raise HTTPException(
             status_code=401,
             detail="Incorrect email or password"
         )
+    if new_hash:
+        # Stored hash used an outdated bcrypt cost
+        await UserRepository.update(str(user["_id"]), {"password": new_hash})
     
     access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
@@ -48,42 +61,42 @@ def login(user_credentials: UserLogin):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me")
-def get_current_user_info(current_user = Depends(get_current_user)):
+async def get_current_user_info(current_user = Depends(get_current_user)):
     current_user["id"] = str(current_user["_id"])
     current_user.pop("_id")
     current_user.pop("password")  # Don't return password
     return current_user
 
 @router.get("/")
-def list_users(current_user = Depends(get_current_user)):
-    users = UserRepository.find_all()
-    for u in users:
-        u["id"] = str(u["_id"])
-        u.pop("_id")
-        u.pop("password")  # Don't return passwords
-    return users
+async def list_users(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user = Depends(get_current_user)
+):
+    try:
+        users, next_cursor = await UserRepository.find_page(cursor, limit, public=True, profile=SUMMARY)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response({"users": users, "next_cursor": next_cursor})
 
 @router.get("/{user_id}")
-def get_user(user_id: str, current_user = Depends(get_current_user)):
-    user = UserRepository.find_by_id(user_id)
+async def get_user(user_id: str, current_user = Depends(get_current_user)):
+    user = await UserRepository.find_by_id(user_id, public=True, profile=DETAIL)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    user["id"] = str(user["_id"])
-    user.pop("_id")
-    user.pop("password")  # Don't return password
-    return user
+    return json_response(user)
 
 @router.delete("/{user_id}")
-def remove_user(user_id: str, current_user = Depends(get_current_user)):
-    result = UserRepository.delete(user_id)
+async def remove_user(user_id: str, current_user = Depends(get_current_user)):
+    result = await UserRepository.delete(user_id)
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User deleted"}
 
 @router.put("/{user_id}")
-def update_user(user_id: str, user_update: UserUpdate, current_user = Depends(get_current_user)):
+async def update_user(user_id: str, user_update: UserUpdate, current_user = Depends(get_current_user)):
     # Check if user exists
-    existing_user = UserRepository.find_by_id(user_id)
+    existing_user = await UserRepository.find_by_id(user_id)
     if not existing_user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -97,7 +110,7 @@ def update_user(user_id: str, user_update: UserUpdate, current_user = Depends(ge
         update_data["name"] = user_update.name
     if user_update.email is not None:
         # Check if new email is already taken by another user
-        existing_email_user = UserRepository.find_by_email(user_update.email)
+        existing_email_user = await UserRepository.find_by_email(user_update.email)
         if existing_email_user and str(existing_email_user["_id"]) != user_id:
             raise HTTPException(status_code=400, detail="Email already taken by another user")
         update_data["email"] = user_update.email
@@ -110,21 +123,17 @@ def update_user(user_id: str, user_update: UserUpdate, current_user = Depends(ge
         raise HTTPException(status_code=400, detail="No fields provided for update")
     
     # Update user
-    result = UserRepository.update(user_id, update_data)
+    result = await UserRepository.update(user_id, update_data)
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="User not found or no changes made")
     
     # Return updated user
-    updated_user = UserRepository.find_by_id(user_id)
-    updated_user["id"] = str(updated_user["_id"])
-    updated_user.pop("_id")
-    updated_user.pop("password")  # Don't return password
-    return updated_user
+    return json_response(await UserRepository.find_by_id(user_id, public=True, profile=DETAIL))
 
 @router.post("/{user_id}/avatar")
-def upload_avatar(user_id: str, avatar: UploadFile = File(...), current_user = Depends(get_current_user)):
+async def upload_avatar(user_id: str, avatar: UploadFile = File(...), current_user = Depends(get_current_user)):
     # Check if user exists
-    existing_user = UserRepository.find_by_id(user_id)
+    existing_user = await UserRepository.find_by_id(user_id)
     if not existing_user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -147,15 +156,15 @@ def upload_avatar(user_id: str, avatar: UploadFile = File(...), current_user = D
     
     # Save file
     try:
+        content = await avatar.read()
         with open(file_path, "wb") as buffer:
-            content = avatar.file.read()
             buffer.write(content)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
     
     # Update user's avatar field
     avatar_url = f"/uploads/avatars/{unique_filename}"
-    result = UserRepository.update(user_id, {"avatar": avatar_url})
+    result = await UserRepository.update(user_id, {"avatar": avatar_url})
     
     if result.modified_count == 0:
         # Clean up uploaded file if database update failed
@@ -169,9 +178,9 @@ def upload_avatar(user_id: str, avatar: UploadFile = File(...), current_user = D
     }
 
 @router.delete("/{user_id}/avatar")
-def delete_avatar(user_id: str, current_user = Depends(get_current_user)):
+async def delete_avatar(user_id: str, current_user = Depends(get_current_user)):
     # Check if user exists
-    existing_user = UserRepository.find_by_id(user_id)
+    existing_user = await UserRepository.find_by_id(user_id)
     if not existing_user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -185,7 +194,7 @@ def delete_avatar(user_id: str, current_user = Depends(get_current_user)):
         raise HTTPException(status_code=404, detail="User has no avatar to delete")
     
     # Remove avatar from user record
-    result = UserRepository.update(user_id, {"avatar": None})
+    result = await UserRepository.update(user_id, {"avatar": None})
     
     if result.modified_count == 0:
         raise HTTPException(status_code=500, detail="Failed to remove avatar from user record")
@@ -0,0 +1,399 @@
+"""
+In-process full-text search and autocomplete over courses and users.
+
+Each SearchIndex is an inverted index (term -> {doc id: weight}) plus a sorted
+term list, so a query token matches whole terms and, through a bisect over the
+sorted list, every term it is a prefix of. Hits are ranked by field weight x
+idf, whole-term matches above prefix matches, and every query token must match.
+
+Each PrefixIndex is a sorted array of normalized keys (a title, name or email
+and every word-aligned tail of it), so typeahead is one bisect plus a short
+scan and never touches MongoDB.
+
+Write paths mark the documents they touch as stale (see cache.invalidate_course
+and cache.invalidate_user). SearchIndex reloads stale documents with one $in
+query before the next search; PrefixIndex reloads them in a background task.
+main.py builds every index at startup and rebuilds them every
+SEARCH_INDEX_REFRESH_SECONDS. Stale marks are per process, so that full rescan
+is the only way another worker's or a script's writes (including deletes)
+reach this worker's indexes: they can be up to one interval late. This is
+deliberate: users carry no updated_at to refresh from incrementally, and a
+rescan is one linear pass (see rebuild). Until the first build finishes,
+query() returns None and callers fall back to a database scan.
+"""
+import asyncio
+import math
+import re
+import unicodedata
+from abc import ABC, abstractmethod
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from database.helpers import default_database, to_object_id
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Score multiplier for a term that only starts with the query token
+PREFIX_WEIGHT = 0.6
+
+# Most PrefixIndex entries one completion looks at, so very short prefixes stay cheap
+MAX_COMPLETION_SCAN = 2000
+
+
+def normalize(text: Any) -> str:
+    """Casefold and strip accents so "Café" and "cafe" index alike"""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def tokenize(text: Any) -> List[str]:
+    if not text:
+        return []
+    return _TOKEN_RE.findall(normalize(text))
+
+
+class CollectionIndex(ABC):
+    """Upkeep shared by the index types: stale tracking, reloads and rebuilds.
+    Subclasses provide the structure through add/remove/_fresh/_adopt/_sort."""
+
+    def __init__(self, collection_name: str, fields: Sequence[str], attributes: Sequence[str] = ()):
+        self.collection_name = collection_name
+        self.attributes = tuple(attributes)
+        self._loaded_fields = tuple(fields)
+        self._attrs: Dict[str, Dict[str, Any]] = {}
+        self._stale: Set[str] = set()
+        self._marked_during_refresh: Optional[Set[str]] = None
+        self._refresh_lock = asyncio.Lock()
+        self._refreshed_during_build: Optional[Set[str]] = None
+        # While set, add() leaves the sorted lists alone and _sort() builds them once at the end
+        self._bulk_loading = False
+        self.ready = False
+        self.built_at: Optional[datetime] = None
+
+    @property
+    def projection(self) -> Dict[str, int]:
+        return {field: 1 for field in (*self._loaded_fields, *self.attributes)}
+
+    def __len__(self) -> int:
+        return len(self._attrs)
+
+    @abstractmethod
+    def add(self, doc: Dict[str, Any]):
+        """Index doc, replacing any earlier version of it"""
+
+    @abstractmethod
+    def remove(self, doc_id: str):
+        """Drop doc_id from the index"""
+
+    @abstractmethod
+    def _fresh(self) -> "CollectionIndex":
+        """An empty index with the same configuration"""
+
+    @abstractmethod
+    def _adopt(self, fresh: "CollectionIndex"):
+        """Take over the structures of a freshly built index"""
+
+    @abstractmethod
+    def _sort(self):
+        """Build the sorted lists from the per-document structures after a bulk load"""
+
+    def _matches(self, doc_id: str, filters: Dict[str, Any]) -> bool:
+        attrs = self._attrs.get(doc_id, {})
+        return all(attrs.get(name) == value for name, value in filters.items())
+
+    def mark_stale(self, *doc_ids):
+        doc_ids = [str(doc_id) for doc_id in doc_ids if doc_id]
+        self._stale.update(doc_ids)
+        if self._marked_during_refresh is not None:
+            self._marked_during_refresh.update(doc_ids)
+
+    async def refresh(self, database=None):
+        """Reload the documents marked stale since the last refresh.
+        Concurrent callers wait for the reload in flight, so none searches without its documents."""
+        if not self._stale:
+            return
+        async with self._refresh_lock:
+            if not self._stale:
+                return
+            if database is None:
+                database = default_database()
+            stale = set(self._stale)
+            if self._refreshed_during_build is not None:
+                self._refreshed_during_build.update(stale)
+            object_ids = [oid for oid in map(to_object_id, stale) if oid is not None]
+            self._marked_during_refresh = set()
+            try:
+                docs = await database[self.collection_name].find(
+                    {"_id": {"$in": object_ids}}, self.projection
+                ).to_list(length=None)
+            finally:
+                remarked, self._marked_during_refresh = self._marked_during_refresh, None
+            for doc_id in stale:
+                self.remove(doc_id)
+            for doc in docs:
+                self.add(doc)
+            # Only now are they indexed; ids written again during the load stay stale
+            self._stale -= stale - remarked
+
+    async def rebuild(self, database=None, batch_size: int = 1000):
+        """Index the whole collection into a fresh structure and swap it in"""
+        if database is None:
+            database = default_database()
+        fresh = self._fresh()
+        fresh._bulk_loading = True
+        self._refreshed_during_build = set()
+        try:
+            async for doc in database[self.collection_name].find({}, self.projection, batch_size=batch_size):
+                fresh.add(doc)
+        finally:
+            refreshed, self._refreshed_during_build = self._refreshed_during_build, None
+        # One sort instead of an insort per key, which made a rebuild quadratic
+        fresh._bulk_loading = False
+        fresh._sort()
+        self._adopt(fresh)
+        self._attrs = fresh._attrs
+        # The scan may have read these before their writes landed; reload them next time
+        self._stale |= refreshed
+        self.ready = True
+        self.built_at = datetime.now(timezone.utc)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self),
+            "stale": len(self._stale),
+            "ready": self.ready,
+            "built_at": self.built_at,
+        }
+
+
+class SearchIndex(CollectionIndex):
+    def __init__(self, collection_name: str, fields: Dict[str, float], attributes: Sequence[str] = ()):
+        super().__init__(collection_name, fields, attributes)
+        self.fields = fields
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._terms: List[str] = []
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+
+    def _fresh(self) -> "SearchIndex":
+        return SearchIndex(self.collection_name, self.fields, self.attributes)
+
+    def _adopt(self, fresh: "SearchIndex"):
+        self._postings, self._terms, self._doc_terms = fresh._postings, fresh._terms, fresh._doc_terms
+
+    def _sort(self):
+        self._terms = sorted(self._postings)
+
+    def add(self, doc: Dict[str, Any]):
+        doc_id = str(doc["_id"])
+        self.remove(doc_id)
+        weights: Counter = Counter()
+        for field, weight in self.fields.items():
+            for token in tokenize(doc.get(field)):
+                weights[token] += weight
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                if not self._bulk_loading:
+                    insort(self._terms, term)
+            postings[doc_id] = weight
+        self._doc_terms[doc_id] = dict(weights)
+        self._attrs[doc_id] = {name: doc.get(name) for name in self.attributes}
+
+    def remove(self, doc_id: str):
+        weights = self._doc_terms.pop(doc_id, None)
+        self._attrs.pop(doc_id, None)
+        if not weights:
+            return
+        for term in weights:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                if self._bulk_loading:
+                    continue
+                position = bisect_left(self._terms, term)
+                if position < len(self._terms) and self._terms[position] == term:
+                    del self._terms[position]
+
+    def _expand(self, token: str) -> List[str]:
+        """Terms equal to or starting with token"""
+        terms = []
+        position = bisect_left(self._terms, token)
+        while position < len(self._terms) and self._terms[position].startswith(token):
+            terms.append(self._terms[position])
+            position += 1
+        return terms
+
+    def search(self, text: str, filters: Dict[str, Any] = None, limit: Optional[int] = None) -> List[str]:
+        """Ids of documents matching every token of text (and filters), best first"""
+        tokens = list(dict.fromkeys(tokenize(text)))
+        if not tokens:
+            return []
+        total_docs = max(len(self._doc_terms), 1)
+        scores: Optional[Dict[str, float]] = None
+        for token in tokens:
+            token_scores: Dict[str, float] = {}
+            for term in self._expand(token):
+                postings = self._postings[term]
+                boost = math.log(1 + total_docs / len(postings))
+                if term != token:
+                    boost *= PREFIX_WEIGHT
+                for doc_id, weight in postings.items():
+                    score = weight * boost
+                    if score > token_scores.get(doc_id, 0.0):
+                        token_scores[doc_id] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {doc_id: scores[doc_id] + score
+                          for doc_id, score in token_scores.items() if doc_id in scores}
+            if not scores:
+                return []
+
+        if filters:
+            scores = {doc_id: score for doc_id, score in scores.items() if self._matches(doc_id, filters)}
+        ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))
+        return ranked[:limit] if limit is not None else ranked
+
+    async def query(self, text: str, filters: Dict[str, Any] = None, limit: Optional[int] = None,
+                    database=None) -> Optional[List[str]]:
+        """search() after reloading stale documents; None until the index has been built"""
+        if not self.ready:
+            return None
+        await self.refresh(database)
+        filters = {name: value for name, value in (filters or {}).items() if value is not None}
+        return self.search(text, filters, limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(super().stats(), terms=len(self._terms))
+
+
+class PrefixIndex(CollectionIndex):
+    """Sorted (key, rank, doc id) entries for typeahead on label_field and key_fields"""
+
+    def __init__(self, collection_name: str, label_field: str, key_fields: Sequence[str] = (),
+                 attributes: Sequence[str] = ()):
+        super().__init__(collection_name, (label_field, *key_fields), attributes)
+        self.label_field = label_field
+        self.key_fields = tuple(key_fields)
+        self._entries: List[Tuple[str, int, str]] = []
+        self._doc_entries: Dict[str, List[Tuple[str, int, str]]] = {}
+        self._payloads: Dict[str, Dict[str, Any]] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _fresh(self) -> "PrefixIndex":
+        return PrefixIndex(self.collection_name, self.label_field, self.key_fields, self.attributes)
+
+    def _adopt(self, fresh: "PrefixIndex"):
+        self._entries, self._doc_entries, self._payloads = fresh._entries, fresh._doc_entries, fresh._payloads
+
+    def _sort(self):
+        self._entries = sorted(entry for entries in self._doc_entries.values() for entry in entries)
+
+    @staticmethod
+    def _keys(value: Any) -> List[Tuple[str, int]]:
+        """The whole normalized value (rank 0) and each tail starting at a later word (rank 1)"""
+        if not value:
+            return []
+        text = " ".join(normalize(value).split())
+        keys = [(text, 0)]
+        for match in _TOKEN_RE.finditer(text):
+            if match.start() > 0:
+                keys.append((text[match.start():], 1))
+        return keys
+
+    def add(self, doc: Dict[str, Any]):
+        doc_id = str(doc["_id"])
+        self.remove(doc_id)
+        keys: Dict[str, int] = {}
+        for field in (self.label_field, *self.key_fields):
+            for key, rank in self._keys(doc.get(field)):
+                keys[key] = min(rank, keys.get(key, rank))
+        entries = [(key, rank, doc_id) for key, rank in keys.items()]
+        if not self._bulk_loading:
+            for entry in entries:
+                insort(self._entries, entry)
+        self._doc_entries[doc_id] = entries
+        payload = {"id": doc_id, "label": doc.get(self.label_field)}
+        payload.update({field: doc.get(field) for field in self.key_fields})
+        self._payloads[doc_id] = payload
+        self._attrs[doc_id] = {name: doc.get(name) for name in self.attributes}
+
+    def remove(self, doc_id: str):
+        entries = self._doc_entries.pop(doc_id, ())
+        if self._bulk_loading:
+            entries = ()
+        for entry in entries:
+            position = bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                del self._entries[position]
+        self._payloads.pop(doc_id, None)
+        self._attrs.pop(doc_id, None)
+
+    def mark_stale(self, *doc_ids):
+        super().mark_stale(*doc_ids)
+        # Reload off the request path so complete() never waits on MongoDB
+        if self._stale and (self._refresh_task is None or self._refresh_task.done()):
+            try:
+                self._refresh_task = asyncio.get_running_loop().create_task(self.refresh())
+            except RuntimeError:
+                pass  # no running loop (scripts); the next rebuild picks the change up
+
+    def complete(self, prefix: str, filters: Dict[str, Any] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Documents with a key starting with prefix; whole-value matches first, then alphabetical"""
+        prefix = " ".join(normalize(prefix).split())
+        if not prefix:
+            return []
+        filters = {name: value for name, value in (filters or {}).items() if value is not None}
+        best: Dict[str, Tuple[int, str]] = {}
+        whole_value_hits = 0
+        position = bisect_left(self._entries, (prefix,))
+        end = min(len(self._entries), position + MAX_COMPLETION_SCAN)
+        while position < end:
+            key, rank, doc_id = self._entries[position]
+            if not key.startswith(prefix):
+                break
+            position += 1
+            if filters and not self._matches(doc_id, filters):
+                continue
+            if doc_id not in best or (rank, key) < best[doc_id]:
+                if rank == 0 and best.get(doc_id, (1,))[0] != 0:
+                    whole_value_hits += 1
+                best[doc_id] = (rank, key)
+            # Entries come in key order, so `limit` whole-value hits settle the answer
+            if whole_value_hits >= limit:
+                break
+        ranked = sorted(best, key=lambda doc_id: best[doc_id])[:limit]
+        return [self._payloads[doc_id] for doc_id in ranked]
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(super().stats(), keys=len(self._entries))
+
+
+course_search = SearchIndex("courses", {"title": 3.0, "description": 1.0}, ("is_active",))
+user_search = SearchIndex("users", {"name": 3.0, "email": 2.0}, ("role", "is_active"))
+
+course_autocomplete = PrefixIndex("courses", "title", attributes=("is_active",))
+user_autocomplete = PrefixIndex("users", "name", ("email",), attributes=("role", "is_active"))
+
+ALL_INDEXES = (course_search, user_search, course_autocomplete, user_autocomplete)
+
+
+def mark_course_stale(*course_ids):
+    course_search.mark_stale(*course_ids)
+    course_autocomplete.mark_stale(*course_ids)
+
+
+def mark_user_stale(*user_ids):
+    user_search.mark_stale(*user_ids)
+    user_autocomplete.mark_stale(*user_ids)
+
+
+async def rebuild_search_indexes(indexes: Iterable[CollectionIndex] = ALL_INDEXES):
+    for index in indexes:
+        await index.rebuild()
@@ -0,0 +1,93 @@
+"""
+Fast JSON rendering for API responses.
+
+Routes normally hand FastAPI a dict, which jsonable_encoder walks value by value
+before json.dumps walks it again. Instead, documents are read with their _id
+already exposed as a string "id" (public_id_stages / find_public rename it in
+MongoDB, like the admin listing pipelines do) and rendered in one pass by
+dumps(), which uses orjson when it is installed and understands ObjectId and
+datetime natively. Routes return json_response(...) so FastAPI skips
+jsonable_encoder entirely.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Types neither encoder handles natively"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    # Pydantic models, enums, ... (rare in responses, so the slow path is fine)
+    return jsonable_encoder(value)
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(content: Any, status_code: int = 200, headers: Dict[str, str] = None) -> FastJSONResponse:
+    return FastJSONResponse(content=content, status_code=status_code, headers=headers)
+
+
+# ----------------------------------------------------------------------------
+# Public ids
+# ----------------------------------------------------------------------------
+
+PUBLIC_ID = {"id": {"$toString": "$_id"}}
+
+Sort = Union[Dict[str, int], Sequence[Tuple[str, int]]]
+
+
+def public_id_stages(projection: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    """Aggregation stages replacing _id with its string form as "id" (plus an optional projection)"""
+    project = dict(projection or {}, _id=0)
+    if any(value for field, value in project.items() if field != "_id"):
+        # Inclusion projection: keep the renamed id as well
+        project["id"] = 1
+    return [{"$addFields": PUBLIC_ID}, {"$project": project}]
+
+
+async def find_public(collection, query: Dict[str, Any] = None, sort: Optional[Sort] = None,
+                      skip: Optional[int] = None, limit: Optional[int] = None,
+                      projection: Dict[str, Any] = None) -> List[Dict]:
+    """find() whose documents come back with "id" instead of _id"""
+    pipeline: List[Dict[str, Any]] = [{"$match": query or {}}]
+    if sort:
+        pipeline.append({"$sort": dict(sort)})
+    if skip:
+        pipeline.append({"$skip": skip})
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+    pipeline.extend(public_id_stages(projection))
+    return await collection.aggregate(pipeline).to_list(length=None)
+
+
+async def find_one_public(collection, query: Dict[str, Any], projection: Dict[str, Any] = None) -> Optional[Dict]:
+    docs = await find_public(collection, query, limit=1, projection=projection)
+    return docs[0] if docs else None
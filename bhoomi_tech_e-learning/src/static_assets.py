@@ -0,0 +1,180 @@
+"""
+Build and serve the admin-frontend static files.
+
+build() writes admin-frontend/dist:
+
+    app.<hash>.js, styles.<hash>.css   content-hashed copies of the scripts and stylesheets
+    index.html, ...                    pages rewritten to reference the hashed names
+    *.gz, *.br                         precompressed variants (.br needs the `brotli` package)
+    manifest.json                      original name -> hashed name
+
+    python -m static_assets            # run from src/ after changing admin-frontend
+
+PrecompressedStaticFiles serves the .br/.gz variant when the client accepts it.
+Hashed files get a one-year immutable Cache-Control; everything else gets
+no-cache, so browsers revalidate pages but never re-download an unchanged
+script. When dist/ has not been built, main.py serves the source directory
+with the same class, and CompressionMiddleware compresses on the fly.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import stat
+from typing import Dict
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from compression import available_encodings, brotli, negotiate_encoding
+
+ADMIN_FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "admin-frontend")
+BUILD_DIR_NAME = "dist"
+MANIFEST_NAME = "manifest.json"
+
+HASHED_EXTENSIONS = (".js", ".css")
+COMPRESSIBLE_EXTENSIONS = (".html", ".js", ".css", ".json", ".svg", ".txt")
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# Files smaller than this are not worth a precompressed variant
+PRECOMPRESS_MIN_SIZE = 1024
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+_HASHED_NAME = re.compile(r"\.[0-9a-f]{12}\.[a-z0-9]+$")
+_ASSET_REFERENCE = re.compile(r"""(?P<attr>\b(?:src|href)=)(?P<quote>["'])(?P<name>[^"'?#/]+)(?:\?[^"']*)?(?P=quote)""")
+
+
+# ----------------------------------------------------------------------------
+# Build
+# ----------------------------------------------------------------------------
+
+def _hashed_name(name: str, data: bytes) -> str:
+    stem, extension = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+
+
+def _rewrite_references(html: str, manifest: Dict[str, str]) -> str:
+    def replace(match):
+        hashed = manifest.get(match.group("name"))
+        if hashed is None:
+            return match.group(0)
+        return f'{match.group("attr")}{match.group("quote")}{hashed}{match.group("quote")}'
+    return _ASSET_REFERENCE.sub(replace, html)
+
+
+def _precompress(path: str) -> int:
+    """Write the .gz (and .br) variants of path where they are smaller; returns variants written"""
+    with open(path, "rb") as source:
+        data = source.read()
+    if len(data) < PRECOMPRESS_MIN_SIZE:
+        return 0
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    written = 0
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(data):
+            with open(path + suffix, "wb") as target:
+                target.write(compressed)
+            written += 1
+    return written
+
+
+def build(source: str = ADMIN_FRONTEND_DIR, output: str = None) -> Dict[str, str]:
+    """Rebuild the output directory (default source/dist); returns the manifest"""
+    output = output or os.path.join(source, BUILD_DIR_NAME)
+    if os.path.isdir(output):
+        shutil.rmtree(output)
+    os.makedirs(output)
+
+    names = sorted(
+        name for name in os.listdir(source)
+        if os.path.isfile(os.path.join(source, name)) and not name.startswith(".")
+    )
+    manifest: Dict[str, str] = {}
+    for name in names:
+        if name.endswith(HASHED_EXTENSIONS):
+            with open(os.path.join(source, name), "rb") as asset:
+                data = asset.read()
+            manifest[name] = _hashed_name(name, data)
+            with open(os.path.join(output, manifest[name]), "wb") as target:
+                target.write(data)
+    for name in names:
+        if name in manifest:
+            continue
+        if name.endswith(".html"):
+            with open(os.path.join(source, name), encoding="utf-8") as page:
+                html = page.read()
+            with open(os.path.join(output, name), "w", encoding="utf-8") as target:
+                target.write(_rewrite_references(html, manifest))
+        else:
+            shutil.copyfile(os.path.join(source, name), os.path.join(output, name))
+
+    for name in os.listdir(output):
+        if name.endswith(COMPRESSIBLE_EXTENSIONS):
+            _precompress(os.path.join(output, name))
+    with open(os.path.join(output, MANIFEST_NAME), "w", encoding="utf-8") as target:
+        json.dump(manifest, target, indent=2, sort_keys=True)
+    return manifest
+
+
+def served_directory(source: str = ADMIN_FRONTEND_DIR) -> str:
+    """The built directory when it exists, otherwise the sources"""
+    output = os.path.join(source, BUILD_DIR_NAME)
+    return output if os.path.isfile(os.path.join(output, MANIFEST_NAME)) else source
+
+
+# ----------------------------------------------------------------------------
+# Serving
+# ----------------------------------------------------------------------------
+
+def cache_control_for(path: str) -> str:
+    return IMMUTABLE if _HASHED_NAME.search(path) else REVALIDATE
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = None
+        compressible = path.endswith(COMPRESSIBLE_EXTENSIONS)
+        if compressible and scope["method"] in ("GET", "HEAD"):
+            accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+            encoding = negotiate_encoding(accept_encoding, available_encodings())
+            if encoding is not None:
+                response = await self._variant(path, encoding, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+        if compressible:
+            response.headers["vary"] = "Accept-Encoding"
+        response.headers["cache-control"] = cache_control_for(path)
+        return response
+
+    async def _variant(self, path: str, encoding: str, scope: Scope):
+        full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + ENCODING_SUFFIXES[encoding])
+        if not stat_result or not stat.S_ISREG(stat_result.st_mode):
+            return None
+        response = self.file_response(full_path, stat_result, scope)
+        response.headers["content-encoding"] = encoding
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if media_type.startswith("text/"):
+            media_type += "; charset=utf-8"
+        response.headers["content-type"] = media_type
+        return response
+
+
+def main():
+    manifest = build()
+    for name, hashed in sorted(manifest.items()):
+        print(f"✓ {name} -> {hashed}")
+    print(f"✓ admin-frontend built into {os.path.join(ADMIN_FRONTEND_DIR, BUILD_DIR_NAME)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Chunked, resumable lesson video uploads.
+
+    POST   /lessons/{id}/video-uploads                    {"filename", "size"}  -> upload_id
+    GET    /lessons/{id}/video-uploads/{upload_id}        current offset (resume from here)
+    PUT    /lessons/{id}/video-uploads/{upload_id}?offset=N   raw bytes appended at N
+    POST   /lessons/{id}/video-uploads/{upload_id}/complete   {"sha256"}  -> video_url
+    DELETE /lessons/{id}/video-uploads/{upload_id}        abort
+
+Bytes land in VIDEO_UPLOAD_STAGING_DIR as <upload_id>.part next to a
+<upload_id>.json description. The size of the .part file is the upload's
+offset, so an interrupted upload (or a restarted server) resumes from whatever
+reached the disk. complete() checks the size and SHA-256, then moves the file
+into VIDEO_UPLOAD_DIR with os.replace, which is atomic on one filesystem, so a
+lesson never points at a half-written video.
+
+File I/O runs on worker threads (asyncio.to_thread) so a multi-GB upload does
+not block the event loop. Appends to one upload are serialized by a per-upload
+lock; a single server process is assumed. Only the instructor who started an
+upload can see, append to, complete or abort it.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+from config import config
+
+VIDEO_EXTENSIONS = (".mp4", ".webm", ".mov", ".m4v", ".mkv")
+VIDEO_URL_PREFIX = "/uploads/videos/"
+
+# Request bytes are buffered up to this much before each disk write
+WRITE_BUFFER_SIZE = 1024 * 1024
+HASH_BLOCK_SIZE = 4 * 1024 * 1024
+
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+class UploadError(Exception):
+    """An upload request that cannot be honoured; status_code is the HTTP status to answer with"""
+
+    def __init__(self, status_code: int, detail: str, offset: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.offset = offset
+
+
+def _staging_path(upload_id: str, suffix: str) -> str:
+    if not _UPLOAD_ID.match(upload_id):
+        raise UploadError(404, "Upload not found")
+    return os.path.join(config.VIDEO_UPLOAD_STAGING_DIR, upload_id + suffix)
+
+
+def _lock(upload_id: str) -> asyncio.Lock:
+    return _locks.setdefault(upload_id, asyncio.Lock())
+
+
+def _read_meta(upload_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_staging_path(upload_id, ".json"), encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+    except FileNotFoundError:
+        return None
+    try:
+        meta["offset"] = os.path.getsize(_staging_path(upload_id, ".part"))
+    except FileNotFoundError:
+        return None
+    return meta
+
+
+def _status(meta: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "upload_id": meta["upload_id"],
+        "lesson_id": meta["lesson_id"],
+        "filename": meta["filename"],
+        "size": meta["size"],
+        "offset": meta["offset"],
+        "max_chunk_size": config.VIDEO_UPLOAD_MAX_CHUNK_BYTES,
+    }
+
+
+async def get_upload(lesson_id: str, upload_id: str, user_id: str) -> Dict[str, Any]:
+    """The upload's description; other users' uploads are reported as not found"""
+    meta = await asyncio.to_thread(_read_meta, upload_id)
+    if meta is None or meta["lesson_id"] != lesson_id or meta.get("created_by") != user_id:
+        raise UploadError(404, "Upload not found")
+    return meta
+
+
+async def upload_status(lesson_id: str, upload_id: str, user_id: str) -> Dict[str, Any]:
+    return _status(await get_upload(lesson_id, upload_id, user_id))
+
+
+def _create_files(meta: Dict[str, Any]):
+    os.makedirs(config.VIDEO_UPLOAD_STAGING_DIR, exist_ok=True)
+    open(_staging_path(meta["upload_id"], ".part"), "xb").close()
+    with open(_staging_path(meta["upload_id"], ".json"), "w", encoding="utf-8") as meta_file:
+        json.dump(meta, meta_file)
+
+
+async def init_upload(lesson_id: str, filename: str, size: int, user_id: str) -> Dict[str, Any]:
+    """Start an upload of size bytes for the lesson's video"""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in VIDEO_EXTENSIONS:
+        raise UploadError(400, f"Video must be one of: {', '.join(VIDEO_EXTENSIONS)}")
+    if size <= 0 or size > config.VIDEO_UPLOAD_MAX_BYTES:
+        raise UploadError(413 if size > 0 else 400,
+                          f"Video size must be between 1 and {config.VIDEO_UPLOAD_MAX_BYTES} bytes")
+    meta = {
+        "upload_id": uuid.uuid4().hex,
+        "lesson_id": lesson_id,
+        "filename": os.path.basename(filename),
+        "extension": extension,
+        "size": size,
+        "created_by": user_id,
+        "created_at": time.time(),
+    }
+    await asyncio.to_thread(_create_files, meta)
+    meta["offset"] = 0
+    return _status(meta)
+
+
+async def append_chunk(lesson_id: str, upload_id: str, user_id: str, offset: int,
+                       chunks: AsyncIterator[bytes], max_chunk: Optional[int] = None) -> Dict[str, Any]:
+    """Write the streamed chunk at offset, which must be the upload's current offset"""
+    max_chunk = max_chunk or config.VIDEO_UPLOAD_MAX_CHUNK_BYTES
+    async with _lock(upload_id):
+        meta = await get_upload(lesson_id, upload_id, user_id)
+        if offset != meta["offset"]:
+            raise UploadError(409, "Offset does not match the uploaded size", offset=meta["offset"])
+        limit = min(meta["size"] - offset, max_chunk)
+        part = await asyncio.to_thread(open, _staging_path(upload_id, ".part"), "ab")
+        written = 0
+        buffer = bytearray()
+        too_large = False
+        try:
+            async for data in chunks:
+                if written + len(buffer) + len(data) > limit:
+                    too_large = True
+                    break
+                buffer += data
+                if len(buffer) >= WRITE_BUFFER_SIZE:
+                    await asyncio.to_thread(part.write, buffer)
+                    written += len(buffer)
+                    buffer = bytearray()
+        finally:
+            # Keep what arrived before a disconnect or error; the client resumes from it
+            if buffer:
+                await asyncio.to_thread(part.write, buffer)
+                written += len(buffer)
+            await asyncio.to_thread(part.close)
+        if too_large:
+            # Raised after the flush so Upload-Offset is the size of the .part file
+            raise UploadError(413, f"Chunk exceeds the remaining size or {max_chunk} bytes",
+                              offset=offset + written)
+        meta["offset"] = offset + written
+        return _status(meta)
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as video:
+        for block in iter(lambda: video.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _finalize(upload_id: str, target_name: str) -> str:
+    os.makedirs(config.VIDEO_UPLOAD_DIR, exist_ok=True)
+    target = os.path.join(config.VIDEO_UPLOAD_DIR, target_name)
+    os.replace(_staging_path(upload_id, ".part"), target)
+    os.remove(_staging_path(upload_id, ".json"))
+    return target
+
+
+async def complete_upload(lesson_id: str, upload_id: str, user_id: str,
+                          sha256: Optional[str] = None) -> Dict[str, Any]:
+    """Verify the upload and move it into place; returns the file path and its video_url"""
+    async with _lock(upload_id):
+        meta = await get_upload(lesson_id, upload_id, user_id)
+        if meta["offset"] != meta["size"]:
+            raise UploadError(409, "Upload is incomplete", offset=meta["offset"])
+        checksum = await asyncio.to_thread(_sha256, _staging_path(upload_id, ".part"))
+        if sha256 is not None and sha256.lower() != checksum:
+            raise UploadError(422, "Checksum mismatch")
+        target_name = f"{lesson_id}_{upload_id}{meta['extension']}"
+        file_path = await asyncio.to_thread(_finalize, upload_id, target_name)
+    _locks.pop(upload_id, None)
+    return {"file_path": file_path, "video_url": VIDEO_URL_PREFIX + target_name,
+            "size": meta["size"], "sha256": checksum}
+
+
+def _remove_staged(upload_id: str):
+    for suffix in (".part", ".json"):
+        try:
+            os.remove(_staging_path(upload_id, suffix))
+        except FileNotFoundError:
+            pass
+
+
+async def abort_upload(lesson_id: str, upload_id: str, user_id: str):
+    async with _lock(upload_id):
+        await get_upload(lesson_id, upload_id, user_id)
+        await asyncio.to_thread(_remove_staged, upload_id)
+    _locks.pop(upload_id, None)
+
+
+def _remove_video_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def remove_video(video_url: Optional[str]):
+    """Delete a video stored by complete_upload(); URLs pointing elsewhere are left alone"""
+    if not video_url or not video_url.startswith(VIDEO_URL_PREFIX):
+        return
+    name = os.path.basename(video_url)
+    await asyncio.to_thread(_remove_video_file, os.path.join(config.VIDEO_UPLOAD_DIR, name))
+
+
+def _purge_stale(max_age_seconds: float) -> Tuple[int, Set[str]]:
+    """Remove stale uploads; returns how many and the ids of the uploads left"""
+    try:
+        names = os.listdir(config.VIDEO_UPLOAD_STAGING_DIR)
+    except FileNotFoundError:
+        return 0, set()
+    cutoff = time.time() - max_age_seconds
+    purged = 0
+    live = set()
+    for name in names:
+        upload_id, extension = os.path.splitext(name)
+        if extension != ".json" or not _UPLOAD_ID.match(upload_id):
+            continue
+        # An upload is stale when nothing has been appended for max_age_seconds
+        paths = [_staging_path(upload_id, ".json"), _staging_path(upload_id, ".part")]
+        if max((os.path.getmtime(path) for path in paths if os.path.exists(path)), default=0) < cutoff:
+            _remove_staged(upload_id)
+            purged += 1
+        else:
+            live.add(upload_id)
+    return purged, live
+
+
+async def purge_stale_uploads(max_age_seconds: Optional[float] = None) -> int:
+    """Delete staged uploads abandoned for longer than VIDEO_UPLOAD_STALE_HOURS; returns how many"""
+    if max_age_seconds is None:
+        max_age_seconds = config.VIDEO_UPLOAD_STALE_HOURS * 3600
+    purged, live = await asyncio.to_thread(_purge_stale, max_age_seconds)
+    # Drop the locks of uploads that are gone: purged, or requested but never staged
+    for upload_id in [upload_id for upload_id, lock in _locks.items()
+                      if upload_id not in live and not lock.locked()]:
+        del _locks[upload_id]
+    return purged
@@ -0,0 +1,48 @@
+"""Admin listings paged inside Mongo (routes/admin.py)."""
+from bson import ObjectId
+
+
+def test_enrollments_page_and_total(client, sync_db, make_user):
+    _, headers = make_user("admin")
+    user_id = sync_db.users.insert_one({"name": "Student", "email": "s@example.com", "role": "student"}).inserted_id
+    course_id = sync_db.courses.insert_one({"title": "Course"}).inserted_id
+    sync_db.enrollments.insert_many([
+        {"user_id": user_id, "course_id": course_id if i else ObjectId(), "progress": i} for i in range(25)
+    ])
+
+    first = client.get("/admin/enrollments?page=1&limit=10", headers=headers).json()
+    last = client.get("/admin/enrollments?page=3&limit=10", headers=headers).json()
+
+    assert first["pagination"] == {"page": 1, "limit": 10, "total": 25, "pages": 3}
+    assert [e["progress"] for e in first["enrollments"]] == list(range(10))
+    assert [e["progress"] for e in last["enrollments"]] == list(range(20, 25))
+    assert first["enrollments"][0]["course_title"] == "Unknown"
+    assert first["enrollments"][1]["course_title"] == "Course"
+    assert first["enrollments"][1]["user_name"] == "Student"
+    assert "_id" not in first["enrollments"][0]
+
+
+def test_payments_page_past_the_end(client, sync_db, make_user):
+    _, headers = make_user("admin")
+    sync_db.payments.insert_many([{"user_id": ObjectId(), "amount": i} for i in range(3)])
+
+    body = client.get("/admin/payments?page=2&limit=3&approximate_total=true", headers=headers).json()
+    assert body["payments"] == []
+    assert body["pagination"]["total"] == 3
+
+
+def test_user_total_follows_the_filters(client, sync_db, make_user):
+    admin_id, headers = make_user("admin")
+    sync_db.users.insert_many([
+        {"name": f"Student {i}", "email": f"s{i}@example.com", "role": "student", "is_active": i % 2 == 0}
+        for i in range(5)
+    ])
+
+    body = client.get("/admin/users?role=student&is_active=true&limit=2", headers=headers).json()
+    assert body["pagination"]["total"] == 3
+    assert body["pagination"]["pages"] == 2
+    assert len(body["users"]) == 2
+
+    everyone = client.get("/admin/users?approximate_total=true", headers=headers).json()
+    assert everyone["pagination"]["total"] == 6
+    assert admin_id in {user["id"] for user in everyone["users"]}
@@ -0,0 +1,39 @@
+"""Shared async MongoDB access (database/async_fallback.py)."""
+import pytest
+
+
+@pytest.mark.anyio
+async def test_threaded_collection_round_trip(db):
+    result = await db.courses.insert_one({"title": "Python", "price": 10})
+    found = await db.courses.find_one({"_id": result.inserted_id})
+    assert found["title"] == "Python"
+    assert await db.courses.count_documents({}) == 1
+
+
+@pytest.mark.anyio
+async def test_cursor_chaining_and_to_list(db):
+    await db.courses.insert_many([{"title": f"Course {i}", "rank": i} for i in range(5)])
+    docs = await db.courses.find({}, {"rank": 1}).sort("rank", -1).skip(1).limit(2).to_list(length=None)
+    assert [doc["rank"] for doc in docs] == [3, 2]
+    assert len(await db.courses.find().to_list(length=3)) == 3
+
+
+@pytest.mark.anyio
+async def test_async_iteration_crosses_batches(db):
+    await db.users.insert_many([{"n": i, "email": f"u{i}@example.com"} for i in range(250)])
+    seen = [doc["n"] async for doc in db.users.find().sort("n", 1)]
+    assert seen == list(range(250))
+
+
+@pytest.mark.anyio
+async def test_aggregate_opens_lazily(db):
+    await db.payments.insert_many([{"amount": 5}, {"amount": 7}])
+    cursor = db.payments.aggregate([{"$group": {"_id": None, "total": {"$sum": "$amount"}}}])
+    await db.payments.insert_one({"amount": 100})  # the pipeline has not run yet
+    assert (await cursor.to_list(length=None))[0]["total"] == 112
+
+
+def test_private_attributes_are_not_collections(db):
+    with pytest.raises(AttributeError):
+        db._secret
+    assert db.users.name == "users"
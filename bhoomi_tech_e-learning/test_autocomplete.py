@@ -0,0 +1,103 @@
+"""Typeahead over the sorted prefix index (search.PrefixIndex)."""
+import asyncio
+
+import pytest
+
+import search
+from search import PrefixIndex, SearchIndex
+
+
+def users_index(*docs):
+    index = PrefixIndex("users", "name", ("email",), attributes=("role",))
+    for doc in docs:
+        index.add(doc)
+    return index
+
+
+def ids(suggestions):
+    return [suggestion["id"] for suggestion in suggestions]
+
+
+def test_keys_are_the_value_and_its_word_tails():
+    assert PrefixIndex._keys("  Ada   Lovelace ") == [("ada lovelace", 0), ("lovelace", 1)]
+    assert PrefixIndex._keys(None) == []
+
+
+def test_whole_value_matches_come_first():
+    index = users_index(
+        {"_id": "grace", "name": "Grace Hopper", "email": "grace@example.com", "role": "admin"},
+        {"_id": "ada", "name": "Ada Lovelace", "email": "ada@example.com", "role": "student"},
+        {"_id": "alan", "name": "Alan Hopkins", "email": "turing@example.com", "role": "student"},
+    )
+    assert ids(index.complete("hop")) == ["alan", "grace"]
+    assert ids(index.complete("g")) == ["grace"]
+    assert ids(index.complete("TURING")) == ["alan"]
+    assert ids(index.complete("a")) == ["ada", "alan"]
+    assert ids(index.complete("hop", {"role": "admin"})) == ["grace"]
+    assert ids(index.complete("hop", {"role": None}, limit=1)) == ["alan"]
+    assert index.complete("   ") == []
+    assert index.complete("ada")[0] == {"id": "ada", "label": "Ada Lovelace", "email": "ada@example.com"}
+
+
+def test_re_adding_and_removing_documents():
+    index = users_index({"_id": "1", "name": "Old Name"})
+    index.add({"_id": "1", "name": "New Name"})
+    assert index.complete("old") == []
+    assert ids(index.complete("name")) == ["1"]
+    index.remove("1")
+    assert index.complete("n") == []
+    assert index.stats()["keys"] == 0
+
+
+def test_scan_is_capped(monkeypatch):
+    monkeypatch.setattr(search, "MAX_COMPLETION_SCAN", 5)
+    index = users_index(*({"_id": str(i), "name": f"Sam Number{i:02d}"} for i in range(20)))
+    # Only the first five "number..." tails are looked at
+    assert len(index.complete("number", limit=10)) == 5
+
+
+@pytest.mark.anyio
+async def test_bulk_rebuild_matches_incremental_adds(db):
+    docs = [{"name": f"User {i} {word}", "email": f"u{i}@example.com", "role": "student"}
+            for i, word in enumerate(["alpha", "beta", "gamma", "alpha beta", "delta"] * 20)]
+    await db.users.insert_many(docs)
+
+    built = users_index()
+    await built.rebuild(db)
+    incremental = users_index(*docs)
+    assert built._entries == incremental._entries
+    assert built._payloads == incremental._payloads
+
+    built_search = SearchIndex("users", {"name": 3.0, "email": 2.0})
+    await built_search.rebuild(db)
+    incremental_search = SearchIndex("users", {"name": 3.0, "email": 2.0})
+    for doc in docs:
+        incremental_search.add(doc)
+    assert built_search._terms == incremental_search._terms
+    assert built_search._postings == incremental_search._postings
+
+
+@pytest.mark.anyio
+async def test_stale_documents_reload_in_the_background(db):
+    index = users_index()
+    await index.rebuild(db)
+    user = (await db.users.insert_one({"name": "Linus", "email": "l@example.com"})).inserted_id
+    index.mark_stale(user)
+    assert index.complete("lin") == []
+    await index._refresh_task
+    assert ids(index.complete("lin")) == [str(user)]
+
+
+def test_autocomplete_endpoint(client, make_user, monkeypatch):
+    _, student = make_user("student")
+    _, admin = make_user("admin")
+
+    assert client.get("/autocomplete?type=user&q=zed", headers=admin).status_code == 200
+    # User suggestions carry email addresses
+    assert client.get("/autocomplete?type=user&q=zed", headers=student).status_code == 403
+    assert client.get("/autocomplete?type=course&q=zed", headers=student).status_code == 200
+
+    monkeypatch.setattr(search.course_autocomplete, "ready", False)
+    response = client.get("/autocomplete?type=course&q=zed", headers=student)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
@@ -0,0 +1,65 @@
+"""In-process TTL/LRU caches with tag invalidation (cache.py)."""
+from bson import ObjectId
+
+import cache
+from cache import TTLCache
+
+
+def test_lru_eviction():
+    lru = TTLCache(maxsize=2, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == (True, 1)
+    lru.set("c", 3)
+    assert lru.get("b") == (False, None)
+    assert lru.get("a") == (True, 1)
+    assert lru.stats()["evictions"] == 1
+
+
+def test_entries_expire(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: clock[0])
+    ttl = TTLCache(ttl=10)
+    ttl.set("a", 1, ["tag"])
+    clock[0] += 10
+    assert ttl.get("a") == (True, 1)
+    clock[0] += 0.1
+    assert ttl.get("a") == (False, None)
+    assert ttl.stats()["entries"] == 0
+    assert ttl._tags == {}
+
+
+def test_invalidate_drops_only_tagged_entries():
+    tagged = TTLCache()
+    tagged.set("list", "L", ["courses"])
+    tagged.set("detail:1", "D1", ["course:1"])
+    tagged.set("detail:2", "D2", ["course:2"])
+    assert tagged.invalidate("courses", "course:1", "course:9") == 2
+    assert tagged.get("detail:2") == (True, "D2")
+    assert tagged.get("list") == (False, None)
+    # Replacing an entry drops its old tags
+    tagged.set("detail:2", "D2'", ["other"])
+    assert tagged.invalidate("course:2") == 0
+    assert tagged.get("detail:2") == (True, "D2'")
+
+
+def test_zero_maxsize_disables_caching():
+    disabled = TTLCache(maxsize=0)
+    disabled.set("a", 1)
+    assert disabled.get("a") == (False, None)
+
+
+def test_course_detail_is_served_from_cache_until_a_write(client, sync_db, make_user):
+    instructor_id, headers = make_user("instructor")
+    course_id = str(sync_db.courses.insert_one({
+        "title": "Before", "description": "D", "instructor_id": instructor_id, "is_active": True,
+    }).inserted_id)
+
+    assert client.get(f"/courses/{course_id}").json()["title"] == "Before"
+    # Written behind the application's back: the cached body is still served
+    sync_db.courses.update_one({"_id": ObjectId(course_id)}, {"$set": {"title": "Behind"}})
+    assert client.get(f"/courses/{course_id}").json()["title"] == "Before"
+
+    response = client.put(f"/courses/{course_id}", json={"title": "After"}, headers=headers)
+    assert response.status_code == 200
+    assert client.get(f"/courses/{course_id}").json()["title"] == "After"
@@ -0,0 +1,131 @@
+"""Response compression and precompressed static assets (compression.py, static_assets.py)."""
+import gzip
+import json
+import os
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.testclient import TestClient
+
+import static_assets
+from compression import CompressionMiddleware, negotiate_encoding
+
+BIG = {"items": ["x" * 40] * 100}
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("gzip, br", ("br", "gzip")) == "br"
+    assert negotiate_encoding("br;q=0, gzip;q=0.5", ("br", "gzip")) == "gzip"
+    assert negotiate_encoding("*", ("gzip",)) == "gzip"
+    assert negotiate_encoding("*, gzip;q=0", ("gzip",)) is None
+    assert negotiate_encoding("identity", ("gzip",)) is None
+    assert negotiate_encoding("gzip;q=oops", ("gzip",)) is None
+    assert negotiate_encoding("", ("gzip",)) is None
+
+
+async def big(request):
+    return JSONResponse(BIG, headers={"ETag": '"v1"', "Accept-Ranges": "bytes", "Vary": "Origin"})
+
+
+async def small(request):
+    return JSONResponse({"ok": True})
+
+
+async def png(request):
+    return Response(b"\x89PNG" * 1000, media_type="image/png")
+
+
+async def already_gzipped(request):
+    return Response(gzip.compress(b"a,b\n" * 1000), media_type="text/csv",
+                    headers={"Content-Encoding": "gzip"})
+
+
+async def streamed(request):
+    async def rows():
+        for i in range(500):
+            yield f'{{"row": {i}}}\n'.encode()
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
+async def not_modified(request):
+    return Response(status_code=304, headers={"ETag": '"v1"'})
+
+
+@pytest.fixture
+def compressing_client():
+    app = Starlette(routes=[
+        Route("/big", big), Route("/small", small), Route("/png", png),
+        Route("/gzipped", already_gzipped), Route("/stream", streamed), Route("/304", not_modified),
+    ])
+    return TestClient(CompressionMiddleware(app, minimum_size=500))
+
+
+def test_large_json_is_gzipped(compressing_client):
+    response = compressing_client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == BIG
+    assert int(response.headers["content-length"]) < len(json.dumps(BIG))
+    assert response.headers["etag"] == 'W/"v1"'
+    assert response.headers["vary"] == "Origin, Accept-Encoding"
+    assert "accept-ranges" not in response.headers
+
+
+def test_identity_when_not_accepted(compressing_client):
+    response = compressing_client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"v1"'
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+@pytest.mark.parametrize("path", ["/small", "/png", "/304"])
+def test_left_alone(compressing_client, path):
+    response = compressing_client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_encoded_bodies_pass_through(compressing_client):
+    response = compressing_client.get("/gzipped", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == b"a,b\n" * 1000
+
+
+def test_streams_are_compressed_chunk_by_chunk(compressing_client):
+    response = compressing_client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert len(response.text.splitlines()) == 500
+
+
+def test_build_and_serve_hashed_precompressed_assets(tmp_path):
+    source = tmp_path / "admin-frontend"
+    source.mkdir()
+    (source / "app.js").write_text("console.log('admin');\n" * 100)
+    (source / "styles.css").write_text("body{}")
+    (source / "index.html").write_text('<script src="app.js?v=1"></script><link href="styles.css">'
+                                       '<a href="https://example.com/app.js">x</a>')
+
+    manifest = static_assets.build(str(source))
+    dist = source / "dist"
+    assert static_assets.served_directory(str(source)) == str(dist)
+    hashed_js = manifest["app.js"]
+    html = (dist / "index.html").read_text()
+    assert f'src="{hashed_js}"' in html and f'href="{manifest["styles.css"]}"' in html
+    assert 'href="https://example.com/app.js"' in html
+    assert os.path.exists(dist / f"{hashed_js}.gz")
+    # Too small to be worth a variant
+    assert not os.path.exists(dist / f"{manifest['styles.css']}.gz")
+
+    client = TestClient(Starlette(routes=[
+        Mount("/static", static_assets.PrecompressedStaticFiles(directory=str(dist)))
+    ]))
+    response = client.get(f"/static/{hashed_js}", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == static_assets.IMMUTABLE
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == (source / "app.js").read_text()
+
+    page = client.get("/static/index.html", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in page.headers
+    assert page.headers["cache-control"] == "no-cache"
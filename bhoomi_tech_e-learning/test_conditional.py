@@ -0,0 +1,63 @@
+"""Conditional GETs answered with 304 (conditional.py)."""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from cache import response_cache
+
+
+@pytest.fixture
+def course(client, make_user):
+    _, headers = make_user("instructor")
+    response = client.post("/courses/", json={"title": "C", "description": "D"}, headers=headers)
+    return response.json()["id"], headers
+
+
+def test_etag_revalidation(client, course):
+    course_id, headers = course
+    first = client.get(f"/courses/{course_id}")
+    etag = first.headers["etag"]
+    assert etag == f'"course-{course_id}-v1"'
+    assert first.headers["cache-control"] == "no-cache"
+
+    # If-None-Match uses the weak comparison
+    for header in (etag, f'"other", {etag}', f"W/{etag}", "*"):
+        response = client.get(f"/courses/{course_id}", headers={"If-None-Match": header})
+        assert response.status_code == 304, header
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+    assert client.get(f"/courses/{course_id}", headers={"If-None-Match": '"other"'}).status_code == 200
+
+    # Decided before rendering on a cache miss as well
+    response_cache.clear()
+    assert client.get(f"/courses/{course_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(f"/courses/{course_id}", json={"title": "Edited"}, headers=headers)
+    edited = client.get(f"/courses/{course_id}", headers={"If-None-Match": etag})
+    assert edited.status_code == 200
+    assert edited.headers["etag"] != etag
+
+
+def test_if_modified_since(client, course):
+    course_id, _ = course
+    last_modified = client.get(f"/courses/{course_id}").headers["last-modified"]
+    assert client.get(f"/courses/{course_id}", headers={"If-Modified-Since": last_modified}).status_code == 304
+
+    earlier = format_datetime(datetime.now(timezone.utc) - timedelta(days=1), usegmt=True)
+    assert client.get(f"/courses/{course_id}", headers={"If-Modified-Since": earlier}).status_code == 200
+    assert client.get(f"/courses/{course_id}", headers={"If-Modified-Since": "yesterday"}).status_code == 200
+    # If-None-Match wins over If-Modified-Since
+    response = client.get(f"/courses/{course_id}",
+                          headers={"If-Modified-Since": last_modified, "If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+def test_listing_etag_follows_its_items(client, course):
+    course_id, headers = course
+    etag = client.get("/courses/").headers["etag"]
+    assert "last-modified" not in client.get("/courses/").headers
+    assert client.get("/courses/", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(f"/courses/{course_id}", json={"description": "New"}, headers=headers)
+    assert client.get("/courses/", headers={"If-None-Match": etag}).status_code == 200
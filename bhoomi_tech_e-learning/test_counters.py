@@ -0,0 +1,80 @@
+"""Denormalized enrollment and lesson counters (database/counters.py)."""
+import pytest
+from bson import ObjectId
+
+from database.counters import adjust_enrollment_counts, reconcile_counters, with_lesson_count
+
+
+def test_with_lesson_count():
+    assert with_lesson_count({"lessons": ["a", "b"]})["lesson_count"] == 2
+    assert "lesson_count" not in with_lesson_count({"title": "only the title changed"})
+
+
+@pytest.mark.anyio
+async def test_adjust_accepts_either_id_form(db):
+    user_id = (await db.users.insert_one({"email": "u@example.com"})).inserted_id
+    course_id = (await db.courses.insert_one({"title": "C", "version": 1})).inserted_id
+
+    await adjust_enrollment_counts(str(user_id), course_id, 1)
+    await adjust_enrollment_counts(user_id, str(course_id), 1)
+    await adjust_enrollment_counts("not-an-id", None, 1)
+
+    assert (await db.users.find_one({"_id": user_id}))["enrollment_count"] == 2
+    course = await db.courses.find_one({"_id": course_id})
+    assert course["enrollment_count"] == 2
+    assert course["version"] == 3
+
+
+def test_enroll_and_unenroll_move_the_counters(client, sync_db, make_user):
+    student_id, headers = make_user("student")
+    course_id = str(sync_db.courses.insert_one({"title": "C", "is_active": True}).inserted_id)
+
+    response = client.post("/enrollments/", json={"id": None, "user_id": student_id, "course_id": course_id},
+                           headers=headers)
+    assert response.status_code == 200
+    assert sync_db.users.find_one({"_id": ObjectId(student_id)})["enrollment_count"] == 1
+    assert sync_db.courses.find_one({"_id": ObjectId(course_id)})["enrollment_count"] == 1
+
+    assert client.delete(f"/enrollments/{response.json()['id']}", headers=headers).status_code == 200
+    assert sync_db.users.find_one({"_id": ObjectId(student_id)})["enrollment_count"] == 0
+    assert sync_db.courses.find_one({"_id": ObjectId(course_id)})["enrollment_count"] == 0
+
+
+def test_admin_details_read_the_counters(client, sync_db, make_user):
+    _, headers = make_user("admin")
+    user_id = sync_db.users.insert_one({"name": "S", "email": "s@example.com", "enrollment_count": 4}).inserted_id
+    course_id = sync_db.courses.insert_one({"title": "C", "instructor_id": user_id, "enrollment_count": 7}).inserted_id
+    # Counters win over the enrollments collection, which is not read
+    sync_db.enrollments.insert_one({"user_id": user_id, "course_id": course_id})
+
+    assert client.get(f"/admin/users/{user_id}", headers=headers).json()["enrollments"] == 4
+    assert client.get(f"/admin/courses/{course_id}", headers=headers).json()["total_enrollments"] == 7
+
+
+@pytest.mark.anyio
+async def test_reconcile_repairs_drift(db):
+    user_id = (await db.users.insert_one({"email": "u@example.com", "enrollment_count": 9})).inserted_id
+    course_id = (await db.courses.insert_one({
+        "title": "C", "lessons": ["a", "b", "c"], "lesson_count": 1, "version": 1,
+    })).inserted_id
+    untouched = (await db.courses.insert_one({"title": "Empty", "enrollment_count": 0, "lesson_count": 0,
+                                              "version": 1})).inserted_id
+    await db.enrollments.insert_many([
+        {"user_id": user_id, "course_id": str(course_id)},
+        {"user_id": str(user_id), "course_id": course_id},
+        {"user_id": "deleted-user", "course_id": course_id},
+    ])
+
+    summary = await reconcile_counters()
+    assert summary["users.enrollment_count"] == 1
+    assert summary["courses.enrollment_count"] == 1
+    assert summary["courses.lesson_count"] == 1
+
+    assert (await db.users.find_one({"_id": user_id}))["enrollment_count"] == 2
+    course = await db.courses.find_one({"_id": course_id})
+    assert (course["enrollment_count"], course["lesson_count"]) == (3, 3)
+    assert course["version"] > 1
+    assert (await db.courses.find_one({"_id": untouched}))["version"] == 1
+
+    again = await reconcile_counters()
+    assert set(again.values()) == {0}
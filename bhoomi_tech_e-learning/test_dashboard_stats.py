@@ -0,0 +1,60 @@
+"""Dashboard statistics from $facet queries and the admin_stats document."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from database.repositories.admin_repository import DASHBOARD_STATS_ID, AdminRepository
+
+
+@pytest.mark.anyio
+async def test_counts_from_facets(db):
+    now = datetime.now(timezone.utc)
+    await db.users.insert_many([
+        {"email": "a@example.com", "is_active": True, "created_at": now},
+        {"email": "b@example.com", "is_active": True, "created_at": now - timedelta(days=30)},
+        {"email": "c@example.com", "is_active": False, "created_at": now - timedelta(days=30)},
+        {"email": "d@example.com"},
+    ])
+    await db.courses.insert_one({"title": "C", "is_active": False, "created_at": now})
+    await db.enrollments.insert_many([{"n": 1}, {"n": 2}])
+    await db.payments.insert_many([{"amount": 10}, {"amount": 5.5}])
+
+    stats = await AdminRepository.compute_dashboard_stats()
+    assert stats == {
+        "total_users": 4, "active_users": 2, "inactive_users": 1,
+        "total_courses": 1, "published_courses": 0, "unpublished_courses": 1,
+        "total_enrollments": 2, "total_payments": 15.5,
+        "new_users_this_week": 1, "new_courses_this_week": 1,
+    }
+
+
+@pytest.mark.anyio
+async def test_empty_collections_count_zero(db):
+    stats = await AdminRepository.compute_dashboard_stats()
+    assert set(stats.values()) == {0}
+
+
+@pytest.mark.anyio
+async def test_materialized_stats_until_they_are_stale(db):
+    stats = await AdminRepository.get_dashboard_stats(max_age_seconds=60)
+    assert stats["total_users"] == 0
+    await db.users.insert_one({"email": "a@example.com"})
+
+    # Fresh enough: served from admin_stats
+    assert (await AdminRepository.get_dashboard_stats(max_age_seconds=60))["total_users"] == 0
+    # max_age_seconds=0 always computes
+    assert (await AdminRepository.get_dashboard_stats())["total_users"] == 1
+
+    await db.admin_stats.update_one(
+        {"_id": DASHBOARD_STATS_ID},
+        {"$set": {"refreshed_at": datetime.now(timezone.utc) - timedelta(seconds=61)}})
+    assert (await AdminRepository.get_dashboard_stats(max_age_seconds=60))["total_users"] == 1
+    doc = await db.admin_stats.find_one({"_id": DASHBOARD_STATS_ID})
+    assert doc["stats"]["total_users"] == 1
+
+
+def test_dashboard_endpoint(client, make_user):
+    _, headers = make_user("admin")
+    response = client.get("/admin/dashboard?fresh=true", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["stats"]["total_users"] == 1
@@ -0,0 +1,115 @@
+"""Grading from cached answer keys (grading.py) and bulk grading."""
+import pytest
+from bson import ObjectId
+
+from cache import invalidate_quiz
+from database.repositories.quiz_repository import QuizRepository
+from grading import AnswerKey, get_answer_key, percentage
+
+QUESTIONS = [
+    {"question": "1 + 1", "options": ["1", "2"], "answer": "2"},
+    {"question": "Capital of France", "options": ["Paris", "Rome"], "answer": "Paris"},
+    {"question": "2 * 3", "options": ["5", "6"], "answer": "6"},
+]
+
+
+def test_correct_flags():
+    key = AnswerKey("quiz", QUESTIONS)
+    assert key.total_questions == 3
+    assert key.correct_flags(["2", "Paris", "6"]) == [True, True, True]
+    assert key.correct_flags(["2", "paris", "5"]) == [True, False, False]
+    # Missing answers are wrong; answers past the last question are ignored
+    assert key.correct_flags(["2"]) == [True, False, False]
+    assert key.correct_flags(["2", "Paris", "6", "extra"]) == [True, True, True]
+    assert AnswerKey("empty", []).correct_flags(["x"]) == []
+
+
+def test_percentage():
+    assert percentage(1, 4) == 25
+    assert percentage(0, 0) == 0
+
+
+@pytest.fixture
+def key_loads(monkeypatch):
+    calls = []
+    find_answer_key = QuizRepository.find_answer_key
+
+    async def counting(quiz_id):
+        calls.append(quiz_id)
+        return await find_answer_key(quiz_id)
+    monkeypatch.setattr(QuizRepository, "find_answer_key", staticmethod(counting))
+    return calls
+
+
+@pytest.mark.anyio
+async def test_answer_key_is_compiled_once_per_write(db, key_loads):
+    quiz_id = str((await db.quizzes.insert_one({"course_id": "c", "questions": QUESTIONS})).inserted_id)
+    first = await get_answer_key(quiz_id)
+    assert first.answers == ("2", "Paris", "6")
+    assert await get_answer_key(quiz_id) is first
+    assert len(key_loads) == 1
+
+    await db.quizzes.update_one({"_id": ObjectId(quiz_id)}, {"$set": {"questions.0.answer": "3"}})
+    invalidate_quiz(quiz_id)
+    assert (await get_answer_key(quiz_id)).answers[0] == "3"
+    assert len(key_loads) == 2
+
+
+@pytest.mark.anyio
+async def test_missing_quiz_is_not_cached(db, key_loads):
+    quiz_id = str(ObjectId())
+    assert await get_answer_key(quiz_id) is None
+    await db.quizzes.insert_one({"_id": ObjectId(quiz_id), "questions": QUESTIONS})
+    assert (await get_answer_key(quiz_id)).total_questions == 3
+
+
+@pytest.fixture
+def quiz(sync_db):
+    return str(sync_db.quizzes.insert_one({"course_id": "c", "questions": QUESTIONS}).inserted_id)
+
+
+def test_submit(client, sync_db, make_user, quiz):
+    user_id, headers = make_user("student")
+    response = client.post(f"/quizzes/{quiz}/submit", json={"quiz_id": quiz, "answers": ["2", "Rome"]},
+                           headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["correct_answers"], body["total_questions"], round(body["score"], 2)) == (1, 3, 33.33)
+    stored = sync_db.quiz_results.find_one({"_id": ObjectId(body["id"])})
+    assert stored["question_correct"] == [True, False, False]
+    assert stored["user_id"] == user_id
+
+    missing = str(ObjectId())
+    assert client.post(f"/quizzes/{missing}/submit", json={"quiz_id": missing, "answers": []},
+                       headers=headers).status_code == 404
+
+
+def test_grade_batch(client, sync_db, make_user, quiz):
+    instructor_id, headers = make_user("instructor")
+    submissions = [{"user_id": "u1", "answers": ["2", "Paris", "6"]}, {"user_id": "u2", "answers": []}]
+
+    preview = client.post(f"/quizzes/{quiz}/grade-batch", json={"submissions": submissions, "save": False},
+                          headers=headers).json()
+    assert [r["correct_answers"] for r in preview["results"]] == [3, 0]
+    assert "id" not in preview["results"][0]
+    assert sync_db.quiz_results.count_documents({}) == 0
+
+    saved = client.post(f"/quizzes/{quiz}/grade-batch", json={"submissions": submissions}, headers=headers).json()
+    assert saved["graded"] == 2
+    stored = sync_db.quiz_results.find_one({"_id": ObjectId(saved["results"][0]["id"])})
+    assert stored["graded_by"] == instructor_id
+    assert stored["question_correct"] == [True, True, True]
+
+    _, student = make_user("student")
+    assert client.post(f"/quizzes/{quiz}/grade-batch", json={"submissions": submissions},
+                       headers=student).status_code == 403
+    assert client.post(f"/quizzes/{quiz}/grade-batch", json={"submissions": []}, headers=headers).status_code == 422
+
+
+def test_deleting_a_quiz_drops_its_answer_key(client, make_user, quiz):
+    _, instructor = make_user("instructor")
+    _, student = make_user("student")
+    submit = {"quiz_id": quiz, "answers": ["2"]}
+    assert client.post(f"/quizzes/{quiz}/submit", json=submit, headers=student).status_code == 200
+    assert client.delete(f"/quizzes/{quiz}", headers=instructor).status_code == 200
+    assert client.post(f"/quizzes/{quiz}/submit", json=submit, headers=student).status_code == 404
@@ -0,0 +1,55 @@
+"""Declarative index registry (database/indexes.py)."""
+import pytest
+
+from database.async_fallback import ThreadedDatabase
+from database.indexes import INDEXES, ensure_indexes, index_report
+
+
+@pytest.fixture
+def scratch_db(sync_db):
+    """A database of its own, so the app's indexes do not count"""
+    database = sync_db.client.get_database(sync_db.name + "_indexes")
+    sync_db.client.drop_database(database.name)
+    yield ThreadedDatabase(database), database
+    sync_db.client.drop_database(database.name)
+
+
+@pytest.mark.anyio
+async def test_ensure_indexes_creates_every_declared_index(scratch_db):
+    database, raw = scratch_db
+    summary = await ensure_indexes(database)
+    for collection_name, models in INDEXES.items():
+        assert "error" not in summary[collection_name]
+        assert {model.document["name"] for model in models} <= set(raw[collection_name].index_information())
+
+
+@pytest.mark.anyio
+async def test_ensure_indexes_is_idempotent(scratch_db):
+    database, raw = scratch_db
+    await ensure_indexes(database)
+    before = {name: raw[name].index_information() for name in INDEXES}
+    summary = await ensure_indexes(database)
+    assert all("error" not in result for result in summary.values())
+    assert {name: raw[name].index_information() for name in INDEXES} == before
+
+
+@pytest.mark.anyio
+async def test_duplicate_emails_fail_only_the_users_collection(scratch_db):
+    database, raw = scratch_db
+    raw.users.insert_many([{"email": "same@example.com"}, {"email": "same@example.com"}])
+    summary = await ensure_indexes(database)
+    assert "error" in summary["users"]
+    assert "email_unique" not in raw.users.index_information()
+    assert "instructor_id" in raw.courses.index_information()
+
+
+@pytest.mark.requires_server
+@pytest.mark.anyio
+async def test_index_report_lists_missing_and_undeclared(scratch_db):
+    database, raw = scratch_db
+    await ensure_indexes(database)
+    raw.courses.drop_index("instructor_id")
+    raw.courses.create_index("title", name="title_adhoc")
+    report = await index_report(database)
+    assert report["courses"]["missing"] == ["instructor_id"]
+    assert report["courses"]["undeclared"] == ["title_adhoc"]
@@ -0,0 +1,61 @@
+"""Request-scoped batch loaders (database/loaders.py)."""
+import pytest
+from bson import ObjectId
+
+from database.loaders import Loaders
+
+
+class CountingDatabase:
+    """Counts find() calls per collection"""
+
+    def __init__(self, database):
+        self._database = database
+        self.finds = {}
+
+    def __getitem__(self, name):
+        outer, collection = self, self._database[name]
+
+        class Counting:
+            def find(self, *args, **kwargs):
+                outer.finds[name] = outer.finds.get(name, 0) + 1
+                return collection.find(*args, **kwargs)
+        return Counting()
+
+
+@pytest.mark.anyio
+async def test_load_many_uses_one_query_and_memoizes(db):
+    ids = (await db.users.insert_many([{"name": f"U{i}", "email": f"u{i}@example.com", "password": "hash"} for i in range(3)])).inserted_ids
+    counting = CountingDatabase(db)
+    loaders = Loaders(counting)
+
+    found = await loaders.users.load_many([ids[0], str(ids[1]), ids[0], None])
+    assert set(found) == {str(ids[0]), str(ids[1])}
+    assert counting.finds["users"] == 1
+    assert "password" not in found[str(ids[0])]
+
+    again = await loaders.users.load_many([str(ids[0]), ids[1]])
+    assert again[str(ids[1])]["name"] == "U1"
+    assert counting.finds["users"] == 1
+
+    await loaders.users.load(ids[2])
+    assert counting.finds["users"] == 2
+
+
+@pytest.mark.anyio
+async def test_unknown_and_invalid_ids_map_to_none(db):
+    counting = CountingDatabase(db)
+    loaders = Loaders(counting)
+    missing = ObjectId()
+    found = await loaders.courses.load_many([missing, "not-an-id"])
+    assert found == {str(missing): None, "not-an-id": None}
+    # A known miss is memoized too
+    await loaders.courses.load(missing)
+    assert counting.finds["courses"] == 1
+
+
+@pytest.mark.anyio
+async def test_projection_overrides(db):
+    oid = (await db.courses.insert_one({"title": "T", "description": "long"})).inserted_id
+    loaders = Loaders(db, projections={"courses": {"title": 1}})
+    course = await loaders.courses.load(oid)
+    assert course == {"_id": oid, "title": "T"}
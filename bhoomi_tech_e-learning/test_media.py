@@ -0,0 +1,138 @@
+"""Lesson media streaming with byte ranges (media.py)."""
+import os
+
+import pytest
+
+from config import config
+from media import FileHandleCache, local_media_path, parse_range
+
+VIDEO = bytes(range(256)) * 40  # 10240 bytes
+
+
+@pytest.mark.parametrize("header,expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 1023)),
+    ("bytes=-100", (924, 1023)),
+    ("bytes=-5000", (0, 1023)),
+    ("bytes=1000-5000", (1000, 1023)),
+    ("BYTES = 5-9", (5, 9)),
+    ("bytes=0-1,5-9", None),   # multi-range: the whole file
+    ("bytes=9-5", None),
+    ("bytes=a-b", None),
+    ("bytes=-", None),
+    ("bytes=5", None),
+    ("items=0-5", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1024) == expected
+
+
+@pytest.mark.parametrize("header,size", [("bytes=1024-", 1024), ("bytes=-0", 1024), ("bytes=-5", 0)])
+def test_unsatisfiable_ranges(header, size):
+    with pytest.raises(ValueError):
+        parse_range(header, size)
+
+
+def test_local_media_path():
+    assert local_media_path("/uploads/videos/a.mp4") == os.path.join(config.VIDEO_UPLOAD_DIR, "a.mp4")
+    assert local_media_path("/uploads/documents/notes.pdf") == os.path.join(config.DOCUMENT_UPLOAD_DIR, "notes.pdf")
+    for url in ("/uploads/videos/../secret", "/uploads/videos/", "/uploads/videos/..", "https://cdn/a.mp4", None):
+        assert local_media_path(url) is None
+
+
+@pytest.fixture
+def video(client, sync_db):
+    os.makedirs(config.VIDEO_UPLOAD_DIR, exist_ok=True)
+    name = f"{os.urandom(8).hex()}.mp4"
+    with open(os.path.join(config.VIDEO_UPLOAD_DIR, name), "wb") as target:
+        target.write(VIDEO)
+    lesson_id = sync_db.lessons.insert_one({"title": "L", "video_url": f"/uploads/videos/{name}"}).inserted_id
+    return f"/lessons/{lesson_id}/video"
+
+
+def test_whole_file(client, video):
+    response = client.get(video)
+    assert response.status_code == 200
+    assert response.content == VIDEO
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-type"] == "video/mp4"
+    assert response.headers["content-length"] == str(len(VIDEO))
+
+
+def test_single_range(client, video):
+    response = client.get(video, headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.content == VIDEO[100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{len(VIDEO)}"
+
+    tail = client.get(video, headers={"Range": "bytes=-10"})
+    assert tail.content == VIDEO[-10:]
+
+
+def test_multi_range_gets_the_whole_file(client, video):
+    response = client.get(video, headers={"Range": "bytes=0-9,20-29"})
+    assert response.status_code == 200
+    assert response.content == VIDEO
+
+
+def test_range_past_the_end_is_416(client, video):
+    response = client.get(video, headers={"Range": f"bytes={len(VIDEO)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(VIDEO)}"
+    assert response.content == b""
+
+
+def test_if_range(client, video):
+    headers = client.head(video).headers
+    etag, last_modified = headers["etag"], headers["last-modified"]
+    assert client.get(video, headers={"Range": "bytes=0-9", "If-Range": etag}).status_code == 206
+    assert client.get(video, headers={"Range": "bytes=0-9", "If-Range": last_modified}).status_code == 206
+    for stale in ('"other"', f"W/{etag}", "Mon, 01 Jan 2001 00:00:00 GMT"):
+        response = client.get(video, headers={"Range": "bytes=0-9", "If-Range": stale})
+        assert response.status_code == 200
+        assert response.content == VIDEO
+
+
+def test_head_and_conditional_get(client, video):
+    head = client.head(video)
+    assert head.status_code == 200
+    assert head.content == b""
+    assert head.headers["content-length"] == str(len(VIDEO))
+    assert client.get(video, headers={"If-None-Match": head.headers["etag"]}).status_code == 304
+
+
+def test_missing_media(client, sync_db):
+    lesson_id = sync_db.lessons.insert_one({"title": "L", "video_url": "/uploads/videos/gone.mp4",
+                                            "document_url": "https://cdn.example.com/notes.pdf"}).inserted_id
+    assert client.get(f"/lessons/{lesson_id}/video").status_code == 404
+    redirect = client.get(f"/lessons/{lesson_id}/document", follow_redirects=False)
+    assert redirect.status_code == 307
+    assert redirect.headers["location"] == "https://cdn.example.com/notes.pdf"
+
+
+def test_handle_cache_reuses_and_replaces(tmp_path):
+    handles = FileHandleCache(maxsize=1)
+    first, second = tmp_path / "a.mp4", tmp_path / "b.mp4"
+    first.write_bytes(b"one")
+    second.write_bytes(b"two")
+
+    handle = handles.acquire(str(first))
+    handles.release(handle)
+    assert handles.acquire(str(first)) is handle
+    assert handles.stats()["hits"] == 1
+
+    # Evicted while in use: the descriptor stays open until released
+    other = handles.acquire(str(second))
+    assert handle.evicted
+    assert os.pread(handle.fd, 3, 0) == b"one"
+    handles.release(handle)
+    handles.release(other)
+    assert handles.stats()["open_handles"] == 1
+
+    # A replaced file gets a new handle
+    second.write_bytes(b"replaced")
+    replaced = handles.acquire(str(second))
+    assert replaced is not other and replaced.size == len(b"replaced")
+    handles.release(replaced)
+    with pytest.raises(FileNotFoundError):
+        handles.acquire(str(tmp_path))
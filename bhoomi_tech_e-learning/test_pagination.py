@@ -0,0 +1,93 @@
+"""Keyset cursor pagination (database/pagination.py)."""
+import base64
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId, json_util
+from pymongo import DESCENDING
+
+from database.pagination import (
+    MAX_PAGE_SIZE, InvalidCursor, clamp_page_size, decode_cursor, encode_cursor, paginate,
+)
+
+
+def _token(position) -> str:
+    return base64.urlsafe_b64encode(json_util.dumps(position).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip_keeps_id_and_sort_key():
+    oid = ObjectId()
+    when = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    position = decode_cursor(encode_cursor({"_id": oid, "created_at": when}, "created_at"))
+    assert position["id"] == oid
+    assert position["k"].replace(tzinfo=timezone.utc) == when
+
+
+def test_public_documents_encode_from_string_id():
+    oid = ObjectId()
+    assert decode_cursor(encode_cursor({"id": str(oid)}))["id"] == oid
+
+
+@pytest.mark.parametrize("token", [
+    "not base64 at all!",
+    "e30",                            # {} : no position
+    _token([1, 2]),                   # not an object
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    "",
+])
+def test_bad_cursors_raise_invalid_cursor(token):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token)
+
+
+def test_clamp_page_size():
+    assert clamp_page_size(None) == clamp_page_size(0) == clamp_page_size(-5) == 20
+    assert clamp_page_size(MAX_PAGE_SIZE + 1) == MAX_PAGE_SIZE
+
+
+@pytest.mark.anyio
+async def test_pages_cover_every_document_once(db):
+    await db.courses.insert_many([{"n": i} for i in range(7)])
+    seen, cursor = [], None
+    while True:
+        docs, cursor = await paginate(db.courses, cursor=cursor, limit=3)
+        seen += [doc["n"] for doc in docs]
+        if cursor is None:
+            break
+    assert seen == list(range(7))
+
+
+@pytest.mark.anyio
+async def test_ties_on_the_sort_key_are_broken_by_id(db):
+    same = datetime(2024, 1, 1)
+    await db.courses.insert_many([{"n": i, "created_at": same - timedelta(days=i // 3)} for i in range(6)])
+    seen, cursor = [], None
+    while True:
+        docs, cursor = await paginate(db.courses, cursor=cursor, limit=2, sort_key="created_at",
+                                      direction=DESCENDING, projection={"n": 1})
+        seen += [doc["n"] for doc in docs]
+        if cursor is None:
+            break
+    assert sorted(seen) == list(range(6)) and len(seen) == 6
+
+
+@pytest.mark.anyio
+async def test_tampered_cursor_with_a_foreign_id_type_returns_no_rows(db):
+    await db.courses.insert_many([{"n": i} for i in range(3)])
+    docs, cursor = await paginate(db.courses, cursor=_token({"id": "zzz"}), limit=10)
+    assert docs == [] and cursor is None
+
+
+def test_api_answers_400_for_a_bad_cursor(client):
+    response = client.get("/courses/", params={"cursor": "garbage!!"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid pagination cursor"
+
+
+def test_api_pages_through_courses(client, sync_db):
+    sync_db.courses.insert_many([{"title": f"Course {i}", "is_active": True} for i in range(5)])
+    first = client.get("/courses/", params={"limit": 3}).json()
+    second = client.get("/courses/", params={"limit": 3, "cursor": first["next_cursor"]}).json()
+    titles = [course["title"] for course in first["courses"] + second["courses"]]
+    assert titles == [f"Course {i}" for i in range(5)]
+    assert second["next_cursor"] is None
@@ -0,0 +1,53 @@
+"""Password hashing on the bounded bcrypt pool (auth.py)."""
+import asyncio
+import threading
+
+import pytest
+from passlib.hash import bcrypt
+
+import auth
+from auth import PasswordHasherBusy, hash_password_async, verify_password_async
+
+
+@pytest.mark.anyio
+async def test_hash_and_verify():
+    hashed = await hash_password_async("secret")
+    assert await verify_password_async("secret", hashed) == (True, None)
+    assert (await verify_password_async("wrong", hashed))[0] is False
+
+
+@pytest.mark.anyio
+async def test_outdated_cost_is_rehashed():
+    old = bcrypt.using(rounds=5).hash("secret")
+    valid, new_hash = await verify_password_async("secret", old)
+    assert valid
+    assert bcrypt.from_string(new_hash).rounds == auth.config.BCRYPT_ROUNDS
+
+
+@pytest.mark.anyio
+async def test_busy_when_too_many_jobs_are_pending(monkeypatch):
+    monkeypatch.setattr(auth.config, "PASSWORD_HASH_MAX_PENDING", 1)
+    release = threading.Event()
+    blocked = asyncio.ensure_future(auth._run_hash_job(release.wait))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(PasswordHasherBusy) as error:
+        await hash_password_async("secret")
+    assert error.value.status_code == 503
+    assert error.value.headers == {"Retry-After": "1"}
+
+    release.set()
+    await blocked
+    assert auth._pending_hashes == 0
+    assert await hash_password_async("secret")
+
+
+def test_login_stores_the_rehashed_password(client, sync_db):
+    sync_db.users.insert_one({
+        "name": "Old", "email": "old@example.com", "role": "student", "is_active": True,
+        "password": bcrypt.using(rounds=5).hash("secret"),
+    })
+    assert client.post("/auth/login", json={"email": "old@example.com", "password": "wrong"}).status_code == 401
+    assert client.post("/auth/login", json={"email": "old@example.com", "password": "secret"}).status_code == 200
+    stored = sync_db.users.find_one({"email": "old@example.com"})["password"]
+    assert bcrypt.from_string(stored).rounds == auth.config.BCRYPT_ROUNDS
@@ -0,0 +1,62 @@
+"""Cached user lookup in middleware.get_current_user."""
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+import middleware
+from database.repositories.admin_repository import AdminRepository
+from database.repositories.user_repository import UserRepository
+
+
+def credentials(headers):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=headers["Authorization"].split()[1])
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    calls = []
+    find_by_email = UserRepository.find_by_email
+
+    async def counting(email):
+        calls.append(email)
+        return await find_by_email(email)
+    monkeypatch.setattr(UserRepository, "find_by_email", staticmethod(counting))
+    return calls
+
+
+@pytest.mark.anyio
+async def test_one_lookup_per_token(make_user, lookups):
+    _, headers = make_user("student")
+    first = await middleware.get_current_user(credentials(headers))
+    first["role"] = "admin"
+    second = await middleware.get_current_user(credentials(headers))
+    assert len(lookups) == 1
+    # Callers get a copy, never the cached document
+    assert second["role"] == "student"
+
+
+@pytest.mark.anyio
+async def test_user_writes_drop_the_cached_principal(make_user, lookups):
+    user_id, headers = make_user("student")
+    await middleware.get_current_user(credentials(headers))
+
+    await UserRepository.update(user_id, {"role": "instructor"})
+    assert (await middleware.get_current_user(credentials(headers)))["role"] == "instructor"
+    assert len(lookups) == 2
+
+    await AdminRepository.bulk_user_action([user_id], "deactivate")
+    assert (await middleware.get_current_user(credentials(headers)))["is_active"] is False
+
+    await UserRepository.delete(user_id)
+    with pytest.raises(HTTPException) as error:
+        await middleware.get_current_user(credentials(headers))
+    assert error.value.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_bad_token_is_not_looked_up(sync_db, lookups):
+    bad = HTTPAuthorizationCredentials(scheme="Bearer", credentials="not-a-token")
+    with pytest.raises(HTTPException) as error:
+        await middleware.get_current_user(bad)
+    assert error.value.status_code == 401
+    assert lookups == []
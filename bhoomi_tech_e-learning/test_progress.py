@@ -0,0 +1,114 @@
+"""Write-coalescing enrollment progress buffer (database/progress.py)."""
+import pytest
+from bson import ObjectId
+
+from config import config
+from database.progress import ProgressBuffer, progress_buffer
+
+
+class FailingCollection:
+    def __init__(self, collection):
+        self.collection = collection
+        self.fail = True
+
+    async def bulk_write(self, updates, ordered=True):
+        if self.fail:
+            raise RuntimeError("primary stepped down")
+        return await self.collection.bulk_write(updates, ordered=ordered)
+
+
+def test_reports_coalesce_to_the_highest():
+    buffer = ProgressBuffer(max_pending=2)
+    assert buffer.record("a", 10) is False
+    buffer.record("a", 40)
+    buffer.record("a", 30)
+    assert buffer.pending("a") == 40
+    assert buffer.record("b", 5) is True  # max_pending reached: flush now
+    buffer.forget("b", "unknown")
+    assert buffer.pending("b") is None
+
+
+def test_apply_pending_overlays_raw_and_public_documents():
+    buffer = ProgressBuffer()
+    oid = ObjectId()
+    buffer.record(str(oid), 50)
+    buffer.record("public", 20)
+    docs = [{"_id": oid, "progress": 10}, {"id": "public", "progress": 70}, {"id": "other"}]
+    assert buffer.apply_pending(docs) == [
+        {"_id": oid, "progress": 50}, {"id": "public", "progress": 70}, {"id": "other"},
+    ]
+
+
+@pytest.mark.anyio
+async def test_flush_writes_max_in_batches(db):
+    ids = (await db.enrollments.insert_many([{"progress": 90}, {"progress": 0}, {"progress": 0}])).inserted_ids
+    buffer = ProgressBuffer(batch_size=2)
+    for oid in ids:
+        buffer.record(str(oid), 50)
+
+    assert await buffer.flush(db.enrollments) == 3
+    assert [doc["progress"] async for doc in db.enrollments.find().sort("_id", 1)] == [90, 50, 50]
+    assert await buffer.flush(db.enrollments) == 0
+    stats = buffer.stats()
+    assert (stats["pending"], stats["written"], stats["flushes"], stats["max_batch_size"]) == (0, 3, 1, 3)
+
+
+@pytest.mark.anyio
+async def test_failed_flush_puts_the_batch_back(db):
+    oid = (await db.enrollments.insert_one({"progress": 0})).inserted_id
+    buffer = ProgressBuffer()
+    buffer.record(str(oid), 30)
+    failing = FailingCollection(db.enrollments)
+
+    with pytest.raises(RuntimeError):
+        await buffer.flush(failing)
+    assert buffer.pending(str(oid)) == 30
+    assert buffer.stats()["failed_flushes"] == 1
+    assert buffer.stats()["last_error"] == "primary stepped down"
+
+    buffer.record(str(oid), 60)
+    failing.fail = False
+    assert await buffer.flush(failing) == 1
+    assert (await db.enrollments.find_one({"_id": oid}))["progress"] == 60
+
+
+@pytest.mark.anyio
+async def test_failed_flush_keeps_newer_reports(db):
+    oid = str((await db.enrollments.insert_one({"progress": 0})).inserted_id)
+    buffer = ProgressBuffer()
+    buffer.record(oid, 30)
+
+    class ReportDuringWrite(FailingCollection):
+        async def bulk_write(self, updates, ordered=True):
+            # A newer report lands while the batch is being written
+            buffer.record(oid, 45)
+            return await super().bulk_write(updates, ordered)
+
+    with pytest.raises(RuntimeError):
+        await buffer.flush(ReportDuringWrite(db.enrollments))
+    assert buffer.pending(oid) == 45
+
+
+def test_progress_endpoint_buffers_reports(client, sync_db, make_user):
+    user_id, headers = make_user("student")
+    enrollment_id = str(sync_db.enrollments.insert_one({"user_id": user_id, "course_id": "c", "progress": 0}).inserted_id)
+
+    for value in (10, 35, 20):
+        response = client.put(f"/enrollments/{enrollment_id}/progress", json={"progress": value}, headers=headers)
+        assert response.status_code == 200
+    # Not written yet, but readers see it
+    assert sync_db.enrollments.find_one()["progress"] == 0
+    assert progress_buffer.pending(enrollment_id) == 35
+    assert client.get("/enrollments/my-courses", headers=headers).json()[0]["progress"] == 35
+
+    missing = client.put(f"/enrollments/{ObjectId()}/progress", json={"progress": 1}, headers=headers)
+    assert missing.status_code == 404
+
+
+def test_unbuffered_when_the_interval_is_zero(client, sync_db, make_user, monkeypatch):
+    monkeypatch.setattr(config, "PROGRESS_FLUSH_INTERVAL_SECONDS", 0)
+    user_id, headers = make_user("student")
+    enrollment_id = sync_db.enrollments.insert_one({"user_id": user_id, "progress": 0}).inserted_id
+    client.put(f"/enrollments/{enrollment_id}/progress", json={"progress": 15}, headers=headers)
+    assert sync_db.enrollments.find_one({"_id": enrollment_id})["progress"] == 15
+    assert progress_buffer.pending(str(enrollment_id)) is None
@@ -0,0 +1,55 @@
+"""Batch progress endpoint for offline clients (POST /enrollments/progress:batch)."""
+from bson import ObjectId
+
+
+def test_batch_applies_owned_events_in_one_request(client, sync_db, make_user):
+    user_id, headers = make_user("student")
+    mine = sync_db.enrollments.insert_one({"user_id": user_id, "progress": 50}).inserted_id
+    theirs = sync_db.enrollments.insert_one({"user_id": "someone-else", "progress": 0}).inserted_id
+    lesson = str(ObjectId())
+
+    events = [
+        {"enrollment_id": str(mine), "progress": 40},
+        {"enrollment_id": str(mine), "progress": 70, "lesson_id": lesson, "position": 12.5},
+        {"enrollment_id": str(mine), "lesson_id": lesson, "position": 30},
+        {"enrollment_id": str(theirs), "progress": 100},
+        {"enrollment_id": "not-an-id", "progress": 1},
+        {"enrollment_id": str(mine), "lesson_id": "$where", "position": 1},
+        {"enrollment_id": str(mine)},
+        {"enrollment_id": str(ObjectId()), "progress": 5},
+    ]
+    response = client.post("/enrollments/progress:batch", json={"events": events}, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["applied"] == 3
+    assert body["rejected"] == [
+        {"index": 3, "enrollment_id": str(theirs), "reason": "Enrollment not found"},
+        {"index": 4, "enrollment_id": "not-an-id", "reason": "Invalid id"},
+        {"index": 5, "enrollment_id": str(mine), "reason": "Invalid id"},
+        {"index": 6, "enrollment_id": str(mine), "reason": "Nothing to apply"},
+        {"index": 7, "enrollment_id": events[7]["enrollment_id"], "reason": "Enrollment not found"},
+    ]
+
+    enrollment = sync_db.enrollments.find_one({"_id": mine})
+    # Progress only moves forward; the last position per lesson wins
+    assert enrollment["progress"] == 70
+    assert enrollment["lesson_positions"] == {lesson: 30}
+    assert sync_db.enrollments.find_one({"_id": theirs})["progress"] == 0
+
+
+def test_batch_never_lowers_progress(client, sync_db, make_user):
+    user_id, headers = make_user("student")
+    enrollment = sync_db.enrollments.insert_one({"user_id": user_id, "progress": 80}).inserted_id
+    response = client.post("/enrollments/progress:batch",
+                           json={"events": [{"enrollment_id": str(enrollment), "progress": 20}]}, headers=headers)
+    assert response.json() == {"applied": 1, "rejected": []}
+    assert sync_db.enrollments.find_one({"_id": enrollment})["progress"] == 80
+
+
+def test_batch_size_limits(client, make_user):
+    _, headers = make_user("student")
+    assert client.post("/enrollments/progress:batch", json={"events": []}, headers=headers).status_code == 422
+    events = [{"enrollment_id": str(ObjectId()), "progress": 1}] * 501
+    assert client.post("/enrollments/progress:batch", json={"events": events}, headers=headers).status_code == 422
+    negative = [{"enrollment_id": str(ObjectId()), "lesson_id": str(ObjectId()), "position": -1}]
+    assert client.post("/enrollments/progress:batch", json={"events": negative}, headers=headers).status_code == 422
@@ -0,0 +1,43 @@
+"""Projection profiles on repository reads (database/projections.py)."""
+import pytest
+
+from database.projections import ADMIN, DETAIL, SUMMARY, projection_for
+
+
+def test_projection_for():
+    assert projection_for("users", None) is None
+    assert projection_for("courses", DETAIL) is None
+    assert projection_for("users", ADMIN) == {"password": 0}
+    assert projection_for("sessions", SUMMARY) is None
+    with pytest.raises(ValueError):
+        projection_for("courses", "everything")
+
+
+def test_callers_get_a_copy():
+    projection_for("users", DETAIL)["email"] = 0
+    assert projection_for("users", DETAIL) == {"password": 0}
+
+
+def test_course_listing_leaves_out_lesson_content(client, sync_db):
+    sync_db.courses.insert_one({
+        "title": "C", "description": "D", "lessons": ["l1", "l2"], "lesson_count": 2,
+        "syllabus": "long text", "is_active": True,
+    })
+    listed = client.get("/courses/").json()["courses"][0]
+    assert listed["lesson_count"] == 2
+    assert "lessons" not in listed and "syllabus" not in listed
+
+    detail = client.get(f"/courses/{listed['id']}").json()
+    assert detail["lessons"] == ["l1", "l2"]
+    assert detail["syllabus"] == "long text"
+
+
+def test_user_reads_never_return_the_password(client, make_user):
+    user_id, headers = make_user("admin")
+    listed = client.get("/users/", headers=headers).json()["users"]
+    assert set(listed[0]) == {"id", "name", "email", "role", "is_active"}
+
+    for path in (f"/users/{user_id}", f"/admin/users/{user_id}"):
+        user = client.get(path, headers=headers).json()
+        assert user["id"] == user_id
+        assert "password" not in user
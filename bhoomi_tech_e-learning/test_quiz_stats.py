@@ -0,0 +1,87 @@
+"""Running per-quiz result statistics (database/quiz_stats.py)."""
+import statistics
+
+import pytest
+
+from database import quiz_stats
+from database.quiz_stats import histogram_bucket, record_results, summarize
+
+
+@pytest.mark.parametrize("score,bucket", [(0, 0), (9.99, 0), (10, 1), (89.5, 8), (90, 9), (100, 9), (-5, 0), (120, 9)])
+def test_histogram_bucket(score, bucket):
+    assert histogram_bucket(score) == bucket
+
+
+def test_empty_summary():
+    summary = summarize(None, "quiz")
+    assert (summary["count"], summary["mean"], summary["variance"], summary["questions"]) == (0, None, None, [])
+    assert [bucket["range"] for bucket in summary["histogram"]] == [
+        "[0,10)", "[10,20)", "[20,30)", "[30,40)", "[40,50)",
+        "[50,60)", "[60,70)", "[70,80)", "[80,90)", "[90,100]",
+    ]
+
+
+RESULTS = [
+    {"score": 100.0, "total_questions": 3, "question_correct": [True, True, True]},
+    {"score": 200 / 3, "total_questions": 3, "question_correct": [True, True, False]},
+    {"score": 0.0, "total_questions": 3, "question_correct": [False, False, False]},
+    {"score": 50.0, "total_questions": 2},  # stored before question_correct was recorded
+]
+
+
+@pytest.mark.anyio
+async def test_results_fold_into_one_document(db):
+    await record_results("quiz", RESULTS[:2])
+    await record_results("quiz", RESULTS[2:])
+    await record_results("quiz", [])
+
+    summary = await quiz_stats.get_stats("quiz")
+    scores = [result["score"] for result in RESULTS]
+    assert summary["count"] == 4
+    assert summary["mean"] == round(statistics.mean(scores), 4)
+    assert summary["variance"] == round(statistics.pvariance(scores), 4)
+    assert (summary["min"], summary["max"]) == (0.0, 100.0)
+    assert {b["range"]: b["count"] for b in summary["histogram"] if b["count"]} == {
+        "[0,10)": 1, "[50,60)": 1, "[60,70)": 1, "[90,100]": 1,
+    }
+    assert [q["correct"] for q in summary["questions"]] == [2, 2, 1]
+    assert summary["questions"][0]["correct_rate"] == 0.5
+
+
+@pytest.mark.anyio
+async def test_identical_scores_have_zero_variance(db):
+    await record_results("quiz", [{"score": 100 / 3}] * 7)
+    assert (await quiz_stats.get_stats("quiz"))["variance"] == 0.0
+
+
+@pytest.mark.anyio
+async def test_backfill_matches_the_running_statistics(db):
+    await record_results("quiz", RESULTS)
+    running = await quiz_stats.get_stats("quiz")
+    await db.quiz_results.insert_many([dict(result, quiz_id="quiz") for result in RESULTS])
+    await db.quiz_stats.insert_one({"_id": "deleted-quiz", "count": 3})
+
+    assert await quiz_stats.backfill() == 1
+    rebuilt = await quiz_stats.get_stats("quiz")
+    assert {k: v for k, v in rebuilt.items() if k != "updated_at"} == \
+        {k: v for k, v in running.items() if k != "updated_at"}
+    assert await db.quiz_stats.find_one({"_id": "deleted-quiz"}) is None
+
+
+def test_stats_endpoint_follows_submissions(client, sync_db, make_user):
+    quiz_id = str(sync_db.quizzes.insert_one({"course_id": "c", "questions": [
+        {"question": "q", "options": ["a", "b"], "answer": "a"},
+        {"question": "q", "options": ["a", "b"], "answer": "b"},
+    ]}).inserted_id)
+    _, student = make_user("student")
+    _, instructor = make_user("instructor")
+    for answers in (["a", "b"], ["a", "a"]):
+        client.post(f"/quizzes/{quiz_id}/submit", json={"quiz_id": quiz_id, "answers": answers}, headers=student)
+
+    stats = client.get(f"/quizzes/{quiz_id}/stats", headers=instructor).json()
+    assert (stats["count"], stats["mean"]) == (2, 75.0)
+    assert [q["correct_rate"] for q in stats["questions"]] == [1.0, 0.5]
+    assert client.get(f"/quizzes/{quiz_id}/stats", headers=student).status_code == 403
+
+    client.delete(f"/quizzes/{quiz_id}", headers=instructor)
+    assert sync_db.quiz_stats.count_documents({}) == 0
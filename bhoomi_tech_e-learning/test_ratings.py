@@ -0,0 +1,96 @@
+"""Course rating summaries kept by adjust_course_rating (database/counters.py)."""
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from database.counters import adjust_course_rating, rating_average, reconcile_counters
+
+EMPTY_HISTOGRAM = {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0}
+
+
+def test_rating_average():
+    assert rating_average(0, 0) is None
+    assert rating_average(3, 13) == 4.33
+    assert rating_average(2, 9) == 4.5
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("course_id,rating", [("not-an-id", 5), (None, 5), (ObjectId(), 0), (ObjectId(), 6)])
+async def test_ignored_adjustments(db, course_id, rating):
+    known = (await db.courses.insert_one({"title": "C", "version": 1})).inserted_id
+    await adjust_course_rating(course_id, rating, 1)
+    await adjust_course_rating(known, 6, 1)
+    assert await db.courses.find_one({"_id": known}) == {"_id": known, "title": "C", "version": 1}
+
+
+@pytest.mark.requires_server
+@pytest.mark.anyio
+async def test_concurrent_adjustments_lose_nothing(db):
+    course_id = (await db.courses.insert_one({"title": "C", "version": 1})).inserted_id
+    added = [1, 2, 3, 4, 5] * 20
+    removed = [5, 5, 1]
+    await asyncio.gather(
+        *(adjust_course_rating(str(course_id), rating, 1) for rating in added),
+        *(adjust_course_rating(course_id, rating, -1) for rating in removed),
+    )
+
+    course = await db.courses.find_one({"_id": course_id})
+    assert course["rating_count"] == len(added) - len(removed)
+    assert course["rating_sum"] == sum(added) - sum(removed)
+    assert course["rating_histogram"] == {"1": 19, "2": 20, "3": 20, "4": 20, "5": 18}
+    assert course["rating_average"] == rating_average(course["rating_count"], course["rating_sum"])
+    assert course["version"] == 1 + len(added) + len(removed)
+
+
+@pytest.mark.requires_server
+@pytest.mark.anyio
+async def test_removing_the_last_review_clears_the_average(db):
+    course_id = (await db.courses.insert_one({"title": "C"})).inserted_id
+    await adjust_course_rating(course_id, 4, 1)
+    assert (await db.courses.find_one({"_id": course_id}))["rating_average"] == 4
+    await adjust_course_rating(course_id, 4, -1)
+    course = await db.courses.find_one({"_id": course_id})
+    assert (course["rating_count"], course["rating_average"]) == (0, None)
+
+
+@pytest.mark.requires_server
+def test_review_endpoints_move_the_summary(client, sync_db):
+    course_id = str(sync_db.courses.insert_one({"title": "C", "is_active": True}).inserted_id)
+    ids = [client.post("/reviews/", json={"id": None, "user_id": "u", "course_id": course_id, "rating": rating})
+           .json()["id"] for rating in (5, 4, 4)]
+    assert client.get(f"/courses/{course_id}").json()["rating_average"] == 4.33
+
+    assert client.delete(f"/reviews/{ids[0]}").status_code == 200
+    assert client.delete(f"/reviews/{ids[0]}").status_code == 404
+    assert client.get(f"/courses/{course_id}").json()["rating_average"] == 4.0
+
+
+@pytest.mark.anyio
+async def test_reconcile_rebuilds_drifted_summaries(db):
+    # Only the rating summaries are off
+    counters = {"enrollment_count": 0, "lesson_count": 0, "version": 1}
+    drifted = (await db.courses.insert_one({
+        "title": "Drifted", "rating_count": 9, "rating_sum": 9, "rating_average": 1.0,
+        "rating_histogram": dict(EMPTY_HISTOGRAM, **{"1": 9}), **counters,
+    })).inserted_id
+    consistent = (await db.courses.insert_one({
+        "title": "Consistent", "rating_count": 1, "rating_sum": 3, "rating_average": 3.0,
+        "rating_histogram": dict(EMPTY_HISTOGRAM, **{"3": 1}), **counters,
+    })).inserted_id
+    await db.reviews.insert_many([
+        {"course_id": str(drifted), "rating": 5},
+        {"course_id": drifted, "rating": 4},
+        {"course_id": str(drifted), "rating": 4},
+        {"course_id": str(drifted), "rating": 9},  # not a star rating: ignored
+        {"course_id": str(consistent), "rating": 3},
+    ])
+
+    summary = await reconcile_counters()
+    assert summary["courses.rating_*"] == 1
+    course = await db.courses.find_one({"_id": drifted})
+    assert (course["rating_count"], course["rating_sum"], course["rating_average"]) == (3, 13, 4.33)
+    assert course["rating_histogram"] == dict(EMPTY_HISTOGRAM, **{"4": 2, "5": 1})
+    assert course["version"] == 2
+    assert (await db.courses.find_one({"_id": consistent}))["version"] == 1
+    assert (await reconcile_counters())["courses.rating_*"] == 0
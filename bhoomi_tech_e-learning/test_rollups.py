@@ -0,0 +1,94 @@
+"""Pre-aggregated daily analytics (database/rollups.py)."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from database import rollups
+
+
+def test_day_key_is_the_utc_day():
+    ist = timezone(timedelta(hours=5, minutes=30))
+    assert rollups.day_key(datetime(2024, 3, 1, 2, 0, tzinfo=ist)) == "2024-02-29"
+    assert rollups.day_key(datetime(2024, 3, 1, 23, 59)) == "2024-03-01"
+
+
+@pytest.mark.anyio
+async def test_write_paths_bump_the_day(db):
+    now = datetime.now(timezone.utc)
+    yesterday = now - timedelta(days=1)
+    await rollups.record_signup(now)
+    await rollups.record_signup(now)
+    await rollups.record_revenue(49.5, yesterday)
+    await rollups.record_revenue(10, yesterday)
+    await rollups.record_revenue(10, yesterday, delta=-1)
+    await rollups.record_enrollment("c1", now)
+    await rollups.record_enrollment("c1", now, delta=-1)
+
+    assert await rollups.daily_series("signups", 7) == [{"_id": rollups.day_key(now), "count": 2}]
+    assert await rollups.daily_series("revenue", 7) == [{"_id": rollups.day_key(yesterday), "count": 49.5}]
+    # A day whose enrollments cancel out is left out of the series
+    assert await rollups.daily_series("enrollments", 7) == []
+    bucket = await db.daily_stats.find_one({"_id": rollups.day_key(yesterday)})
+    assert bucket["completed_payments"] == 1
+    assert bucket["month"] == rollups.day_key(yesterday)[:7]
+
+
+@pytest.mark.anyio
+async def test_monthly_totals(db):
+    await rollups.record_signup(datetime(2024, 1, 31, tzinfo=timezone.utc))
+    await rollups.record_signup(datetime(2024, 2, 1, tzinfo=timezone.utc))
+    await rollups.record_signup(datetime(2024, 2, 2, tzinfo=timezone.utc))
+    assert await rollups.monthly_totals("signups", "2024-01-01") == {"2024-01": 1, "2024-02": 2}
+    assert await rollups.monthly_totals("signups", "2024-02-01") == {"2024-02": 2}
+
+
+@pytest.mark.anyio
+async def test_top_courses(db):
+    popular = (await db.courses.insert_one({"title": "Popular"})).inserted_id
+    quiet = (await db.courses.insert_one({"title": "Quiet"})).inserted_id
+    now = datetime.now(timezone.utc)
+    for when in (now, now - timedelta(days=1), now - timedelta(days=2)):
+        await rollups.record_enrollment(str(popular), when)
+    await rollups.record_enrollment(str(quiet), now)
+    await rollups.record_enrollment(str(quiet), now, delta=-1)
+    await rollups.record_enrollment("gone", now)
+    await rollups.record_enrollment(str(popular), now - timedelta(days=40))
+
+    top = await rollups.top_courses(30)
+    assert top == [
+        {"_id": {"course_id": str(popular), "course_title": "Popular"}, "enrollments": 3},
+        {"_id": {"course_id": "gone", "course_title": None}, "enrollments": 1},
+    ]
+
+
+@pytest.mark.anyio
+async def test_backfill_matches_the_write_paths(db):
+    course = (await db.courses.insert_one({"title": "C"})).inserted_id
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    earlier = now - timedelta(days=3)
+    await db.users.insert_many([
+        {"email": "a@example.com", "created_at": now},
+        {"email": "b@example.com", "created_at": earlier},
+        {"email": "c@example.com"},
+    ])
+    await db.enrollments.insert_many([
+        {"course_id": course, "enrolled_at": now},
+        {"course_id": str(course), "enrolled_at": now},
+    ])
+    await db.payments.insert_many([
+        {"amount": 20, "status": "completed", "payment_date": earlier},
+        {"amount": 5, "status": "completed", "created_at": earlier},
+        {"amount": 99, "status": "pending", "payment_date": earlier},
+    ])
+
+    summary = await rollups.backfill()
+    assert summary == {rollups.DAILY_STATS: 2, rollups.DAILY_COURSE_ENROLLMENTS: 1}
+    today = await db.daily_stats.find_one({"_id": rollups.day_key(now)})
+    assert (today["signups"], today["enrollments"], today["revenue"]) == (1, 2, 0)
+    before = await db.daily_stats.find_one({"_id": rollups.day_key(earlier)})
+    assert (before["signups"], before["revenue"], before["completed_payments"]) == (1, 25, 2)
+    assert (await rollups.top_courses(7))[0]["enrollments"] == 2
+
+    # A second run rebuilds rather than adds
+    await rollups.backfill(days=7)
+    assert (await db.daily_stats.find_one({"_id": rollups.day_key(now)}))["enrollments"] == 2
@@ -0,0 +1,154 @@
+"""In-process full-text search (search.SearchIndex)."""
+import asyncio
+
+import pytest
+
+from search import CollectionIndex, SearchIndex, normalize, tokenize
+
+
+def courses_index(*docs):
+    index = SearchIndex("courses", {"title": 3.0, "description": 1.0}, ("is_active",))
+    for doc in docs:
+        index.add(doc)
+    return index
+
+
+def test_normalize_and_tokenize():
+    assert normalize("Café ÉCOLE") == "cafe ecole"
+    assert tokenize("Intro to C++, part-2") == ["intro", "to", "c", "part", "2"]
+    assert tokenize(None) == []
+
+
+def test_collection_index_is_abstract():
+    with pytest.raises(TypeError):
+        CollectionIndex("courses", ["title"])
+
+
+def test_ranking():
+    index = courses_index(
+        {"_id": "title-hit", "title": "Python basics", "is_active": True},
+        {"_id": "description-hit", "title": "Basics", "description": "with python", "is_active": True},
+        {"_id": "prefix-hit", "title": "Pythonic code", "is_active": False},
+        {"_id": "other", "title": "Java"},
+    )
+    assert index.search("python") == ["title-hit", "prefix-hit", "description-hit"]
+    # Every token has to match
+    assert index.search("python basics") == ["title-hit", "description-hit"]
+    # No whole-term match: title prefixes outrank description prefixes
+    assert index.search("pyth") == ["prefix-hit", "title-hit", "description-hit"]
+    assert index.search("python", {"is_active": True}, limit=1) == ["title-hit"]
+    assert index.search("cobol") == []
+    assert index.search("!!") == []
+
+
+def test_re_adding_and_removing_documents():
+    index = courses_index({"_id": "1", "title": "Old title"})
+    index.add({"_id": "1", "title": "New title"})
+    assert index.search("old") == []
+    assert index.search("new") == ["1"]
+    index.remove("1")
+    assert index.search("title") == []
+    assert index.stats()["terms"] == 0
+
+
+@pytest.mark.anyio
+async def test_query_waits_for_the_first_build(db):
+    index = courses_index()
+    await db.courses.insert_one({"title": "Python", "is_active": True})
+    assert await index.query("python", database=db) is None
+    await index.rebuild(db)
+    assert len(await index.query("python", {"is_active": None}, database=db)) == 1
+
+
+@pytest.mark.anyio
+async def test_stale_documents_are_reloaded_before_searching(db):
+    index = courses_index()
+    await index.rebuild(db)
+    course = (await db.courses.insert_one({"title": "Rust"})).inserted_id
+    assert await index.query("rust", database=db) == []
+
+    index.mark_stale(course)
+    assert await index.query("rust", database=db) == [str(course)]
+
+    await db.courses.delete_one({"_id": course})
+    index.mark_stale(course, "not-an-id")
+    assert await index.query("rust", database=db) == []
+    assert index.stats()["stale"] == 0
+
+
+class PausedDatabase:
+    """Reads the documents, then holds find().to_list() until release is set"""
+
+    def __init__(self, database):
+        self.database = database
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    def __getitem__(self, name):
+        paused, collection = self, self.database[name]
+
+        class Cursor:
+            def __init__(self, cursor):
+                self.cursor = cursor
+
+            async def to_list(self, length=None):
+                docs = await self.cursor.to_list(length)
+                paused.started.set()
+                await paused.release.wait()
+                return docs
+
+        class Collection:
+            def find(self, *args, **kwargs):
+                return Cursor(collection.find(*args, **kwargs))
+        return Collection()
+
+
+@pytest.mark.anyio
+async def test_write_during_a_refresh_stays_stale(db):
+    index = courses_index()
+    await index.rebuild(db)
+    course = (await db.courses.insert_one({"title": "First"})).inserted_id
+    index.mark_stale(course)
+
+    paused = PausedDatabase(db)
+    refresh = asyncio.ensure_future(index.refresh(paused))
+    await paused.started.wait()
+    # Written after the reload read the document
+    await db.courses.update_one({"_id": course}, {"$set": {"title": "Second"}})
+    index.mark_stale(course)
+    paused.release.set()
+    await refresh
+
+    assert index.search("first") == [str(course)]
+    assert index.stats()["stale"] == 1
+    assert await index.query("second", database=db) == [str(course)]
+
+
+@pytest.mark.anyio
+async def test_concurrent_queries_share_one_reload(db):
+    index = courses_index()
+    await index.rebuild(db)
+    course = (await db.courses.insert_one({"title": "Go"})).inserted_id
+    index.mark_stale(course)
+
+    paused = PausedDatabase(db)
+    first = asyncio.ensure_future(index.query("go", database=paused))
+    await paused.started.wait()
+    second = asyncio.ensure_future(index.query("go", database=db))
+    await asyncio.sleep(0)
+    assert not second.done()
+    paused.release.set()
+    assert await first == await second == [str(course)]
+
+
+def test_course_search_endpoint(client, make_user):
+    _, headers = make_user("instructor")
+    # Created through the API, which marks them stale in the application's index
+    for title, description in (("Quantum cooking", "Recipes"), ("Baking", "Quantum recipes")):
+        response = client.post("/courses/", json={"title": title, "description": description}, headers=headers)
+        assert response.status_code == 200
+
+    body = client.get("/courses/search?q=quantum").json()
+    assert [course["title"] for course in body["courses"]] == ["Quantum cooking", "Baking"]
+    assert body["total"] == 2
+    assert client.get("/courses/search?q=quantum&offset=1").json()["courses"][0]["title"] == "Baking"
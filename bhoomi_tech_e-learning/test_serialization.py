@@ -0,0 +1,70 @@
+"""Response rendering and Mongo-side id renaming (serialization.py)."""
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from bson import ObjectId
+from pydantic import BaseModel
+
+import serialization
+from serialization import dumps, find_one_public, find_public, public_id_stages
+
+
+class Point(BaseModel):
+    x: int
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(serialization, "orjson", None)
+    return request.param
+
+
+def test_dumps_handles_mongo_and_python_types(encoder):
+    oid = ObjectId()
+    content = {
+        "id": oid,
+        "at": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "day": date(2024, 1, 2),
+        "price": Decimal("9.50"),
+        "tags": frozenset(["a"]),
+        "point": Point(x=1),
+        "name": "Café",
+    }
+    assert json.loads(dumps(content)) == {
+        "id": str(oid),
+        "at": "2024-01-02T03:04:05+00:00",
+        "day": "2024-01-02",
+        "price": 9.5,
+        "tags": ["a"],
+        "point": {"x": 1},
+        "name": "Café",
+    }
+
+
+def test_json_response_skips_jsonable_encoder():
+    oid = ObjectId()
+    response = serialization.json_response({"id": oid}, status_code=201, headers={"X-Test": "1"})
+    assert response.status_code == 201
+    assert response.headers["x-test"] == "1"
+    assert json.loads(response.body) == {"id": str(oid)}
+
+
+def test_public_id_stages():
+    assert public_id_stages() == [{"$addFields": {"id": {"$toString": "$_id"}}}, {"$project": {"_id": 0}}]
+    assert public_id_stages({"title": 1})[1] == {"$project": {"title": 1, "_id": 0, "id": 1}}
+    assert public_id_stages({"password": 0})[1] == {"$project": {"password": 0, "_id": 0}}
+
+
+@pytest.mark.anyio
+async def test_find_public(db):
+    ids = (await db.courses.insert_many([{"title": f"C{i}", "rank": i, "secret": 1} for i in range(5)])).inserted_ids
+    page = await find_public(db.courses, {"rank": {"$gte": 1}}, {"rank": -1}, skip=1, limit=2,
+                             projection={"title": 1})
+    assert page == [{"id": str(ids[3]), "title": "C3"}, {"id": str(ids[2]), "title": "C2"}]
+
+    one = await find_one_public(db.courses, {"_id": ids[0]}, {"secret": 0})
+    assert one == {"id": str(ids[0]), "title": "C0", "rank": 0}
+    assert await find_one_public(db.courses, {"_id": ObjectId()}) is None
@@ -0,0 +1,148 @@
+"""Chunked, resumable lesson video uploads (video_uploads.py)."""
+import hashlib
+import os
+import time
+
+import pytest
+
+import video_uploads
+from config import config
+
+VIDEO = os.urandom(300_000)
+
+
+@pytest.fixture
+def lesson(client, sync_db, make_user):
+    _, headers = make_user("instructor")
+    lesson_id = str(sync_db.lessons.insert_one({"course_id": "c", "title": "L", "content": "..."}).inserted_id)
+    return lesson_id, headers
+
+
+def start(client, lesson_id, headers, size=len(VIDEO), filename="intro.mp4"):
+    return client.post(f"/lessons/{lesson_id}/video-uploads", json={"filename": filename, "size": size},
+                       headers=headers)
+
+
+def put(client, lesson_id, upload_id, headers, offset, data):
+    return client.put(f"/lessons/{lesson_id}/video-uploads/{upload_id}?offset={offset}", content=data,
+                      headers=headers)
+
+
+def test_resumable_upload_end_to_end(client, sync_db, lesson):
+    lesson_id, headers = lesson
+    upload = start(client, lesson_id, headers).json()
+    upload_id = upload["upload_id"]
+    assert upload["offset"] == 0
+
+    assert put(client, lesson_id, upload_id, headers, 0, VIDEO[:100_000]).json()["offset"] == 100_000
+    # Resuming: the status reports how much reached the disk
+    assert client.get(f"/lessons/{lesson_id}/video-uploads/{upload_id}", headers=headers).json()["offset"] == 100_000
+    assert put(client, lesson_id, upload_id, headers, 100_000, VIDEO[100_000:]).json()["offset"] == len(VIDEO)
+
+    done = client.post(f"/lessons/{lesson_id}/video-uploads/{upload_id}/complete",
+                       json={"sha256": hashlib.sha256(VIDEO).hexdigest().upper()}, headers=headers)
+    assert done.status_code == 200
+    video_url = done.json()["video_url"]
+    assert video_url.startswith(video_uploads.VIDEO_URL_PREFIX) and video_url.endswith(".mp4")
+    with open(os.path.join(config.VIDEO_UPLOAD_DIR, os.path.basename(video_url)), "rb") as stored:
+        assert stored.read() == VIDEO
+    assert sync_db.lessons.find_one()["video_url"] == video_url
+    assert not os.path.exists(os.path.join(config.VIDEO_UPLOAD_STAGING_DIR, upload_id + ".part"))
+    assert upload_id not in video_uploads._locks
+
+
+def test_chunk_at_the_wrong_offset(client, lesson):
+    lesson_id, headers = lesson
+    upload_id = start(client, lesson_id, headers).json()["upload_id"]
+    put(client, lesson_id, upload_id, headers, 0, VIDEO[:1000])
+
+    for offset in (0, 500, 2000):
+        response = put(client, lesson_id, upload_id, headers, offset, VIDEO[offset:offset + 1000])
+        assert response.status_code == 409
+        assert response.headers["upload-offset"] == "1000"
+    status = client.get(f"/lessons/{lesson_id}/video-uploads/{upload_id}", headers=headers).json()
+    assert status["offset"] == 1000
+
+
+@pytest.mark.anyio
+async def test_oversized_chunk_reports_what_was_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "VIDEO_UPLOAD_STAGING_DIR", str(tmp_path))
+    monkeypatch.setattr(video_uploads, "WRITE_BUFFER_SIZE", 1000)
+    upload_id = (await video_uploads.init_upload("lesson", "a.mp4", 5500, "user"))["upload_id"]
+
+    async def chunks():
+        for start in range(0, 6000, 1000):
+            yield VIDEO[start:start + 1000]
+
+    with pytest.raises(video_uploads.UploadError) as error:
+        await video_uploads.append_chunk("lesson", upload_id, "user", 0, chunks())
+    assert error.value.status_code == 413
+    # The bytes flushed before the overflow stay, and Upload-Offset says so
+    assert error.value.offset == 5000 == os.path.getsize(tmp_path / (upload_id + ".part"))
+
+
+def test_chunk_size_limit(client, lesson, monkeypatch):
+    lesson_id, headers = lesson
+    monkeypatch.setattr(config, "VIDEO_UPLOAD_MAX_CHUNK_BYTES", 100)
+    upload_id = start(client, lesson_id, headers).json()["upload_id"]
+    assert put(client, lesson_id, upload_id, headers, 0, VIDEO[:101]).status_code == 413
+    assert put(client, lesson_id, upload_id, headers, 0, VIDEO[:100]).json()["offset"] == 100
+
+
+def test_complete_checks_size_and_checksum(client, lesson):
+    lesson_id, headers = lesson
+    upload_id = start(client, lesson_id, headers, size=10).json()["upload_id"]
+    complete = f"/lessons/{lesson_id}/video-uploads/{upload_id}/complete"
+    put(client, lesson_id, upload_id, headers, 0, b"12345")
+
+    incomplete = client.post(complete, json={}, headers=headers)
+    assert incomplete.status_code == 409
+    assert incomplete.headers["upload-offset"] == "5"
+
+    put(client, lesson_id, upload_id, headers, 5, b"67890")
+    assert client.post(complete, json={"sha256": "0" * 64}, headers=headers).status_code == 422
+    assert client.post(complete, json={"sha256": "not-hex"}, headers=headers).status_code == 422
+    assert client.post(complete, json={}, headers=headers).status_code == 200
+
+
+@pytest.mark.parametrize("filename,size,status", [
+    ("notes.pdf", 10, 400),
+    ("intro.mp4", config.VIDEO_UPLOAD_MAX_BYTES + 1, 413),
+    ("intro.mp4", 0, 422),
+])
+def test_rejected_uploads(client, lesson, filename, size, status):
+    lesson_id, headers = lesson
+    assert start(client, lesson_id, headers, size=size, filename=filename).status_code == status
+
+
+def test_other_instructors_cannot_see_the_upload(client, lesson, make_user):
+    lesson_id, headers = lesson
+    _, other = make_user("instructor")
+    upload_id = start(client, lesson_id, headers).json()["upload_id"]
+    base = f"/lessons/{lesson_id}/video-uploads/{upload_id}"
+
+    assert client.get(base, headers=other).status_code == 404
+    assert put(client, lesson_id, upload_id, other, 0, b"x").status_code == 404
+    assert client.delete(base, headers=other).status_code == 404
+    assert client.get(f"/lessons/{lesson_id}/video-uploads/{'0' * 32}", headers=headers).status_code == 404
+    assert client.get(f"/lessons/{lesson_id}/video-uploads/..%2Fsecret", headers=headers).status_code == 404
+
+    assert client.delete(base, headers=headers).status_code == 200
+    assert client.get(base, headers=headers).status_code == 404
+
+
+@pytest.mark.anyio
+async def test_purge_drops_abandoned_uploads_and_their_locks(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "VIDEO_UPLOAD_STAGING_DIR", str(tmp_path))
+    stale = await video_uploads.init_upload("lesson", "a.mp4", 10, "user")
+    live = await video_uploads.init_upload("lesson", "b.mp4", 10, "user")
+    video_uploads._lock(stale["upload_id"])
+    video_uploads._lock(live["upload_id"])
+    long_ago = time.time() - 3600
+    for suffix in (".part", ".json"):
+        os.utime(tmp_path / (stale["upload_id"] + suffix), (long_ago, long_ago))
+
+    assert await video_uploads.purge_stale_uploads(max_age_seconds=60) == 1
+    assert sorted(os.listdir(tmp_path)) == sorted([live["upload_id"] + ".json", live["upload_id"] + ".part"])
+    assert stale["upload_id"] not in video_uploads._locks
+    assert live["upload_id"] in video_uploads._locks